@@ -1,5 +1,9 @@
+import hashlib
 import os
 import sys
+import time
+from contextlib import ExitStack, nullcontext
+from functools import partial
 from dotenv import load_dotenv
 
 # Load .env variables (picks up GROQ_API_KEY, OPENAI_API_KEY, etc.)
@@ -10,10 +14,13 @@ sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
 
 import streamlit as st  # noqa: E402
 import json  # noqa: E402
-import pandas as pd  # noqa: E402
-import pdfplumber  # noqa: E402
 from fetch_scf import PARSED_JSON_FILE  # noqa: E402
-from mapper import map_text_to_scf, analyze_audit_scope  # noqa: E402
+from src.finding_reader import iter_findings, scan_findings  # noqa: E402
+
+# pandas, pdfplumber and the mapping stack are imported inside the tool that
+# uses them, so the sidebar renders without loading them (see
+# scripts/benchmark_import_time.py)
+from src.scf_repository import get_scf_repository  # noqa: E402
 from ui.components.styles import inject_premium_css  # noqa: E402
 from ui.components.sidebar import render_sidebar  # noqa: E402
 
@@ -23,12 +30,29 @@ st.set_page_config(page_title="GRC Assistant", page_icon="🛡️", layout="wide
 inject_premium_css()
 
 # --- Sidebar Navigation & Setup ---
-app_mode, persona_prompt = render_sidebar()
+app_mode, persona_prompt, mapping_mode = render_sidebar()
 
 LAB_DATA_DIR = os.path.join(os.path.dirname(__file__), "lab_data")
 
 PRIORITY_FRAMEWORKS = ["gdpr", "iso", "nist", "soc", "pci", "ccpa", "hipaa"]
 
+# Seconds between progress refreshes while a background batch job runs
+JOB_POLL_SECONDS = 2
+
+
+def scan_findings_cached(key: str, open_source):
+    """
+    scan_findings over the source returned by `open_source()`, memoized in the
+    session under `key` (the upload's hash), so the job poll's reruns every
+    JOB_POLL_SECONDS do not re-parse the whole upload.
+    """
+    scans = st.session_state.setdefault("cw_scans", {})
+    if key not in scans:
+        with ExitStack() as stack:
+            scans.clear()
+            scans[key] = scan_findings(stack.enter_context(open_source()))
+    return scans[key]
+
 
 def load_lab_files(extension=None):
     if not os.path.exists(LAB_DATA_DIR):
@@ -43,10 +67,62 @@ def load_lab_files(extension=None):
     return files
 
 
+def render_regulations(regulations):
+    st.markdown("#### Corresponding Regulatory Mappings")
+    display_regs = {
+        r: v
+        for r, v in regulations.items()
+        if any(p in r.lower() for p in PRIORITY_FRAMEWORKS)
+    }
+    other_regs = len(regulations) - len(display_regs)
+    if display_regs:
+        st.write("🔥 **Priority Framework Mappings:**")
+        for r, v in display_regs.items():
+            st.markdown(f"- **{r}:** {v}")
+    if other_regs > 0:
+        st.caption(
+            f"*(+{other_regs} minor framework mappings generated in CSV export)*"
+        )
+
+
+def format_confidence(confidence):
+    """LLM confidence for display; reranker-only mappings have none."""
+    return "n/a (reranker)" if confidence is None else f"{confidence}%"
+
+
+def render_csv_download(results_data):
+    if not results_data:
+        return
+    import pandas as pd
+
+    st.markdown("---")
+    df = pd.DataFrame(results_data)
+    csv = df.to_csv(index=False).encode("utf-8")
+    _, col_csv2, _ = st.columns([1, 2, 1])
+    with col_csv2:
+        st.success(f"✅ Successfully mapped {len(results_data)} total controls.")
+        st.download_button(
+            "📥 Download Mappings as CSV",
+            data=csv,
+            file_name="scf_ai_crosswalk_results.csv",
+            mime="text/csv",
+            type="primary",
+            use_container_width=True,
+        )
+
+
 # ==========================================
 # TOOL 1: SCF Auto-Crosswalker
 # ==========================================
 if app_mode == "🔍 SCF Auto-Crosswalker":
+    from src.chunker import CHUNK_MAX_WORDS
+    from src.jobs import ACTIVE_STATUSES, JOB_CANCELLED, JOB_FAILED, get_job_runner
+    from src.mapper import map_batch_to_scf, map_document_to_scf, start_warmup
+
+    # Load the embedding model in the background while the user enters input
+    if os.path.exists(PARSED_JSON_FILE):
+        start_warmup(mapping_mode)
+
     st.title("🔍 SCF Auto-Crosswalker")
     st.markdown(
         "Automatically align your raw IT policies, incredibly long PDFs, or massive batches of Cloud Security Findings directly to the official Secure Controls Framework (SCF)."
@@ -58,7 +134,9 @@ if app_mode == "🔍 SCF Auto-Crosswalker":
 
     input_text = ""
     is_batch = False
-    batch_findings = []
+    # Batch exports are streamed from here at mapping time, never loaded whole
+    batch_source = None
+    batch_count = 0
 
     with tab1:
         st.markdown("### Paste Policy or Requirement")
@@ -82,25 +160,25 @@ if app_mode == "🔍 SCF Auto-Crosswalker":
                 if not _resolved.startswith(os.path.realpath(LAB_DATA_DIR) + os.sep):
                     st.error("Invalid file selection.")
                     selected_lab_file = "None"
-                with open(_resolved, "r", encoding="utf-8") as f:
-                    if selected_lab_file.endswith(".json"):
-                        data = json.load(f)
-                        if (
-                            isinstance(data, dict)
-                            and "Findings" in data
-                            and isinstance(data["Findings"], list)
-                        ):
-                            is_batch = True
-                            batch_findings = data["Findings"]
-                            st.info(
-                                f"Loaded Lab Batch: {len(batch_findings)} findings ready to map."
-                            )
-                        else:
-                            input_text = json.dumps(data, indent=2)
-                            st.info(f"Loaded Lab File: {selected_lab_file}")
+                if selected_lab_file.endswith((".json", ".jsonl")):
+                    is_collection, n_findings, first = scan_findings_cached(
+                        f"lab:{_resolved}:{os.path.getmtime(_resolved)}",
+                        partial(open, _resolved, "rb"),
+                    )
+                    if is_collection:
+                        is_batch = True
+                        batch_source = _resolved
+                        batch_count = n_findings
+                        st.info(
+                            f"Loaded Lab Batch: {batch_count} findings ready to map."
+                        )
                     else:
-                        input_text = f.read()
+                        input_text = json.dumps(first, indent=2)
                         st.info(f"Loaded Lab File: {selected_lab_file}")
+                else:
+                    with open(_resolved, "r", encoding="utf-8") as f:
+                        input_text = f.read()
+                    st.info(f"Loaded Lab File: {selected_lab_file}")
 
                 if not is_batch:
                     with st.expander("View Lab File Contents"):
@@ -112,37 +190,49 @@ if app_mode == "🔍 SCF Auto-Crosswalker":
     with tab2:
         st.markdown("### Upload Raw Documents")
         uploaded_file = st.file_uploader(
-            "Choose a PDF, JSON, or TXT file", type=["pdf", "json", "txt"], key="cw_up"
+            "Choose a PDF, JSON, JSONL, or TXT file",
+            type=["pdf", "json", "jsonl", "txt"],
+            key="cw_up",
         )
 
         if uploaded_file is not None:
             try:
                 if uploaded_file.name.endswith(".pdf"):
+                    from src.pdf_reader import extract_pdf_pages
+
+                    # Pages are extracted in parallel and cached by file hash,
+                    # so reruns and re-uploads of the same PDF are instant
                     with st.spinner("Analyzing and parsing PDF pages..."):
-                        with pdfplumber.open(uploaded_file) as pdf:
-                            pages = [
-                                page.extract_text()
-                                for page in pdf.pages
-                                if page.extract_text()
-                            ]
-                            input_text = "\n".join(pages)
+                        pdf_progress = st.progress(0)
+
+                        def report_pdf_progress(done, total):
+                            pdf_progress.progress(done / max(total, 1))
+
+                        pages = [
+                            page.text
+                            for page in extract_pdf_pages(
+                                uploaded_file, progress_callback=report_pdf_progress
+                            )
+                        ]
+                        pdf_progress.empty()
+                        input_text = "\n".join(pages)
                     st.success(
                         f"Successfully extracted {len(pages)} pages of text from the PDF."
                     )
-                elif uploaded_file.name.endswith(".json"):
-                    data = json.load(uploaded_file)
-                    if (
-                        isinstance(data, dict)
-                        and "Findings" in data
-                        and isinstance(data["Findings"], list)
-                    ):
+                elif uploaded_file.name.endswith((".json", ".jsonl")):
+                    upload_hash = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+                    is_collection, n_findings, first = scan_findings_cached(
+                        f"upload:{upload_hash}", lambda: nullcontext(uploaded_file)
+                    )
+                    if is_collection:
                         is_batch = True
-                        batch_findings = data["Findings"]
+                        batch_source = uploaded_file
+                        batch_count = n_findings
                         st.success(
-                            f"Batch Mode Activated: Successfully loaded {len(batch_findings)} separate Cloud Findings."
+                            f"Batch Mode Activated: Successfully loaded {batch_count} separate Cloud Findings."
                         )
                     else:
-                        input_text = json.dumps(data, indent=2)
+                        input_text = json.dumps(first, indent=2)
                         st.success("Successfully loaded single JSON finding.")
                 else:
                     try:
@@ -160,10 +250,9 @@ if app_mode == "🔍 SCF Auto-Crosswalker":
     st.markdown("---")
 
     texts_to_process = []
-    if is_batch:
-        texts_to_process = [json.dumps(f) for f in batch_findings]
-    elif input_text:
+    if input_text and not is_batch:
         texts_to_process = [input_text]
+    n_inputs = batch_count if is_batch else len(texts_to_process)
 
     col1, col2, col3 = st.columns([1, 1, 1])
     if col2.button(
@@ -172,199 +261,304 @@ if app_mode == "🔍 SCF Auto-Crosswalker":
         use_container_width=True,
         key="cw_btn",
     ):
-        if not texts_to_process:
+        if not n_inputs:
             st.warning(
                 "Please provide some text, select a lab file, or upload a document to proceed."
             )
-        elif not os.environ.get("GROQ_API_KEY"):
+        elif mapping_mode != "fast" and not os.environ.get("GROQ_API_KEY"):
             st.error("No GROQ_API_KEY found in .env.")
         elif not os.path.exists(PARSED_JSON_FILE):
             st.error("SCF Database not found.")
-        else:
-            with open(PARSED_JSON_FILE, "r", encoding="utf-8") as f:
-                full_scf_db = json.load(f)
-            scf_dict = {c["control_id"]: c for c in full_scf_db}
+        elif is_batch:
+            # Findings are copied into the job store and mapped on a background
+            # thread, chunk by chunk, so reruns and widget clicks no longer
+            # discard progress; the results below are rebuilt from the store
+            with st.spinner(f"Queueing {n_inputs} findings for background mapping..."):
+                with ExitStack() as stack:
+                    if isinstance(batch_source, str):
+                        stream = stack.enter_context(open(batch_source, "rb"))
+                    else:
+                        stream = batch_source
+                        stream.seek(0)
+                    st.session_state["cw_job_id"] = get_job_runner().submit(
+                        iter_findings(stream),
+                        params={
+                            "top_k": 3,
+                            "persona_prompt": persona_prompt,
+                            "mode": mapping_mode,
+                        },
+                        name=getattr(batch_source, "name", None)
+                        or os.path.basename(batch_source),
+                    )
+        elif len(input_text.split()) > CHUNK_MAX_WORDS:
+            # Long documents are mapped section by section (the embedding
+            # model would only see the first paragraph of the whole text)
+            results_data = []
+            with st.spinner(
+                "AI Engine is splitting the document into sections and mapping each against the SCF..."
+            ):
+                progress_bar = st.progress(0)
+
+                def report_progress(done, total):
+                    progress_bar.progress(done / total)
 
+                document = map_document_to_scf(
+                    input_text,
+                    top_k=3,
+                    persona_prompt=persona_prompt,
+                    mode=mapping_mode,
+                    progress_callback=report_progress,
+                )
+
+            if document is not None:
+                st.success(
+                    f"Mapping Complete! {len(document.sections)} sections analyzed."
+                )
+                st.markdown("### Document-Level Recommendations")
+                for control in document.rollup:
+                    sections = ", ".join(f"#{i + 1}" for i in control.sections)
+                    with st.expander(
+                        f"{control.control_id} - Domain: {control.domain} | Confidence: {format_confidence(control.confidence)} | Sections: {sections}"
+                    ):
+                        st.markdown(f"**Control Description:** {control.description}")
+                        st.markdown(f"**AI Justification:** {control.justification}")
+                        if control.confidence is not None:
+                            st.progress(control.confidence / 100.0)
+                        if control.regulations:
+                            render_regulations(control.regulations)
+
+                st.markdown("### Per-Section Mappings")
+                for section in document.sections:
+                    title = section.heading or section.text[:60] + "..."
+                    with st.expander(f"Section #{section.index + 1}: {title}"):
+                        if section.mapping is None:
+                            st.error(f"Error mapping this section: {section.error}")
+                            continue
+                        for mapping in section.mapping.mappings:
+                            st.markdown(
+                                f"- **{mapping.control_id}** ({format_confidence(mapping.confidence)}): {mapping.justification}"
+                            )
+                            results_data.append(
+                                {
+                                    "Finding Index": section.index + 1,
+                                    "Input Outline": title[:60],
+                                    "SCF Control ID": mapping.control_id,
+                                    "SCF Domain": mapping.domain,
+                                    "Control Description": mapping.description,
+                                    "Confidence (%)": mapping.confidence,
+                                    "AI Justification": mapping.justification,
+                                }
+                            )
+
+            render_csv_download(results_data)
+        else:
             results_data = []
-            aggregated_controls = {}
 
             with st.spinner(
-                f"AI Engine is actively scanning and cross-referencing {len(texts_to_process)} inputs against the SCF..."
+                f"AI Engine is actively scanning and cross-referencing {n_inputs} inputs against the SCF..."
             ):
                 progress_bar = st.progress(0)
-                for idx, text_block in enumerate(texts_to_process):
+
+                def report_progress(done, total):
+                    progress_bar.progress(done / total)
+
+                batch_results = map_batch_to_scf(
+                    texts_to_process,
+                    top_k=3,
+                    persona_prompt=persona_prompt,
+                    progress_callback=report_progress,
+                    mode=mapping_mode,
+                )
+                for idx, mapping_result in enumerate(batch_results):
                     try:
-                        mapping_result = map_text_to_scf(
-                            text_block, top_k=3, persona_prompt=persona_prompt
-                        )
-                        if is_batch:
-                            st.write(f"Analyzed finding #{idx + 1}...")
+                        if isinstance(mapping_result, Exception):
+                            raise mapping_result
 
                         if mapping_result and mapping_result.mappings:
-                            if not is_batch:
-                                st.success("Mapping Complete!")
-                                st.markdown("### Engine Recommendations")
+                            st.success("Mapping Complete!")
+                            st.markdown("### Engine Recommendations")
 
                             for m_idx, mapping in enumerate(mapping_result.mappings):
                                 confidence = mapping.confidence
+                                results_data.append(
+                                    {
+                                        "Finding Index": idx + 1,
+                                        "Input Outline": texts_to_process[idx][:60]
+                                        + "...",
+                                        "SCF Control ID": mapping.control_id,
+                                        "SCF Domain": mapping.domain,
+                                        "Control Description": mapping.description,
+                                        "Confidence (%)": confidence,
+                                        "AI Justification": mapping.justification,
+                                    }
+                                )
 
-                                if is_batch:
-                                    cid = mapping.control_id
-                                    if cid not in aggregated_controls:
-                                        weight = scf_dict.get(cid, {}).get("weight", 1)
-                                        aggregated_controls[cid] = {
-                                            "SCF Control ID": cid,
-                                            "SCF Domain": mapping.domain,
-                                            "Control Description": mapping.description,
-                                            "Weight": weight,
-                                            "Hit Count": 0,
-                                            "Total Confidence": 0,
-                                            "Sample Justification": mapping.justification,
-                                            "Regulations": mapping.regulations,
-                                        }
-                                    aggregated_controls[cid]["Hit Count"] += 1
-                                    aggregated_controls[cid]["Total Confidence"] += (
-                                        confidence
+                                with st.expander(
+                                    f"Top Result #{m_idx + 1} | {mapping.control_id} - Domain: {mapping.domain} | Confidence: {format_confidence(confidence)}",
+                                    expanded=True,
+                                ):
+                                    st.markdown(
+                                        f"**Control Description:** {mapping.description}"
                                     )
-                                else:
-                                    results_data.append(
-                                        {
-                                            "Finding Index": idx + 1,
-                                            "Input Outline": text_block[:60] + "...",
-                                            "SCF Control ID": mapping.control_id,
-                                            "SCF Domain": mapping.domain,
-                                            "Control Description": mapping.description,
-                                            "Confidence (%)": confidence,
-                                            "AI Justification": mapping.justification,
-                                        }
+                                    st.markdown(
+                                        f"**AI Justification:** {mapping.justification}"
                                     )
-
-                                    with st.expander(
-                                        f"Top Result #{m_idx + 1} | {mapping.control_id} - Domain: {mapping.domain} | Confidence: {confidence}%",
-                                        expanded=True,
-                                    ):
-                                        st.markdown(
-                                            f"**Control Description:** {mapping.description}"
-                                        )
-                                        st.markdown(
-                                            f"**AI Justification:** {mapping.justification}"
-                                        )
+                                    if confidence is not None:
                                         st.progress(confidence / 100.0)
-                                        if mapping.regulations:
-                                            st.markdown(
-                                                "#### Corresponding Regulatory Mappings"
-                                            )
-                                            display_regs = {
-                                                r: v
-                                                for r, v in mapping.regulations.items()
-                                                if any(
-                                                    p in r.lower()
-                                                    for p in PRIORITY_FRAMEWORKS
-                                                )
-                                            }
-                                            other_regs = len(mapping.regulations) - len(
-                                                display_regs
-                                            )
-                                            if display_regs:
-                                                st.write(
-                                                    "🔥 **Priority Framework Mappings:**"
-                                                )
-                                                for r, v in display_regs.items():
-                                                    st.markdown(f"- **{r}:** {v}")
-                                            if other_regs > 0:
-                                                st.caption(
-                                                    f"*(+{other_regs} minor framework mappings generated in CSV export)*"
-                                                )
+                                    if mapping.regulations:
+                                        render_regulations(mapping.regulations)
                     except Exception as e:
                         st.error(f"Error mapping input #{idx + 1}: {e}")
-                    progress_bar.progress((idx + 1) / len(texts_to_process))
 
-            if is_batch:
-                for cid, data in aggregated_controls.items():
-                    data["Average Confidence (%)"] = round(
-                        data["Total Confidence"] / data["Hit Count"]
-                    )
-                    # Compute a Priority Score: Weight * Hit Count
-                    data["Priority Score"] = data["Weight"] * data["Hit Count"]
+            render_csv_download(results_data)
+
+    # --- Background batch jobs ---
+    job_runner = get_job_runner()
+    recent_jobs = job_runner.store.list_jobs()
+    if recent_jobs:
+        job_labels = {
+            job[
+                "id"
+            ]: f"{job['name'] or 'Batch'} · {job['total']} findings · {job['status']}"
+            for job in recent_jobs
+        }
+        current_job_id = st.session_state.get("cw_job_id")
+        job_ids = list(job_labels)
+        selected_job_id = st.selectbox(
+            "🗂️ Batch Jobs",
+            job_ids,
+            index=job_ids.index(current_job_id) if current_job_id in job_labels else 0,
+            format_func=job_labels.get,
+        )
+        st.session_state["cw_job_id"] = selected_job_id
+        job = job_runner.store.get_job(selected_job_id)
+        running = job["status"] in ACTIVE_STATUSES
 
-                sorted_controls = sorted(
-                    aggregated_controls.values(),
-                    key=lambda x: x["Priority Score"],
-                    reverse=True,
+        st.progress(
+            job["completed"] / job["total"] if job["total"] else 1.0,
+            text=f"{job['completed']} / {job['total']} findings mapped ({job['failed']} failed) · {job['status']}",
+        )
+        if running and st.button("⏹️ Stop Job"):
+            job_runner.cancel(selected_job_id)
+        if (
+            job["status"] in (JOB_CANCELLED, JOB_FAILED)
+            or (running and not job_runner.is_running(selected_job_id))
+        ) and st.button("▶️ Resume Job"):
+            job_runner.start(selected_job_id)
+            st.rerun()
+        if job["error"]:
+            st.error(f"Job stopped: {job['error']}")
+
+        if running:
+            # Poll the job store; any widget interaction simply reruns sooner
+            time.sleep(JOB_POLL_SECONDS)
+            st.rerun()
+        elif job["completed"]:
+            scf_repo = get_scf_repository()
+            errors = 0
+            aggregated_controls = {}
+            for mapping_result in job_runner.store.iter_results(selected_job_id):
+                if isinstance(mapping_result, Exception) or mapping_result is None:
+                    errors += 1
+                    continue
+                for mapping in mapping_result.mappings:
+                    cid = mapping.control_id
+                    if cid not in aggregated_controls:
+                        control = scf_repo.get(cid) or {}
+                        weight = control.get("weight", 1)
+                        aggregated_controls[cid] = {
+                            "SCF Control ID": cid,
+                            "SCF Domain": mapping.domain,
+                            "Control Description": mapping.description,
+                            "Weight": weight,
+                            "Hit Count": 0,
+                            "Total Confidence": 0,
+                            "Rated Hits": 0,
+                            "Sample Justification": mapping.justification,
+                            "Regulations": mapping.regulations,
+                        }
+                    aggregated_controls[cid]["Hit Count"] += 1
+                    if mapping.confidence is not None:
+                        aggregated_controls[cid]["Total Confidence"] += (
+                            mapping.confidence
+                        )
+                        aggregated_controls[cid]["Rated Hits"] += 1
+            if errors:
+                st.warning(f"{errors} findings could not be mapped.")
+
+            for cid, data in aggregated_controls.items():
+                # Averaged over the LLM-rated hits; None if all were reranker-only
+                data["Average Confidence (%)"] = (
+                    round(data["Total Confidence"] / data["Rated Hits"])
+                    if data["Rated Hits"]
+                    else None
                 )
-                top_controls = sorted_controls  # Return all priority deductive controls
+                # Compute a Priority Score: Weight * Hit Count
+                data["Priority Score"] = data["Weight"] * data["Hit Count"]
 
-                st.success("Batch Mapping Complete!")
-                st.markdown(f"### 🎯 All {len(top_controls)} Priority Controls")
-                st.info(
-                    f"Analyzed {len(texts_to_process)} separate findings and consolidated them into the highest priority controls based on SCF Weighting and frequency. (Duplicates Removed)"
-                )
+            sorted_controls = sorted(
+                aggregated_controls.values(),
+                key=lambda x: x["Priority Score"],
+                reverse=True,
+            )
+            top_controls = sorted_controls  # Return all priority deductive controls
 
-                for m_idx, data in enumerate(top_controls):
-                    results_data.append(
-                        {
-                            "SCF Control ID": data["SCF Control ID"],
-                            "SCF Domain": data["SCF Domain"],
-                            "Control Description": data["Control Description"],
-                            "Priority Score": data["Priority Score"],
-                            "Hit Count": data["Hit Count"],
-                            "Average Confidence (%)": data["Average Confidence (%)"],
-                            "Weight": data["Weight"],
-                            "Sample AI Justification": data["Sample Justification"],
-                        }
-                    )
+            st.success("Batch Mapping Complete!")
+            st.markdown(f"### 🎯 All {len(top_controls)} Priority Controls")
+            st.info(
+                f"Analyzed {job['total']} separate findings and consolidated them into the highest priority controls based on SCF Weighting and frequency. (Duplicates Removed)"
+            )
 
-                    with st.expander(
-                        f"Priority #{m_idx + 1} | {data['SCF Control ID']} (Score: {data['Priority Score']}) | Hits: {data['Hit Count']}",
-                        expanded=(m_idx < 3),
-                    ):
-                        st.markdown(
-                            f"**Control Description:** {data['Control Description']}"
-                        )
-                        st.markdown(
-                            f"**Sample AI Justification:** {data['Sample Justification']}"
-                        )
-                        st.progress(data["Average Confidence (%)"] / 100.0)
-                        if data["Regulations"]:
-                            st.markdown("#### Corresponding Regulatory Mappings")
-                            display_regs = {
-                                r: v
-                                for r, v in data["Regulations"].items()
-                                if any(p in r.lower() for p in PRIORITY_FRAMEWORKS)
-                            }
-                            other_regs = len(data["Regulations"]) - len(display_regs)
-                            if display_regs:
-                                st.write("🔥 **Priority Framework Mappings:**")
-                                for r, v in display_regs.items():
-                                    st.markdown(f"- **{r}:** {v}")
-                            if other_regs > 0:
-                                st.caption(
-                                    f"*(+{other_regs} minor framework mappings generated in CSV export)*"
-                                )
+            results_data = []
+            for m_idx, data in enumerate(top_controls):
+                results_data.append(
+                    {
+                        "SCF Control ID": data["SCF Control ID"],
+                        "SCF Domain": data["SCF Domain"],
+                        "Control Description": data["Control Description"],
+                        "Priority Score": data["Priority Score"],
+                        "Hit Count": data["Hit Count"],
+                        "Average Confidence (%)": data["Average Confidence (%)"],
+                        "Weight": data["Weight"],
+                        "Sample AI Justification": data["Sample Justification"],
+                    }
+                )
 
-            if results_data:
-                st.markdown("---")
-                df = pd.DataFrame(results_data)
-                csv = df.to_csv(index=False).encode("utf-8")
-                col_csv1, col_csv2, col_csv3 = st.columns([1, 2, 1])
-                with col_csv2:
-                    st.success(
-                        f"✅ Successfully mapped {len(results_data)} total controls."
+                with st.expander(
+                    f"Priority #{m_idx + 1} | {data['SCF Control ID']} (Score: {data['Priority Score']}) | Hits: {data['Hit Count']}",
+                    expanded=(m_idx < 3),
+                ):
+                    st.markdown(
+                        f"**Control Description:** {data['Control Description']}"
                     )
-                    st.download_button(
-                        "📥 Download Mappings as CSV",
-                        data=csv,
-                        file_name="scf_ai_crosswalk_results.csv",
-                        mime="text/csv",
-                        type="primary",
-                        use_container_width=True,
+                    st.markdown(
+                        f"**Sample AI Justification:** {data['Sample Justification']}"
                     )
+                    if data["Average Confidence (%)"] is not None:
+                        st.progress(data["Average Confidence (%)"] / 100.0)
+                    if data["Regulations"]:
+                        render_regulations(data["Regulations"])
+
+            render_csv_download(results_data)
 
 # ==========================================
 # ==========================================
 # TOOL 2: Compliance Gap Analyzer
 # ==========================================
 elif app_mode == "📉 Compliance Gap Analyzer":
+    import pandas as pd
+
+    from src.gap_analysis import (
+        STATUS_COVERED,
+        STATUS_GAP,
+        build_gap_table,
+        coverage_matrix,
+        covered_control_ids,
+        detect_inventory_columns,
+        resolve_inventory,
+    )
+    from src.mapper import match_control_names_to_scf
+
     st.title("📉 Compliance Gap Analyzer")
     st.markdown(
         "Evaluate a company's existing control list against a specific target regulation framework (e.g., GDPR, SOC 2, HIPAA)."
@@ -375,20 +569,8 @@ elif app_mode == "📉 Compliance Gap Analyzer":
             "JSON Framework Database missing. Please fetch the data using the sidebar."
         )
     else:
-        # Load the master JSON database into memory so we can extract available regulations
-        with open(PARSED_JSON_FILE, "r", encoding="utf-8") as f:
-            full_db = json.load(f)
-
-        # Parse all available regulations aggressively
-        all_regs = set()
-        for control in full_db:
-            if "regulations" in control and isinstance(control["regulations"], dict):
-                for reg in control["regulations"].keys():
-                    # Just split the raw name to make a clean dropdown, e.g. "GDPR 2016" -> "GDPR"
-                    base_reg = reg.split()[0].upper()
-                    all_regs.add(base_reg)
-                    # Also just add the full raw string for safety
-                    all_regs.add(reg)
+        # Shared in-process SCF repository (regulation indexes are precomputed once)
+        scf_repo = get_scf_repository()
 
         # Provide a hardcoded clean list of common priority frameworks, plus any dynamically found ones
         clean_regs = [
@@ -403,16 +585,23 @@ elif app_mode == "📉 Compliance Gap Analyzer":
         ]
         # Allow user to pick from clean regs, or type their own based on what was parsed
 
-        target_framework = st.selectbox(
-            "🎯 Select Target Framework / Regulation", clean_regs
+        target_frameworks = st.multiselect(
+            "🎯 Select Target Frameworks / Regulations",
+            clean_regs,
+            default=clean_regs[:1],
         )
+        target_framework = " + ".join(target_frameworks)
 
         st.markdown("---")
         colA, colB = st.columns([1, 1])
         with colA:
             st.markdown("### Upload Existing Controls")
-            st.markdown("Upload a CSV export of your current implemented controls.")
-            uploaded_csv = st.file_uploader("Upload CSV", type=["csv"], key="gap_up")
+            st.markdown(
+                "Upload CSV exports of your current implemented controls (one per business unit is fine)."
+            )
+            uploaded_csvs = st.file_uploader(
+                "Upload CSV", type=["csv"], key="gap_up", accept_multiple_files=True
+            )
 
             # Lab Integration
             lab_csv = load_lab_files(extension=".csv")
@@ -421,8 +610,14 @@ elif app_mode == "📉 Compliance Gap Analyzer":
             )
 
             df_existing = None
-            if uploaded_csv:
-                df_existing = pd.read_csv(uploaded_csv)
+            if uploaded_csvs:
+                df_existing = pd.concat(
+                    [
+                        pd.read_csv(f).assign(**{"Business Unit": f.name})
+                        for f in uploaded_csvs
+                    ],
+                    ignore_index=True,
+                )
             elif selected_lab_csv != "None":
                 df_existing = pd.read_csv(os.path.join(LAB_DATA_DIR, selected_lab_csv))
 
@@ -443,67 +638,40 @@ elif app_mode == "📉 Compliance Gap Analyzer":
         ):
             if df_existing is None:
                 st.warning("Please upload your existing controls list.")
+            elif not target_frameworks:
+                st.warning("Please select at least one target framework.")
             else:
                 with st.spinner(
                     f"Filtering the entire SCF database for {target_framework} requirements and identifying gaps..."
                 ):
-                    # Step 1: Find all SCF controls required by the Target Framework
-                    required_scf = []
-                    for c in full_db:
-                        regs_dict = c.get("regulations", {})
-                        if any(
-                            target_framework.lower().replace(" ", "")
-                            in k.lower().replace(" ", "")
-                            for k in regs_dict.keys()
-                        ):
-                            required_scf.append(c)
+                    # Step 1: Find all SCF controls required by any selected framework
+                    required_ids = scf_repo.regulation_index.controls_for_any(
+                        target_frameworks
+                    )
+                    required_scf = [
+                        c for c in scf_repo if c["control_id"] in required_ids
+                    ]
 
                     st.success(
                         f"Analysis Complete! Found **{len(required_scf)}** baseline SCF Controls that map specifically to **{target_framework}**."
                     )
 
                     if len(required_scf) > 0:
-                        # Detect the control ID column in the uploaded CSV
-                        id_col_candidates = [
-                            c
-                            for c in df_existing.columns
-                            if "control" in c.lower() and "id" in c.lower()
-                        ]
-                        existing_id_col = (
-                            id_col_candidates[0]
-                            if id_col_candidates
-                            else df_existing.columns[0]
+                        # Match the inventory to SCF: exact IDs first, then control
+                        # names by embedding similarity in one batched pass
+                        existing_id_col, _ = detect_inventory_columns(df_existing)
+                        df_resolved = resolve_inventory(
+                            df_existing,
+                            scf_repo.by_id,
+                            match_names=match_control_names_to_scf,
+                            id_col=existing_id_col,
                         )
-                        existing_ids = set(
-                            df_existing[existing_id_col]
-                            .dropna()
-                            .astype(str)
-                            .str.strip()
-                            .str.upper()
+                        df_req = build_gap_table(
+                            required_scf, df_resolved, id_col=existing_id_col
                         )
 
-                        rows = []
-                        for rc in required_scf:
-                            cid = rc.get("control_id", "")
-                            status = (
-                                "✅ Covered"
-                                if cid.upper() in existing_ids
-                                else "❌ Gap"
-                            )
-                            rows.append(
-                                {
-                                    "Status": status,
-                                    "Required Control ID": cid,
-                                    "Domain": rc.get("domain", ""),
-                                    "Description": rc.get("description", ""),
-                                    "Evidence Request List (ERL)": rc.get("erl", ""),
-                                    "Control Question": rc.get("question", ""),
-                                }
-                            )
-
-                        df_req = pd.DataFrame(rows)
-                        df_gaps = df_req[df_req["Status"] == "❌ Gap"]
-                        df_covered = df_req[df_req["Status"] == "✅ Covered"]
+                        df_gaps = df_req[df_req["Status"] == STATUS_GAP]
+                        df_covered = df_req[df_req["Status"] == STATUS_COVERED]
 
                         st.markdown("### ⚠️ Gap Profile Breakdown")
                         col_m1, col_m2, col_m3 = st.columns(3)
@@ -515,10 +683,12 @@ elif app_mode == "📉 Compliance Gap Analyzer":
                         )
                         col_m3.metric("❌ Gaps", len(df_gaps))
 
-                        tab_gaps, tab_all = st.tabs(
+                        tab_gaps, tab_all, tab_matrix, tab_inventory = st.tabs(
                             [
                                 f"❌ Gaps Only ({len(df_gaps)})",
                                 f"Full Checklist ({len(required_scf)})",
+                                "📊 Coverage Matrix",
+                                "🔗 Inventory Matching",
                             ]
                         )
                         with tab_gaps:
@@ -532,7 +702,7 @@ elif app_mode == "📉 Compliance Gap Analyzer":
                                 st.download_button(
                                     "📥 Download Gaps as CSV",
                                     data=csv_gaps,
-                                    file_name=f"gaps_{target_framework.replace(' ', '_')}.csv",
+                                    file_name=f"gaps_{'_'.join(target_frameworks).replace(' ', '_')}.csv",
                                     mime="text/csv",
                                     type="primary",
                                 )
@@ -542,9 +712,29 @@ elif app_mode == "📉 Compliance Gap Analyzer":
                             st.download_button(
                                 "📥 Download Full Checklist as CSV",
                                 data=csv_req,
-                                file_name=f"checklist_{target_framework.replace(' ', '_')}.csv",
+                                file_name=f"checklist_{'_'.join(target_frameworks).replace(' ', '_')}.csv",
                                 mime="text/csv",
                             )
+                        with tab_matrix:
+                            st.caption(
+                                "Coverage of your inventory against every regulation column in the SCF."
+                            )
+                            df_matrix = coverage_matrix(
+                                list(scf_repo.by_id),
+                                scf_repo.regulation_index.frameworks,
+                                covered_control_ids(df_resolved),
+                            )
+                            st.dataframe(
+                                df_matrix, use_container_width=True, hide_index=True
+                            )
+                            st.download_button(
+                                "📥 Download Coverage Matrix as CSV",
+                                data=df_matrix.to_csv(index=False).encode("utf-8"),
+                                file_name="coverage_matrix.csv",
+                                mime="text/csv",
+                            )
+                        with tab_inventory:
+                            st.dataframe(df_resolved, use_container_width=True)
                     else:
                         st.error(
                             f"Could not find any specific mappings for {target_framework} in the database. Try selecting another framework or re-fetching the SCF data."
@@ -554,6 +744,10 @@ elif app_mode == "📉 Compliance Gap Analyzer":
 # TOOL 3: Audit Scope Analyzer
 # ==========================================
 elif app_mode == "🎯 Audit Scope Analyzer":
+    import pandas as pd
+
+    from src.mapper import analyze_audit_scope
+
     st.title("🎯 Audit Scope Analyzer")
     st.markdown(
         "Paste or upload an audit scope document and the AI will recommend the specific SCF Domains and baseline controls that must be tested."
@@ -636,13 +830,11 @@ elif app_mode == "🎯 Audit Scope Analyzer":
 
                             with col_c:
                                 st.markdown("### Baseline Controls to Test")
-                                with open(PARSED_JSON_FILE, "r", encoding="utf-8") as f:
-                                    full_db = json.load(f)
-                                scf_dict = {c["control_id"]: c for c in full_db}
+                                scf_repo = get_scf_repository()
 
                                 control_rows = []
                                 for cid in result.recommended_control_ids:
-                                    control_info = scf_dict.get(cid, {})
+                                    control_info = scf_repo.get(cid) or {}
                                     st.markdown(
                                         f"- `{cid}` — {control_info.get('description', 'See SCF database for details.')[:80]}..."
                                         if control_info.get("description")
@@ -0,0 +1,87 @@
+"""
+Benchmark the retrieval index backends: build time, recall@k against exact
+NumPy search, and queries per second, on a synthetic clustered corpus sized
+like a multi-framework + internal-control library.
+
+    python scripts/benchmark_ann_index.py
+    python scripts/benchmark_ann_index.py --rows 300000 --backends hnsw faiss
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+
+import numpy as np
+
+# Ensure the repo root is in path for src.* imports since script is in scripts/
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from src.embedding_store import l2_normalize
+from src.vector_index import (
+    _BACKEND_MODULES,
+    INDEX_BACKENDS,
+    build_index,
+)
+
+
+def synthetic_corpus(
+    rows: int, queries: int, dim: int, clusters: int = 500, seed: int = 0
+) -> tuple[np.ndarray, np.ndarray]:
+    """Normalized clustered vectors (like topical control texts) and held-out queries."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+
+    def sample(n: int) -> np.ndarray:
+        points = centers[rng.integers(0, clusters, n)]
+        return l2_normalize(points + rng.normal(scale=0.6, size=(n, dim)))
+
+    return sample(rows), sample(queries)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found.tolist(), truth.tolist()))
+    return hits / truth.size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=1, help="queries per search call")
+    parser.add_argument("--backends", nargs="+", default=list(INDEX_BACKENDS))
+    args = parser.parse_args()
+
+    vectors, queries = synthetic_corpus(args.rows, args.queries, args.dim)
+    print(f"corpus: {args.rows} x {args.dim}, {args.queries} queries, k={args.k}")
+
+    truth = None
+    for backend in args.backends:
+        module = _BACKEND_MODULES.get(backend)
+        if module and importlib.util.find_spec(module) is None:
+            print(f"{backend:<6} skipped ({module} not installed)")
+            continue
+        start = time.perf_counter()
+        index = build_index(vectors, backend)
+        build_time = time.perf_counter() - start
+
+        found = []
+        start = time.perf_counter()
+        for i in range(0, len(queries), args.batch):
+            found.append(index.search(queries[i : i + args.batch], args.k)[0])
+        search_time = time.perf_counter() - start
+        found = np.vstack(found)
+
+        if truth is None:
+            truth = build_index(vectors, "exact").search(queries, args.k)[0]
+        print(
+            f"{backend:<6} build {build_time:7.2f}s   "
+            f"recall@{args.k} {recall_at_k(found, truth):.3f}   "
+            f"{len(queries) / search_time:9.0f} QPS"
+        )
+
+
+if __name__ == "__main__":
+    main()
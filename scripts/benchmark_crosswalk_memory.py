@@ -0,0 +1,85 @@
+"""
+Memory of the full control x framework crosswalk: per-control JSON
+"regulations" dicts (the parsed-JSON layout) against the sparse Crosswalk.
+
+    python scripts/benchmark_crosswalk_memory.py                 # synthetic workbook
+    python scripts/benchmark_crosswalk_memory.py data/scf_raw.xlsx
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+# Ensure the repo root (src.*) and this directory are in path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(os.path.dirname(__file__))
+from benchmark_parse_scf import write_synthetic_workbook
+
+from src.crosswalk import Crosswalk
+from src.fetch_scf import extract_scf_data
+
+
+def traced_load(fn) -> tuple[int, object]:
+    """Bytes still allocated for the result of `fn`, and the result."""
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("workbook", nargs="?", help="SCF .xlsx (default: synthetic)")
+    parser.add_argument("--rows", type=int, default=1400)
+    parser.add_argument("--fill", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.workbook
+        if path is None:
+            path = os.path.join(tmp, "scf_synthetic.xlsx")
+            print(f"Writing synthetic workbook ({args.rows} rows)...")
+            write_synthetic_workbook(path, args.rows, args.fill)
+
+        records, crosswalk = extract_scf_data(path, frameworks="all")
+        full = [
+            {**r, "regulations": crosswalk.regulations(r["control_id"])}
+            for r in records
+        ]
+        json_path = os.path.join(tmp, "full.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump([{"regulations": r["regulations"]} for r in full], f)
+        npz_path = os.path.join(tmp, "crosswalk.npz")
+        crosswalk.save(npz_path)
+
+        def load_json():
+            with open(json_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        json_bytes, _ = traced_load(load_json)
+        sparse_bytes, _ = traced_load(lambda: Crosswalk.load(npz_path))
+        json_size = os.path.getsize(json_path)
+        npz_size = os.path.getsize(npz_path)
+
+    print(
+        f"crosswalk:       {len(crosswalk)} controls x {len(crosswalk.frameworks)} "
+        f"frameworks, {crosswalk.nnz} mappings, "
+        f"{len(crosswalk.requirements)} distinct requirement strings"
+    )
+    print(
+        f"JSON dicts:      {json_bytes / 1e6:.1f} MB in memory, {json_size / 1e6:.1f} MB on disk"
+    )
+    print(
+        f"sparse (CSR):    {sparse_bytes / 1e6:.1f} MB in memory, {npz_size / 1e6:.1f} MB on disk "
+        f"({sparse_bytes / json_bytes:.0%} of JSON)"
+    )
+
+
+if __name__ == "__main__":
+    main()
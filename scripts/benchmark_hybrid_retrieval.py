@@ -0,0 +1,83 @@
+"""
+Benchmark the BM25 side of hybrid retrieval over the parsed SCF database:
+index build time, lexical search and rank-fusion latency per query, next to
+the exact embedding search it is fused with (random stand-in embeddings, so
+no model is loaded).
+
+    python scripts/benchmark_hybrid_retrieval.py
+    python scripts/benchmark_hybrid_retrieval.py --queries 2000 --k 50
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# Ensure the repo root is in path for src.* imports since script is in scripts/
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from src.bm25 import BM25Index, reciprocal_rank_fusion
+from src.embedding_store import l2_normalize
+from src.scf_store import PARSED_JSON_FILE
+from src.vector_index import VectorIndex
+
+FINDING_TEMPLATES = (
+    "S3.8 S3 general purpose buckets should block public access on {}",
+    "CIS 2.1.5 encryption at rest not enabled for {}",
+    "Root user without MFA; KMS key rotation disabled for {}",
+    "IAM policy allows full administrative privileges on {}",
+    "Security group allows unrestricted ingress to port 22 on {}",
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+
+    with open(PARSED_JSON_FILE, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    queries = [
+        FINDING_TEMPLATES[i % len(FINDING_TEMPLATES)].format(f"resource-{i}")
+        for i in range(args.queries)
+    ]
+
+    start = time.perf_counter()
+    index = BM25Index.from_controls(records)
+    build_time = time.perf_counter() - start
+    print(
+        f"BM25 index: {len(index)} controls, {len(index.terms)} terms, "
+        f"{len(index.postings)} postings, built in {build_time * 1000:.0f} ms"
+    )
+
+    rng = np.random.default_rng(0)
+    dense = VectorIndex(l2_normalize(rng.normal(size=(len(records), args.dim))))
+    query_vecs = rng.normal(size=(len(queries), args.dim))
+
+    start = time.perf_counter()
+    dense_indices, _ = dense.search(query_vecs, args.k)
+    dense_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lexical = index.search(queries, args.k)
+    lexical_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for row, (indices, _) in zip(dense_indices, lexical):
+        reciprocal_rank_fusion([row, indices], args.k)
+    fusion_time = time.perf_counter() - start
+
+    for name, seconds in [
+        ("embedding search", dense_time),
+        ("BM25 search", lexical_time),
+        ("RRF fusion", fusion_time),
+    ]:
+        print(f"{name:<17} {seconds / len(queries) * 1e6:8.1f} us/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Startup import cost of the Streamlit app and of each tool, measured with
+`python -X importtime` in a fresh interpreter per run.
+
+    python scripts/benchmark_import_time.py
+    python scripts/benchmark_import_time.py --repeat 5 --json > startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess  # nosec B404 - runs this interpreter on fixed import lists
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules imported before the sidebar renders, then what each tool adds
+TARGETS = {
+    "app startup": [
+        "streamlit",
+        "fetch_scf",
+        "src.finding_reader",
+        "src.scf_repository",
+        "ui.components.styles",
+        "ui.components.sidebar",
+    ],
+    "crosswalker": ["src.jobs", "src.mapper"],
+    "gap analyzer": ["pandas", "src.gap_analysis", "src.mapper"],
+    "scope analyzer": ["pandas", "src.mapper"],
+    # Deferred to the first mapping call / background warm-up
+    "first mapping": ["sentence_transformers", "langchain_groq"],
+}
+# Dependencies that should only load when a tool actually needs them
+HEAVY_MODULES = (
+    "torch",
+    "sentence_transformers",
+    "sklearn",
+    "langchain_groq",
+    "langchain_core",
+    "pandas",
+    "pdfplumber",
+)
+
+
+def import_times(modules: list[str], preload: list[str] = ()) -> tuple[dict, set]:
+    """
+    Cumulative import time (us) of each top-level import made by `modules`
+    after `preload`, and the names of every module they loaded.
+    """
+    code = "".join(f"import {m};" for m in preload)
+    code += "import sys; sys.stderr.write('-- measure --\\n');"
+    code += "".join(f"import {m};" for m in modules)
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join([REPO_ROOT, os.path.join(REPO_ROOT, "src")]),
+    )
+    proc = subprocess.run(  # nosec B603
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=REPO_ROOT,
+        env=env,
+        check=True,
+    )
+    times, loaded = {}, set()
+    for line in proc.stderr.split("-- measure --\n", 1)[1].splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # the column header
+        loaded.add(name.strip().split(".")[0])
+        # Nested imports are indented under the module that triggered them
+        if not name.startswith("  "):
+            times[name.strip()] = int(cumulative)
+    return times, loaded
+
+
+def measure(repeat: int, top: int) -> dict:
+    results = {}
+    startup = TARGETS["app startup"]
+    for target, modules in TARGETS.items():
+        # Tools are measured on top of an already started app
+        preload = [] if target == "app startup" else startup
+        runs = [import_times(modules, preload) for _ in range(repeat)]
+        totals = [sum(times.values()) for times, _ in runs]
+        times, loaded = runs[0]
+        heaviest = sorted(times.items(), key=lambda item: -item[1])[:top]
+        results[target] = {
+            "total_ms": round(statistics.median(totals) / 1000, 1),
+            "heaviest_ms": {name: round(us / 1000, 1) for name, us in heaviest},
+            "heavy_loaded": sorted(m for m in HEAVY_MODULES if m in loaded),
+        }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+
+    results = measure(args.repeat, args.top)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for target, result in results.items():
+        heavy = ", ".join(result["heavy_loaded"]) or "none"
+        print(f"{target:<15} {result['total_ms']:>8.1f} ms   heavy deps: {heavy}")
+        for name, ms in result["heaviest_ms"].items():
+            print(f"    {name:<28} {ms:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Benchmark SCF spreadsheet parsing: the previous whole-sheet / iterrows parser
+against extract_scf_records (header-only read, projected columns, column-wise
+record building, bulk validation).
+
+    python scripts/benchmark_parse_scf.py                  # synthetic workbook
+    python scripts/benchmark_parse_scf.py data/scf_raw.xlsx --repeat 3
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from openpyxl import Workbook
+from pydantic import ValidationError
+
+# Ensure the repo root is in path for src.* imports since script is in scripts/
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from src.fetch_scf import (
+    FRAMEWORK_KEYWORDS,
+    SCFControl,
+    excel_engine,
+    extract_scf_records,
+)
+
+COLUMNS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "columns.txt")
+
+
+def write_synthetic_workbook(path: str, rows: int, fill: float, seed: int = 0) -> None:
+    """SCF-shaped workbook using the real header from columns.txt."""
+    with open(COLUMNS_FILE, "r", encoding="utf-8") as f:
+        header = [line.rstrip("\n") for line in f if line.strip()]
+    rng = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    workbook.create_sheet("Domains & Principles").append(["Domain"])
+    sheet = workbook.create_sheet("SCF 2025.4")
+    sheet.append(header)
+    for i in range(rows):
+        row = []
+        for column in header:
+            name = column.lower()
+            if name == "scf #":
+                row.append(f"GOV-{i % 100:02d}.{i // 100}")
+            elif name == "scf domain":
+                row.append("Cybersecurity & Data Protection Governance")
+            elif name == "control description":
+                row.append(f"Mechanisms exist to govern control {i}. " * 3)
+            elif name == "relative control weighting":
+                row.append(rng.randint(1, 10))
+            elif rng.random() < fill:
+                row.append(f"{rng.randint(1, 20)}.{rng.randint(1, 9)}")
+            else:
+                row.append(None)
+        sheet.append(row)
+    workbook.save(path)
+
+
+def legacy_extract(raw_file: str) -> list[dict]:
+    """The previous parser: two opens, every column, iterrows, per-row validation."""
+    xls = pd.ExcelFile(raw_file)
+    sheet = next(
+        s
+        for s in xls.sheet_names
+        if s.startswith("SCF ") and "Domains & Principles" not in s
+    )
+    df = pd.read_excel(raw_file, sheet_name=sheet)
+    lower = {c: str(c).lower() for c in df.columns}
+    id_col = next(c for c in df.columns if "scf #" in lower[c])
+    domain_col = next(
+        c for c in df.columns if "domain" in lower[c] and "scf" in lower[c]
+    )
+    desc_col = next(
+        c for c in df.columns if "description" in lower[c] and "control" in lower[c]
+    )
+    weight_col = next(
+        (c for c in df.columns if "relative control weighting" in lower[c]), None
+    )
+    reg_cols = [
+        c
+        for c in df.columns
+        if any(kw in lower[c].replace("\n", " ") for kw in FRAMEWORK_KEYWORDS)
+    ]
+    cleaned = df[[id_col, domain_col, desc_col, weight_col] + reg_cols].copy()
+    cleaned = cleaned.dropna(subset=[id_col, desc_col])
+
+    records = []
+    for _, row in cleaned.iterrows():
+        weight = row[weight_col] if pd.notna(row[weight_col]) else 1
+        record = {
+            "control_id": row[id_col],
+            "domain": row[domain_col],
+            "description": row[desc_col],
+            "weight": int(weight),
+            "regulations": {},
+        }
+        for r_col in reg_cols:
+            val = row[r_col]
+            if pd.notna(val) and str(val).strip() != "":
+                clean_name = str(r_col).replace("\n", " ").strip()
+                record["regulations"][clean_name] = str(val).strip()
+        try:
+            SCFControl(**record)
+        except ValidationError:
+            continue
+        records.append(record)
+    return records
+
+
+def best_of(fn, repeat: int) -> tuple[float, object]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("workbook", nargs="?", help="SCF .xlsx (default: synthetic)")
+    parser.add_argument("--rows", type=int, default=1400)
+    parser.add_argument("--fill", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.workbook
+        if path is None:
+            path = os.path.join(tmp, "scf_synthetic.xlsx")
+            print(f"Writing synthetic workbook ({args.rows} rows)...")
+            write_synthetic_workbook(path, args.rows, args.fill)
+
+        legacy_time, legacy = best_of(lambda: legacy_extract(path), args.repeat)
+        new_time, records = best_of(lambda: extract_scf_records(path), args.repeat)
+
+    keys = ("control_id", "domain", "description", "weight", "regulations")
+    same = [[r[k] for k in keys] for r in legacy] == [
+        [r[k] for k in keys] for r in records
+    ]
+    print(f"engine:              {excel_engine()}")
+    print(f"controls:            {len(records)} (matches legacy: {same})")
+    print(f"legacy parser:       {legacy_time:.2f}s")
+    print(f"extract_scf_records: {new_time:.2f}s ({legacy_time / new_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
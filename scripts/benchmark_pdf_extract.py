@@ -0,0 +1,113 @@
+"""
+Benchmark PDF ingestion: the previous serial pdfplumber loop (extract_text
+called twice per page) against extract_pdf_pages, cold and from the hash cache.
+
+    python scripts/benchmark_pdf_extract.py                  # synthetic 300 pages
+    python scripts/benchmark_pdf_extract.py policy.pdf --workers 8
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+import pdfplumber
+
+# Ensure the repo root is in path for src.* imports since script is in scripts/
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from src.pdf_reader import PDF_WORKERS, extract_pdf_pages
+
+
+def synthetic_pdf(pages: int, lines: int = 45) -> bytes:
+    """Text-only PDF with `lines` lines of policy-like Helvetica text per page."""
+    font_id = 3 + 2 * pages
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids ["
+        + b" ".join(b"%d 0 R" % (3 + 2 * i) for i in range(pages))
+        + b"] /Count %d >>" % pages,
+    ]
+    for i in range(pages):
+        body = b"".join(
+            b"(%d.%d Personnel must protect information assets per policy.) Tj T*"
+            % (i + 1, j + 1)
+            for j in range(lines)
+        )
+        stream = b"BT /F1 10 Tf 14 TL 50 750 Td " + body + b" ET"
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (font_id, 4 + 2 * i)
+        )
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (i, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    return bytes(out)
+
+
+def legacy_extract(data: bytes) -> list[str]:
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return [page.extract_text() for page in pdf.pages if page.extract_text()]
+
+
+def timed(fn) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdf", nargs="?", help="PDF to extract (default: synthetic)")
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=PDF_WORKERS)
+    args = parser.parse_args()
+
+    if args.pdf:
+        with open(args.pdf, "rb") as f:
+            data = f.read()
+    else:
+        data = synthetic_pdf(args.pages)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+
+        def extract():
+            return [
+                page.text
+                for page in extract_pdf_pages(
+                    data, workers=args.workers, cache_dir=cache_dir
+                )
+            ]
+
+        legacy_time, legacy = timed(lambda: legacy_extract(data))
+        cold_time, pages = timed(extract)
+        cached_time, cached = timed(extract)
+
+    print(
+        f"pages:             {len(pages)} (matches legacy: {pages == legacy == cached})"
+    )
+    print(f"legacy (serial):   {legacy_time:.2f}s")
+    print(
+        f"parallel x{args.workers}:       {cold_time:.2f}s ({legacy_time / cold_time:.1f}x)"
+    )
+    print(f"re-upload (cache): {cached_time:.3f}s ({legacy_time / cached_time:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,8 @@ import json
 import pandas as pd
 import sys
 
-# Ensure src is in path since script is in scripts/
+# Ensure src (and the repo root, for src.* imports) is in path since script is in scripts/
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
 from mapper import map_text_to_scf, analyze_audit_scope
 
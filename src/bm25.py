@@ -0,0 +1,272 @@
+import hashlib
+import logging
+import os
+import re
+from collections.abc import Iterable, Mapping, Sequence
+
+import numpy as np
+
+from src.scf_store import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+BM25_INDEX_FILE = os.path.join(DATA_DIR, "scf_bm25.npz")
+
+# BM25 term-frequency saturation and document-length normalization
+BM25_K1 = float(os.environ.get("SCF_BM25_K1", "1.2"))
+BM25_B = float(os.environ.get("SCF_BM25_B", "0.75"))
+# Reciprocal rank fusion constant: higher flattens the weight of top ranks
+RRF_K = int(os.environ.get("SCF_RRF_K", "60"))
+
+# Words and codes: "mfa", "s3.8", "2.1.5", "cc6.1", "gov-01", "164.312"
+_TOKEN = re.compile(r"[a-z0-9]+(?:[.\-/_][a-z0-9]+)*")
+_COMPOUND_SEPARATOR = re.compile(r"[\-/_]")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lowercased word and code tokens. Dotted codes stay whole ("cis 2.1.5"
+    matches "2.1.5" only); hyphenated words also yield their parts, so
+    "full-disk" matches "disk" and "GOV-01" matches "gov-01".
+    """
+    tokens = []
+    for token in _TOKEN.findall(str(text).lower()):
+        tokens.append(token)
+        if _COMPOUND_SEPARATOR.search(token):
+            tokens.extend(p for p in _COMPOUND_SEPARATOR.split(token) if p)
+    return tokens
+
+
+def control_document(control: Mapping, regulations: Mapping | None = None) -> str:
+    """Indexed text of one control: ID, domain, description, question, requirement codes."""
+    regulations = control.get("regulations") if regulations is None else regulations
+    codes = " ".join(str(v) for v in (regulations or {}).values())
+    return " ".join(
+        str(control.get(field) or "")
+        for field in ("control_id", "domain", "description", "question")
+    ) + (f" {codes}" if codes else "")
+
+
+def control_corpus(
+    controls: Iterable[Mapping], regulations=None
+) -> tuple[list[str], list[str]]:
+    """
+    (control IDs, indexed documents) of the controls; `regulations(control_id)`
+    overrides their own mappings.
+    """
+    controls = list(controls)
+    return [c["control_id"] for c in controls], [
+        control_document(c, regulations(c["control_id"]) if regulations else None)
+        for c in controls
+    ]
+
+
+def compute_index_version(
+    control_ids: Sequence[str],
+    documents: Sequence[str],
+    k1: float = BM25_K1,
+    b: float = BM25_B,
+) -> str:
+    """Content hash identifying one BM25 index: indexed texts + parameters."""
+    digest = hashlib.sha256(f"{k1}\n{b}\n".encode())
+    for control_id, document in zip(control_ids, documents):
+        digest.update(f"{control_id}\x1f{document}\x1e".encode())
+    return digest.hexdigest()
+
+
+class BM25Index:
+    """
+    Okapi BM25 over the SCF controls as a sparse term x control matrix (CSC:
+    per term, `postings[colptr[t]:colptr[t + 1]]` controls with their
+    precomputed BM25 weights). A query is scored with one weighted bincount
+    over the postings of its terms. `version` is the compute_index_version of
+    the indexed corpus.
+    """
+
+    def __init__(
+        self,
+        control_ids: Sequence[str],
+        terms: Sequence[str],
+        colptr: np.ndarray,
+        postings: np.ndarray,
+        weights: np.ndarray,
+        version: str = "",
+    ):
+        self.control_ids = list(control_ids)
+        self.version = version
+        self.terms = list(terms)
+        self.colptr = np.asarray(colptr, dtype=np.int64)
+        self.postings = np.asarray(postings, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self._term_index = {term: i for i, term in enumerate(self.terms)}
+
+    @classmethod
+    def build(
+        cls,
+        control_ids: Sequence[str],
+        documents: Iterable[str],
+        k1: float = BM25_K1,
+        b: float = BM25_B,
+    ) -> "BM25Index":
+        documents = list(documents)
+        term_index: dict[str, int] = {}
+        rows: list[int] = []
+        cols: list[int] = []
+        lengths: list[int] = []
+        for row, document in enumerate(documents):
+            tokens = tokenize(document)
+            lengths.append(len(tokens))
+            rows.extend([row] * len(tokens))
+            cols.extend(term_index.setdefault(t, len(term_index)) for t in tokens)
+        n_docs = len(lengths)
+
+        # Term frequencies: unique (term, control) pairs and their counts
+        pairs = np.array(cols, dtype=np.int64) * max(n_docs, 1) + np.array(
+            rows, dtype=np.int64
+        )
+        pairs, tf = np.unique(pairs, return_counts=True)
+        term_of = pairs // max(n_docs, 1)
+        doc_of = pairs % max(n_docs, 1)
+
+        doc_len = np.array(lengths, dtype=np.float32)
+        avg_len = float(doc_len.mean()) if n_docs and doc_len.mean() > 0 else 1.0
+        df = np.bincount(term_of, minlength=len(term_index))
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        norm = k1 * (1 - b + b * doc_len[doc_of] / avg_len)
+        weights = idf[term_of] * tf * (k1 + 1) / (tf + norm)
+
+        colptr = np.zeros(len(term_index) + 1, dtype=np.int64)
+        np.cumsum(df, out=colptr[1:])
+        # np.unique sorted the pairs by term, then control: already CSC order
+        return cls(
+            control_ids,
+            list(term_index),
+            colptr,
+            doc_of,
+            weights,
+            compute_index_version(control_ids, documents, k1, b),
+        )
+
+    @classmethod
+    def from_controls(
+        cls, controls: Iterable[Mapping], regulations=None
+    ) -> "BM25Index":
+        """Index controls; `regulations(control_id)` overrides their own mappings."""
+        return cls.build(*control_corpus(controls, regulations))
+
+    def __len__(self) -> int:
+        return len(self.control_ids)
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every control for one query (0 where no term matches)."""
+        term_ids = [
+            self._term_index[t]
+            for t in dict.fromkeys(tokenize(query))
+            if t in self._term_index
+        ]
+        if not term_ids:
+            return np.zeros(len(self), dtype=np.float32)
+        slices = [
+            np.arange(self.colptr[t], self.colptr[t + 1], dtype=np.int64)
+            for t in term_ids
+        ]
+        entries = np.concatenate(slices)
+        return np.bincount(
+            self.postings[entries], weights=self.weights[entries], minlength=len(self)
+        ).astype(np.float32)
+
+    def search(
+        self, queries: Sequence[str], k: int
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """Per query: indices and scores of its (at most k) matching controls, best first."""
+        results = []
+        for query in queries:
+            scores = self.scores(query)
+            matched = np.flatnonzero(scores)
+            if len(matched) > k:
+                matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+            order = matched[np.argsort(-scores[matched], kind="stable")]
+            results.append((order, scores[order]))
+        return results
+
+    def save(self, path: str = BM25_INDEX_FILE) -> None:
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            control_ids=np.array(self.control_ids, dtype=str),
+            terms=np.array(self.terms, dtype=str),
+            colptr=self.colptr,
+            postings=self.postings,
+            weights=self.weights,
+            version=np.array(self.version),
+        )
+        os.replace(tmp_path, path)
+        logger.info(
+            "Saved BM25 index (%d controls, %d terms) to %s",
+            len(self),
+            len(self.terms),
+            path,
+        )
+
+    @classmethod
+    def load(cls, path: str = BM25_INDEX_FILE) -> "BM25Index":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["control_ids"].tolist(),
+                data["terms"].tolist(),
+                data["colptr"],
+                data["postings"],
+                data["weights"],
+                # Indexes saved without a version never match the current data
+                str(data["version"]) if "version" in data.files else "",
+            )
+
+
+def write_bm25_index(
+    controls: Iterable[Mapping], path: str = BM25_INDEX_FILE
+) -> BM25Index:
+    """Build the BM25 index over parsed records and persist it next to the SCF data."""
+    index = BM25Index.from_controls(controls)
+    index.save(path)
+    return index
+
+
+def load_bm25_index(
+    path: str = BM25_INDEX_FILE, version: str | None = None
+) -> BM25Index | None:
+    """
+    The persisted BM25 index, or None if missing, unreadable or, when `version`
+    is given, built from other content (see compute_index_version).
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        index = BM25Index.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Ignoring unreadable BM25 index: %s", e)
+        return None
+    if version is not None and index.version != version:
+        logger.info("BM25 index %s is stale; rebuilding.", path)
+        return None
+    return index
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[np.ndarray], k: int, rrf_k: int = RRF_K
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Fuse best-first index rankings: score(d) = sum over rankings of
+    1 / (rrf_k + rank of d). Returns the top k indices and their scores,
+    scaled so a document ranked first everywhere scores 1.0.
+    """
+    rankings = [np.asarray(r, dtype=np.int64) for r in rankings]
+    ids = np.concatenate(rankings)
+    if not len(ids):
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+    contributions = np.concatenate(
+        [1.0 / (rrf_k + 1 + np.arange(len(r))) for r in rankings]
+    )
+    unique, inverse = np.unique(ids, return_inverse=True)
+    fused = np.bincount(inverse, weights=contributions) * (rrf_k + 1) / len(rankings)
+    order = np.argsort(-fused, kind="stable")[:k]
+    return unique[order].astype(np.intp), fused[order].astype(np.float32)
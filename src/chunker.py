@@ -0,0 +1,130 @@
+import os
+import re
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+# Words per retrieval chunk; all-MiniLM-L6-v2 truncates inputs at 256 word
+# pieces (~190 English words), so chunks stay below that
+CHUNK_MAX_WORDS = int(os.environ.get("SCF_CHUNK_MAX_WORDS", "150"))
+# Trailing words of a chunk repeated at the start of the next one
+CHUNK_OVERLAP_WORDS = int(os.environ.get("SCF_CHUNK_OVERLAP_WORDS", "30"))
+# Words per section sent to the LLM; longer sections are split into parts
+SECTION_MAX_WORDS = int(os.environ.get("SCF_SECTION_MAX_WORDS", "600"))
+
+_HEADING_PATTERNS = (
+    re.compile(r"^#{1,6}\s+\S"),  # Markdown
+    re.compile(r"^(section|article|chapter|part|appendix)\s+[\w.]+", re.IGNORECASE),
+    re.compile(r"^\d+(\.\d+)*\.?\s+[A-Z]"),  # "3.", "4.2 Access Control"
+)
+_HEADING_MAX_CHARS = 80
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass
+class DocumentChunk:
+    section: int  # index into the document's sections
+    text: str  # heading-prefixed, for retrieval
+
+
+@dataclass
+class DocumentSection:
+    index: int
+    heading: str
+    text: str
+    chunks: list[DocumentChunk]
+
+
+def is_heading(line: str) -> bool:
+    """Short Markdown, numbered, "Section 4" or ALL-CAPS line without a full stop."""
+    line = line.strip()
+    if not line or len(line) > _HEADING_MAX_CHARS or line.endswith((".", ",", ";")):
+        return False
+    if any(pattern.match(line) for pattern in _HEADING_PATTERNS):
+        return True
+    return line.isupper() and sum(c.isalpha() for c in line) >= 3
+
+
+def _split_headings(text: str) -> Iterator[tuple[str, str]]:
+    """(heading, body) per heading-delimited block; text before any heading has ""."""
+    heading, body = "", []
+    for line in text.splitlines():
+        if is_heading(line):
+            if "".join(body).strip():
+                yield heading, "\n".join(body).strip()
+            heading, body = line.strip().lstrip("#").strip(), []
+        else:
+            body.append(line)
+    if "".join(body).strip():
+        yield heading, "\n".join(body).strip()
+
+
+def _units(body: str, max_words: int) -> Iterator[list[str]]:
+    """Paragraphs as word lists; overlong ones split at sentences, then words."""
+    for paragraph in _PARAGRAPH_BREAK.split(body):
+        words = paragraph.split()
+        if len(words) <= max_words:
+            if words:
+                yield words
+            continue
+        for sentence in _SENTENCE_END.split(paragraph):
+            words = sentence.split()
+            for start in range(0, len(words), max_words):
+                yield words[start : start + max_words]
+
+
+def _pack(units: list[list[str]], max_words: int) -> list[list[str]]:
+    """Greedily join consecutive units into runs of at most max_words words."""
+    runs: list[list[str]] = []
+    for unit in units:
+        if runs and len(runs[-1]) + len(unit) <= max_words:
+            runs[-1].extend(unit)
+        else:
+            runs.append(list(unit))
+    return runs
+
+
+def _chunk_words(
+    words: list[str], max_words: int, overlap_words: int
+) -> Iterator[list[str]]:
+    """Windows of max_words words, consecutive windows sharing overlap_words."""
+    step = max(1, max_words - overlap_words)
+    start = 0
+    while True:
+        yield words[start : start + max_words]
+        if start + max_words >= len(words):
+            return
+        start += step
+
+
+def split_document(
+    text: str,
+    chunk_words: int = CHUNK_MAX_WORDS,
+    overlap_words: int = CHUNK_OVERLAP_WORDS,
+    section_words: int = SECTION_MAX_WORDS,
+) -> list[DocumentSection]:
+    """
+    Split a long document into sections (by heading, at most `section_words`
+    words, on paragraph boundaries where possible) and each section into
+    overlapping retrieval chunks of at most `chunk_words` words.
+
+    Chunks carry their section heading, so a chunk deep inside "4.2 Encryption"
+    still retrieves cryptography controls.
+    """
+    sections: list[DocumentSection] = []
+    for heading, body in _split_headings(text):
+        parts = _pack(list(_units(body, section_words)), section_words)
+        for part, words in enumerate(parts):
+            title = heading
+            if len(parts) > 1:
+                title = (
+                    f"{heading} (part {part + 1})" if heading else f"Part {part + 1}"
+                )
+            index = len(sections)
+            prefix = f"{heading}\n" if heading else ""
+            chunks = [
+                DocumentChunk(index, prefix + " ".join(window))
+                for window in _chunk_words(words, chunk_words, overlap_words)
+            ]
+            sections.append(DocumentSection(index, title, " ".join(words), chunks))
+    return sections
@@ -0,0 +1,272 @@
+"""
+Headless bulk crosswalking: map findings or requirement texts to SCF controls
+from the command line, without Streamlit.
+
+    python -m src.cli findings.json -o mappings.csv
+    cat findings.jsonl | python -m src.cli --concurrency 8 > mappings.jsonl
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+from collections.abc import Iterable, Iterator
+from contextlib import nullcontext
+from itertools import islice
+
+from src.finding_reader import iter_findings, prefetch
+from src.mapper import (
+    DEFAULT_BATCH_CONCURRENCY,
+    DEFAULT_PACK_SIZE,
+    load_scf_database,
+    map_items,
+)
+from src.reranker import MAPPING_MODES
+
+logger = logging.getLogger(__name__)
+
+INPUT_FORMATS = ("auto", "json", "jsonl", "text")
+OUTPUT_FORMATS = ("csv", "jsonl")
+DEFAULT_CHUNK_SIZE = 100
+
+CSV_COLUMNS = [
+    "source",
+    "index",
+    "rank",
+    "control_id",
+    "domain",
+    "confidence",
+    "justification",
+    "error",
+]
+
+
+def _detect_input_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        return "json"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if path == "-":
+        return "jsonl"
+    return "text"
+
+
+def _json_items(data) -> list:
+    """Items of one JSON line: a get-findings page, a list, or one finding."""
+    if isinstance(data, dict) and isinstance(data.get("Findings"), list):
+        return data["Findings"]
+    if isinstance(data, list):
+        return data
+    return [data]
+
+
+def iter_inputs(path: str, input_format: str = "auto") -> Iterator:
+    """
+    Yield the inputs of one file ('-' for stdin).
+
+    Nothing is loaded whole: JSONL is read line by line (a line may be a finding
+    or a get-findings page), a JSON document is streamed with FindingReader and
+    yields its "Findings" array, list items or pages; a text file is a single
+    requirement text.
+    """
+    if input_format == "auto":
+        input_format = _detect_input_format(path)
+    with (
+        nullcontext(sys.stdin) if path == "-" else open(path, "r", encoding="utf-8")
+    ) as stream:
+        if input_format == "jsonl":
+            for line_no, line in enumerate(stream, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield from _json_items(json.loads(line))
+                except json.JSONDecodeError as e:
+                    logger.warning(
+                        "%s:%d: skipping invalid JSON (%s)", path, line_no, e
+                    )
+        elif input_format == "json":
+            yield from iter_findings(stream)
+        else:
+            text = stream.read()
+            if text.strip():
+                yield text
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class CsvResultWriter:
+    """One CSV row per mapped control (or per failed input)."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._writer = csv.DictWriter(stream, fieldnames=CSV_COLUMNS)
+        self._writer.writeheader()
+
+    def write(self, source: str, index: int, result) -> None:
+        base = {"source": source, "index": index}
+        if isinstance(result, Exception) or result is None:
+            self._writer.writerow({**base, "error": str(result or "no result")})
+            return
+        for rank, m in enumerate(result.mappings, 1):
+            self._writer.writerow(
+                {
+                    **base,
+                    "rank": rank,
+                    "control_id": m.control_id,
+                    "domain": m.domain,
+                    "confidence": m.confidence,
+                    "justification": m.justification,
+                }
+            )
+
+    def flush(self) -> None:
+        self._stream.flush()
+
+
+class JsonlResultWriter:
+    """One JSON object per input with its mappings (or error)."""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, source: str, index: int, result) -> None:
+        record = {"source": source, "index": index}
+        if isinstance(result, Exception) or result is None:
+            record["error"] = str(result or "no result")
+        else:
+            record["mappings"] = [
+                m.model_dump(
+                    include={"control_id", "domain", "confidence", "justification"}
+                )
+                for m in result.mappings
+            ]
+        self._stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def flush(self) -> None:
+        self._stream.flush()
+
+
+def crosswalk(
+    paths: list[str],
+    writer,
+    input_format: str = "auto",
+    top_k: int = 3,
+    concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    mode: str = "llm",
+    pack_size: int = DEFAULT_PACK_SIZE,
+) -> tuple[int, int]:
+    """
+    Map every input of `paths` and write results incrementally, chunk by chunk.
+
+    Returns (inputs processed, inputs that failed).
+    """
+    processed = failed = 0
+    for path in paths:
+        source = "<stdin>" if path == "-" else path
+        index = 0
+        # Parsing runs ahead on a reader thread, bounded by the prefetch queue
+        inputs = prefetch(iter_inputs(path, input_format), maxsize=2 * chunk_size)
+        for chunk in _chunks(inputs, chunk_size):
+            for result in map_items(chunk, top_k, concurrency, mode, pack_size):
+                writer.write(source, index, result)
+                failed += isinstance(result, Exception) or result is None
+                index += 1
+            writer.flush()
+            processed += len(chunk)
+            logger.info("%s: %d inputs mapped", source, index)
+    return processed, failed
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli",
+        description="Map security findings or requirement texts to SCF controls.",
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        default=["-"],
+        help="JSON/JSONL/text files to map ('-' or none for stdin, read as JSONL)",
+    )
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    parser.add_argument(
+        "--output-format",
+        choices=OUTPUT_FORMATS,
+        help="Output format (default: from the output extension, else jsonl)",
+    )
+    parser.add_argument("--format", choices=INPUT_FORMATS, default="auto")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument(
+        "--mode",
+        choices=MAPPING_MODES,
+        default="llm",
+        help="fast: local reranker only (offline); hybrid: LLM only for "
+        "ambiguous inputs; llm: always ask the LLM. Reranker-only mappings "
+        "have an empty confidence",
+    )
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_BATCH_CONCURRENCY)
+    parser.add_argument(
+        "--pack-size",
+        type=int,
+        default=DEFAULT_PACK_SIZE,
+        help="Findings with overlapping candidates packed per LLM request",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Inputs mapped (and written) per batch",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        stream=sys.stderr,
+        format="%(levelname)s %(name)s: %(message)s",
+    )
+
+    if not load_scf_database():
+        print(
+            "SCF database not found. Run `python -m src.fetch_scf` first.",
+            file=sys.stderr,
+        )
+        return 1
+
+    output_format = args.output_format
+    if output_format is None:
+        output_format = "csv" if (args.output or "").endswith(".csv") else "jsonl"
+    with (
+        open(args.output, "w", encoding="utf-8", newline="")
+        if args.output
+        else nullcontext(sys.stdout)
+    ) as stream:
+        writer_cls = CsvResultWriter if output_format == "csv" else JsonlResultWriter
+        processed, failed = crosswalk(
+            args.inputs,
+            writer_cls(stream),
+            input_format=args.format,
+            top_k=args.top_k,
+            concurrency=args.concurrency,
+            chunk_size=max(1, args.chunk_size),
+            mode=args.mode,
+            pack_size=max(1, args.pack_size),
+        )
+
+    print(f"Mapped {processed} inputs ({failed} failed).", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+import logging
+import os
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Prompt budget for the SCF context block, per Groq model. The free tier's
+# tokens-per-minute limits, not the context windows, are the binding constraint.
+MODEL_CONTEXT_BUDGETS = {
+    "llama-3.1-8b-instant": 2500,
+    "llama-3.3-70b-versatile": 4000,
+    "llama3-8b-8192": 2500,
+    "llama3-70b-8192": 2500,
+    "gemma2-9b-it": 2500,
+}
+DEFAULT_CONTEXT_TOKEN_BUDGET = 2500
+
+# Candidate-list cutting: always keep MIN, never more than MAX, and drop
+# candidates scoring below RELATIVE_FLOOR x the best similarity
+CONTEXT_MIN_CANDIDATES = int(os.environ.get("SCF_CONTEXT_MIN_CANDIDATES", "8"))
+CONTEXT_MAX_CANDIDATES = int(os.environ.get("SCF_CONTEXT_MAX_CANDIDATES", "50"))
+CONTEXT_RELATIVE_FLOOR = float(os.environ.get("SCF_CONTEXT_RELATIVE_FLOOR", "0.6"))
+# A drop between consecutive similarities at least this large is an elbow
+CONTEXT_ELBOW_MIN_GAP = float(os.environ.get("SCF_CONTEXT_ELBOW_GAP", "0.08"))
+# Descriptions longer than this are truncated at a word boundary
+CONTEXT_MAX_DESCRIPTION_CHARS = int(
+    os.environ.get("SCF_CONTEXT_MAX_DESCRIPTION_CHARS", "300")
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for Llama-family tokenizers (~4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def context_token_budget(model_name: str) -> int:
+    """Token budget for the SCF context; SCF_CONTEXT_TOKEN_BUDGET overrides it."""
+    override = os.environ.get("SCF_CONTEXT_TOKEN_BUDGET")
+    if override:
+        return int(override)
+    return MODEL_CONTEXT_BUDGETS.get(model_name, DEFAULT_CONTEXT_TOKEN_BUDGET)
+
+
+def cut_candidates(
+    similarities: Sequence[float],
+    min_k: int = CONTEXT_MIN_CANDIDATES,
+    max_k: int = CONTEXT_MAX_CANDIDATES,
+    relative_floor: float = CONTEXT_RELATIVE_FLOOR,
+    elbow_min_gap: float = CONTEXT_ELBOW_MIN_GAP,
+) -> int:
+    """
+    Number of best-first candidates worth sending to the LLM.
+
+    Cuts at the largest drop in similarity (the elbow) past the first `min_k`
+    candidates, if that drop is at least `elbow_min_gap`, and at the first
+    candidate scoring below `relative_floor` x the best score. The cut is taken
+    on the similarities sorted high to low, so candidates in hybrid (rank-fused)
+    order keep as many as the same candidates in similarity order.
+    """
+    scores = -np.sort(-np.asarray(similarities, dtype=np.float32)[:max_k])
+    n = len(scores)
+    if n <= min_k:
+        return n
+
+    cut = n
+    if scores[0] > 0:
+        below = np.flatnonzero(scores < scores[0] * relative_floor)
+        if below.size:
+            cut = max(min_k, int(below[0]))
+
+    gaps = scores[min_k - 1 : cut - 1] - scores[min_k:cut]
+    if gaps.size and gaps.max() >= elbow_min_gap:
+        cut = min_k + int(np.argmax(gaps))
+    return cut
+
+
+def truncate_description(
+    text: str, max_chars: int = CONTEXT_MAX_DESCRIPTION_CHARS
+) -> str:
+    """Shorten a control description to max_chars, at a word boundary."""
+    text = " ".join(str(text).split())
+    if len(text) <= max_chars:
+        return text
+    head = text[: max_chars - 1]
+    if " " in head:
+        head = head.rsplit(" ", 1)[0]
+    return head.rstrip(",;:") + "…"
+
+
+def _context_line(control: Mapping, description: str) -> str:
+    return f"[{control['control_id']}] {control['domain']}: {description}"
+
+
+@dataclass
+class ContextStats:
+    candidates: int
+    included: int
+    tokens: int
+    full_tokens: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.full_tokens - self.tokens
+
+
+def build_context(
+    controls: Sequence[Mapping],
+    similarities: Sequence[float] | None,
+    token_budget: int,
+    max_description_chars: int = CONTEXT_MAX_DESCRIPTION_CHARS,
+) -> tuple[str, ContextStats]:
+    """
+    Token-budgeted SCF context for the mapping prompt.
+
+    Candidates (best first) are cut at the similarity elbow, long descriptions
+    are truncated, and lines are added until `token_budget` is reached; the
+    best candidate is always included. Returns the context and size stats
+    against the untrimmed context of every candidate.
+    """
+    full_tokens = sum(
+        estimate_tokens(_context_line(c, c["description"])) + 1 for c in controls
+    )
+    keep = len(controls) if similarities is None else cut_candidates(similarities)
+
+    lines = []
+    tokens = 0
+    for control in controls[:keep]:
+        line = _context_line(
+            control, truncate_description(control["description"], max_description_chars)
+        )
+        line_tokens = estimate_tokens(line) + 1
+        if lines and tokens + line_tokens > token_budget:
+            break
+        lines.append(line)
+        tokens += line_tokens
+
+    stats = ContextStats(
+        candidates=len(controls),
+        included=len(lines),
+        tokens=tokens,
+        full_tokens=full_tokens,
+    )
+    logger.info(
+        "SCF context: %d of %d candidates, ~%d tokens (saved ~%d of %d).",
+        stats.included,
+        stats.candidates,
+        stats.tokens,
+        stats.tokens_saved,
+        stats.full_tokens,
+    )
+    return "\n".join(lines), stats
@@ -0,0 +1,216 @@
+import logging
+import os
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+CROSSWALK_FILE = os.path.join(DATA_DIR, "scf_crosswalk.npz")
+
+
+def _pack_strings(strings: Sequence[str]) -> tuple[np.ndarray, np.ndarray]:
+    """UTF-8 blob + offsets, so string tables load without pickle."""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(blob: np.ndarray, offsets: np.ndarray) -> list[str]:
+    data = blob.tobytes()
+    return [
+        data[start:end].decode("utf-8")
+        for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())
+    ]
+
+
+class Crosswalk:
+    """
+    Sparse control x framework mapping matrix in CSR form.
+
+    Row i holds the frameworks control i maps to: entries
+    indptr[i]:indptr[i + 1] of `framework_idx` (into `frameworks`) and
+    `requirement_idx` (into `requirements`, the interned cell strings such as
+    "CC6.1\\nCC6.7"). Each distinct framework name and requirement string is
+    stored once, however many controls share it.
+    """
+
+    def __init__(
+        self,
+        control_ids: Sequence[str],
+        frameworks: Sequence[str],
+        requirements: Sequence[str],
+        indptr: np.ndarray,
+        framework_idx: np.ndarray,
+        requirement_idx: np.ndarray,
+    ):
+        self.control_ids = list(control_ids)
+        self.frameworks = list(frameworks)
+        self.requirements = list(requirements)
+        self.indptr = np.asarray(indptr, dtype=np.int32)
+        self.framework_idx = np.asarray(framework_idx, dtype=np.int32)
+        self.requirement_idx = np.asarray(requirement_idx, dtype=np.int32)
+        self._row = {cid: i for i, cid in enumerate(self.control_ids)}
+        self._csc: tuple[np.ndarray, np.ndarray] | None = None
+
+    @classmethod
+    def from_triplets(
+        cls,
+        control_ids: Sequence[str],
+        frameworks: Sequence[str],
+        rows: np.ndarray,
+        columns: np.ndarray,
+        values: Sequence[str],
+    ) -> "Crosswalk":
+        """Build from (control row, framework column, requirement string) entries."""
+        interned: dict[str, int] = {}
+        requirement_idx = np.fromiter(
+            (interned.setdefault(v, len(interned)) for v in values),
+            dtype=np.int32,
+            count=len(values),
+        )
+        rows = np.asarray(rows, dtype=np.int32)
+        columns = np.asarray(columns, dtype=np.int32)
+        order = np.lexsort((columns, rows))
+        indptr = np.zeros(len(control_ids) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(rows, minlength=len(control_ids)), out=indptr[1:])
+        return cls(
+            control_ids,
+            frameworks,
+            list(interned),
+            indptr,
+            columns[order],
+            requirement_idx[order],
+        )
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping]) -> "Crosswalk":
+        """Build from records with a {framework: requirements} "regulations" dict."""
+        control_ids: list[str] = []
+        framework_pos: dict[str, int] = {}
+        rows: list[int] = []
+        columns: list[int] = []
+        values: list[str] = []
+        for i, r in enumerate(records):
+            control_ids.append(r["control_id"])
+            for framework, value in (r.get("regulations") or {}).items():
+                rows.append(i)
+                columns.append(framework_pos.setdefault(framework, len(framework_pos)))
+                values.append(str(value))
+        return cls.from_triplets(
+            control_ids,
+            list(framework_pos),
+            np.array(rows, dtype=np.int32),
+            np.array(columns, dtype=np.int32),
+            values,
+        )
+
+    def __len__(self) -> int:
+        return len(self.control_ids)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.framework_idx)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate in-memory size of the matrix and its string tables."""
+        arrays = self.indptr.nbytes + self.framework_idx.nbytes
+        arrays += self.requirement_idx.nbytes
+        strings = sum(len(s) for s in self.frameworks) + sum(
+            len(s) for s in self.requirements
+        )
+        return arrays + strings
+
+    def regulations(self, control_id: str) -> dict[str, str]:
+        """{framework: requirement string} for one control, in framework order."""
+        i = self._row.get(control_id)
+        if i is None:
+            return {}
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return {
+            self.frameworks[f]: self.requirements[r]
+            for f, r in zip(
+                self.framework_idx[start:end].tolist(),
+                self.requirement_idx[start:end].tolist(),
+            )
+        }
+
+    def iter_records(self) -> Iterator[dict]:
+        """{"control_id", "regulations"} per control, e.g. for index building."""
+        for control_id in self.control_ids:
+            yield {
+                "control_id": control_id,
+                "regulations": self.regulations(control_id),
+            }
+
+    def controls_for(self, framework: str) -> list[str]:
+        """Control IDs mapped to one framework column, in SCF order."""
+        if framework not in self.frameworks:
+            return []
+        if self._csc is None:
+            # Column view, built once: entry rows grouped by framework
+            rows = np.repeat(
+                np.arange(len(self.control_ids), dtype=np.int32), np.diff(self.indptr)
+            )
+            order = np.argsort(self.framework_idx, kind="stable")
+            colptr = np.zeros(len(self.frameworks) + 1, dtype=np.int32)
+            np.cumsum(
+                np.bincount(self.framework_idx, minlength=len(self.frameworks)),
+                out=colptr[1:],
+            )
+            self._csc = (colptr, rows[order])
+        colptr, rows = self._csc
+        f = self.frameworks.index(framework)
+        return [self.control_ids[i] for i in rows[colptr[f] : colptr[f + 1]].tolist()]
+
+    def save(self, path: str = CROSSWALK_FILE) -> None:
+        ids_blob, ids_offsets = _pack_strings(self.control_ids)
+        fw_blob, fw_offsets = _pack_strings(self.frameworks)
+        req_blob, req_offsets = _pack_strings(self.requirements)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            ids_blob=ids_blob,
+            ids_offsets=ids_offsets,
+            fw_blob=fw_blob,
+            fw_offsets=fw_offsets,
+            req_blob=req_blob,
+            req_offsets=req_offsets,
+            indptr=self.indptr,
+            framework_idx=self.framework_idx,
+            requirement_idx=self.requirement_idx,
+        )
+        os.replace(tmp_path, path)
+        logger.info(
+            "Saved SCF crosswalk (%d controls x %d frameworks, %d mappings) to %s",
+            len(self),
+            len(self.frameworks),
+            self.nnz,
+            path,
+        )
+
+    @classmethod
+    def load(cls, path: str = CROSSWALK_FILE) -> "Crosswalk":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                _unpack_strings(data["ids_blob"], data["ids_offsets"]),
+                _unpack_strings(data["fw_blob"], data["fw_offsets"]),
+                _unpack_strings(data["req_blob"], data["req_offsets"]),
+                data["indptr"],
+                data["framework_idx"],
+                data["requirement_idx"],
+            )
+
+
+def load_crosswalk(path: str = CROSSWALK_FILE) -> Crosswalk | None:
+    """The persisted crosswalk, or None if it has not been built (or is unreadable)."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return Crosswalk.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Ignoring unreadable SCF crosswalk: %s", e)
+        return None
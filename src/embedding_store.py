@@ -0,0 +1,208 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections.abc import Callable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+EMBEDDINGS_CACHE_FILE = os.path.join(DATA_DIR, "scf_embeddings.npy")
+EMBEDDINGS_MANIFEST_FILE = os.path.join(DATA_DIR, "scf_embeddings.json")
+
+# Storage precision for the on-disk matrix. float16 halves disk and page-cache
+# footprint at a negligible cost in ranking quality.
+EMBEDDINGS_DTYPE = os.environ.get("SCF_EMBEDDINGS_DTYPE", "float32")
+
+# Process-wide cache of loaded matrices, keyed by store version
+_MATRIX_CACHE: dict[str, np.ndarray] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def control_text(control: dict) -> str:
+    """The text that is embedded for a single SCF control."""
+    return f"{control['control_id']} {control['domain']}: {control['description']}"
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def compute_store_version(text_hashes: list[str], model_name: str, dtype: str) -> str:
+    """Content hash identifying one embedding matrix: controls + model + precision."""
+    digest = hashlib.sha256(f"{model_name}\n{dtype}\n".encode())
+    for h in text_hashes:
+        digest.update(h.encode("ascii"))
+    return digest.hexdigest()
+
+
+def l2_normalize(matrix: np.ndarray) -> np.ndarray:
+    """Row-wise L2 normalization; zero rows are left as zeros."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _read_manifest() -> dict | None:
+    if not os.path.exists(EMBEDDINGS_MANIFEST_FILE):
+        return None
+    try:
+        with open(EMBEDDINGS_MANIFEST_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable embeddings manifest: %s", e)
+        return None
+
+
+def _load_matrix(expected_rows: int) -> np.ndarray | None:
+    if not os.path.exists(EMBEDDINGS_CACHE_FILE):
+        return None
+    try:
+        matrix = np.load(EMBEDDINGS_CACHE_FILE, mmap_mode="r")
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable embeddings cache: %s", e)
+        return None
+    if matrix.ndim != 2 or matrix.shape[0] != expected_rows:
+        return None
+    return matrix
+
+
+def _write_store(
+    matrix: np.ndarray, manifest: dict, cache_file: str, manifest_file: str
+) -> None:
+    """Write matrix + manifest via temp files so readers never see a torn store."""
+    tmp_matrix = f"{cache_file}.tmp.npy"
+    tmp_manifest = f"{manifest_file}.tmp"
+    np.save(tmp_matrix, matrix)
+    with open(tmp_manifest, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_matrix, cache_file)
+    os.replace(tmp_manifest, manifest_file)
+
+
+def _rebuild(
+    texts: list[str],
+    text_hashes: list[str],
+    version: str,
+    model_name: str,
+    dtype: str,
+    encode: Callable[[list[str]], np.ndarray],
+) -> None:
+    """
+    Build the store for `version`, re-using rows of the previous store whose
+    control text is unchanged so only new or edited controls are encoded.
+    """
+    reusable: dict[str, np.ndarray] = {}
+    old_manifest = _read_manifest()
+    if old_manifest and old_manifest.get("model") == model_name:
+        old_hashes = old_manifest.get("text_hashes", [])
+        old_matrix = _load_matrix(len(old_hashes))
+        if old_matrix is not None:
+            wanted = set(text_hashes)
+            for row, h in enumerate(old_hashes):
+                if h in wanted:
+                    reusable[h] = old_matrix[row]
+
+    missing = [i for i, h in enumerate(text_hashes) if h not in reusable]
+    logger.info(
+        "Building SCF embeddings: %d re-used, %d to encode (model=%s, dtype=%s)",
+        len(texts) - len(missing),
+        len(missing),
+        model_name,
+        dtype,
+    )
+
+    dim = None
+    encoded = None
+    if missing:
+        encoded = l2_normalize(encode([texts[i] for i in missing]))
+        dim = encoded.shape[1]
+    elif reusable:
+        dim = next(iter(reusable.values())).shape[0]
+
+    matrix = np.zeros((len(texts), dim or 0), dtype=np.float32)
+    for i, h in enumerate(text_hashes):
+        if h in reusable:
+            matrix[i] = reusable[h]
+    if encoded is not None:
+        matrix[missing] = encoded
+
+    manifest = {
+        "version": version,
+        "model": model_name,
+        "dtype": dtype,
+        "count": len(texts),
+        "text_hashes": text_hashes,
+    }
+    _write_store(
+        matrix.astype(dtype),
+        manifest,
+        EMBEDDINGS_CACHE_FILE,
+        EMBEDDINGS_MANIFEST_FILE,
+    )
+    logger.info("Saved embeddings store %s to %s", version[:12], EMBEDDINGS_CACHE_FILE)
+
+
+def load_embeddings(
+    scf_data: list[dict],
+    model_name: str,
+    encode: Callable[[list[str]], np.ndarray],
+    dtype: str | None = None,
+) -> np.ndarray:
+    """
+    Return the L2-normalized embedding matrix for `scf_data`, one row per control.
+
+    The store is versioned by a content hash of the control texts, the model name
+    and the storage dtype, so an SCF update invalidates it automatically. The
+    matrix is memory-mapped read-only from disk and held in a process-wide cache;
+    repeated calls for the same version never touch the disk again.
+    """
+    dtype = dtype or EMBEDDINGS_DTYPE
+    texts = [control_text(c) for c in scf_data]
+    text_hashes = [_text_hash(t) for t in texts]
+    version = compute_store_version(text_hashes, model_name, dtype)
+
+    cached = _MATRIX_CACHE.get(version)
+    if cached is not None:
+        return cached
+
+    with _CACHE_LOCK:
+        cached = _MATRIX_CACHE.get(version)
+        if cached is not None:
+            return cached
+
+        manifest = _read_manifest()
+        matrix = None
+        if manifest and manifest.get("version") == version:
+            matrix = _load_matrix(len(texts))
+        if matrix is None:
+            _rebuild(texts, text_hashes, version, model_name, dtype, encode)
+            matrix = _load_matrix(len(texts))
+        else:
+            logger.info("Loading cached SCF embeddings from %s", EMBEDDINGS_CACHE_FILE)
+
+        if matrix is None:
+            raise RuntimeError(
+                f"Embeddings store at {EMBEDDINGS_CACHE_FILE} could not be loaded."
+            )
+        _MATRIX_CACHE.clear()
+        _MATRIX_CACHE[version] = matrix
+        return matrix
+
+
+def matrix_version(matrix: np.ndarray) -> str | None:
+    """Store version of a matrix returned by load_embeddings, if still cached."""
+    for version, cached in list(_MATRIX_CACHE.items()):
+        if cached is matrix:
+            return version
+    return None
+
+
+def clear_cache() -> None:
+    """Drop the in-process matrix cache (the on-disk store is kept)."""
+    with _CACHE_LOCK:
+        _MATRIX_CACHE.clear()
@@ -1,17 +1,39 @@
+import importlib.util
 import json
 import logging
 import re
 import os
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
-import pandas as pd
+import numpy as np
 import requests
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, field_validator
+
+from src.bm25 import write_bm25_index
+from src.crosswalk import CROSSWALK_FILE, Crosswalk, load_crosswalk
+from src.scf_diff import append_changelog, diff_controls, diff_summary, is_empty_diff
+from src.scf_store import write_compact_db, write_regulation_index
+
+if TYPE_CHECKING:
+    # pandas is only needed to parse the workbook; imported there, so release
+    # checks (e.g. the app sidebar) stay light
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
 RAW_SCF_FILE = os.path.join(DATA_DIR, "scf_raw.xlsx")
 PARSED_JSON_FILE = os.path.join(DATA_DIR, "scf_parsed.json")
+# Tag / ETag / asset of the release the local files were built from
+RELEASE_STATE_FILE = os.path.join(DATA_DIR, "scf_release.json")
+# One JSON object per applied update with the per-control diff
+CHANGELOG_FILE = os.path.join(DATA_DIR, "scf_changelog.jsonl")
+
+UPDATE_UNCHANGED = "unchanged"
+UPDATE_APPLIED = "updated"
+UPDATE_FAILED = "failed"
 
 
 class SCFControl(BaseModel):
@@ -39,6 +61,47 @@ class SCFControl(BaseModel):
         return v
 
 
+_CONTROL_LIST_ADAPTER = TypeAdapter(list[SCFControl])
+
+# Framework columns carried into each control's "regulations" mapping
+FRAMEWORK_KEYWORDS = [
+    "soc 2",
+    "iso 27001",
+    "nist csf",
+    "nist 800-53",
+    "gdpr",
+    "ccpa",
+    "hipaa",
+    "pci dss",
+]
+
+# Framework columns kept in the sparse crosswalk (data/scf_crosswalk.npz):
+# "all", or comma-separated keywords matched against the column names, e.g.
+# SCF_FRAMEWORKS="fedramp,cmmc,dora,nis2"
+FRAMEWORK_SELECTION = os.environ.get("SCF_FRAMEWORKS", "all")
+# Column name prefixes of the SCF sheet that are not framework mappings:
+# control metadata, maturity levels, SCF baselines, risk and threat catalogues
+NON_FRAMEWORK_PREFIXES = (
+    "scf",
+    "secure controls framework",
+    "control description",
+    "control threat",
+    "conformity validation",
+    "evidence request list",
+    "possible solutions",
+    "relative control weighting",
+    "pptdf",
+    "nist csf function grouping",
+    "scrm focus",
+    "c|p-cmm",
+    "minimum security requirements",
+    "identify",
+    "risk",
+    "threat",
+    "errata",
+    "unnamed:",
+)
+
 # We use the official GitHub API to dynamically get the latest release
 GITHUB_API_URL = "https://api.github.com/repos/securecontrolsframework/securecontrolsframework/releases/latest"
 
@@ -48,6 +111,24 @@ def setup_directories():
         os.makedirs(DATA_DIR)
 
 
+def _xlsx_asset(release_data: dict) -> dict | None:
+    return next(
+        (a for a in release_data.get("assets", []) if a["name"].endswith(".xlsx")),
+        None,
+    )
+
+
+def _download_file(url: str, path: str) -> None:
+    """Stream `url` to `path` via a temp file, so a failed download keeps the old file."""
+    file_response = requests.get(url, stream=True, timeout=10)
+    file_response.raise_for_status()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        for chunk in file_response.iter_content(chunk_size=8192):
+            f.write(chunk)
+    os.replace(tmp_path, path)
+
+
 def download_scf():
     """Dynamically fetches the latest SCF Excel file from GitHub releases."""
     if os.path.exists(RAW_SCF_FILE):
@@ -60,26 +141,15 @@ def download_scf():
         response = requests.get(GITHUB_API_URL, headers=headers, timeout=10)
         response.raise_for_status()
 
-        release_data = response.json()
-        download_url = None
-
-        for asset in release_data.get("assets", []):
-            if asset["name"].endswith(".xlsx"):
-                download_url = asset["browser_download_url"]
-                logger.info("Found latest release file: %s", asset["name"])
-                break
-
-        if not download_url:
+        asset = _xlsx_asset(response.json())
+        if not asset:
             logger.error("Could not find an .xlsx file in the latest GitHub release.")
             return False
+        logger.info("Found latest release file: %s", asset["name"])
 
+        download_url = asset["browser_download_url"]
         logger.info("Downloading from %s...", download_url)
-        file_response = requests.get(download_url, stream=True, timeout=10)
-        file_response.raise_for_status()
-
-        with open(RAW_SCF_FILE, "wb") as f:
-            for chunk in file_response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        _download_file(download_url, RAW_SCF_FILE)
 
         logger.info("Successfully downloaded latest SCF Excel file.")
         return True
@@ -93,178 +163,448 @@ def download_scf():
 
 def parse_scf():
     """Parses the massive Excel file into a lightweight JSON database for the AI."""
-    logger.info("Parsing SCF Excel file...")
-    try:
-        xls = pd.ExcelFile(RAW_SCF_FILE)
-        # Find the correct main sheet, usually named "SCF 2025.4" or similar
-        target_sheet = None
-        for sheet in xls.sheet_names:
-            if sheet.startswith("SCF ") and "Domains & Principles" not in sheet:
-                target_sheet = sheet
-                break
-
-        if not target_sheet:
-            logger.error(
-                "Could not find the main SCF sheet. Available sheets: %s",
-                xls.sheet_names,
-            )
-            return False
+    data = extract_scf_data()
+    if data is None:
+        return False
+    save_scf_records(*data)
+    return True
 
-        logger.info("Found main sheet: %s", target_sheet)
-        df = pd.read_excel(
-            RAW_SCF_FILE, sheet_name=target_sheet
-        )  # headers usually start on row 0 now
 
-        # We only want to keep essential columns for the AI context to save tokens
-        id_col = next((col for col in df.columns if "scf #" in str(col).lower()), None)
-        domain_col = next(
-            (
-                col
-                for col in df.columns
-                if "domain" in str(col).lower() and "scf" in str(col).lower()
-            ),
-            None,
-        )
-        desc_col = next(
-            (
-                col
-                for col in df.columns
-                if "description" in str(col).lower() and "control" in str(col).lower()
-            ),
-            None,
-        )
-        weight_col = next(
-            (
-                col
-                for col in df.columns
-                if "relative control weighting" in str(col).lower()
-            ),
-            None,
-        )
-        erl_col = next(
-            (col for col in df.columns if "evidence request list" in str(col).lower()),
-            None,
-        )
-        question_col = next(
-            (col for col in df.columns if "scf control question" in str(col).lower()),
-            None,
-        )
+def excel_engine() -> str:
+    """calamine (Rust) when python-calamine is installed, else read-only openpyxl."""
+    return "calamine" if importlib.util.find_spec("python_calamine") else "openpyxl"
 
-        if not id_col or not desc_col:
-            logger.error(
-                "Could not find required columns in the Excel file. Available: %s",
-                df.columns.tolist()[:10],
-            )
-            return False
 
-        logger.info(
-            "Found columns: ID='%s', Domain='%s', Description='%s', Weight='%s'",
-            id_col,
-            domain_col,
-            desc_col,
-            weight_col,
-        )
+def _find_column(columns, *keywords: str):
+    return next(
+        (c for c in columns if all(kw in str(c).lower() for kw in keywords)), None
+    )
 
-        # Identify key regulatory columns (ISO, NIST, SOC 2, GDPR, CCPA, HIPAA, PCI)
-        # We search the column names for these keywords to dynamically find them
-        framework_keywords = [
-            "soc 2",
-            "iso 27001",
-            "nist csf",
-            "nist 800-53",
-            "gdpr",
-            "ccpa",
-            "hipaa",
-            "pci dss",
-        ]
-        reg_cols = []
-        for col in df.columns:
-            col_lower = str(col).lower().replace("\n", " ")
-            if any(kw in col_lower for kw in framework_keywords):
-                reg_cols.append(col)
 
-        logger.info(
-            "Extracting mappings for %d key frameworks/regulations...", len(reg_cols)
+def _clean_column_name(column) -> str:
+    return str(column).replace("\n", " ").strip()
+
+
+def _normalized_column_name(column) -> str:
+    return " ".join(str(column).lower().split())
+
+
+def select_framework_columns(columns, selection: str = FRAMEWORK_SELECTION) -> list:
+    """
+    Framework mapping columns of the SCF sheet picked by `selection`: "all", or
+    comma-separated keywords (case-insensitive substrings of the column name).
+    """
+    candidates = [
+        c
+        for c in columns
+        if not _normalized_column_name(c).startswith(NON_FRAMEWORK_PREFIXES)
+    ]
+    if selection.strip().lower() == "all":
+        return candidates
+    keywords = [k.strip().lower() for k in selection.split(",") if k.strip()]
+    return [
+        c for c in candidates if any(k in _normalized_column_name(c) for k in keywords)
+    ]
+
+
+def _cell_value(value):
+    """Match pandas' cell conversion: empty strings are missing, 5.0 is 5."""
+    if value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _read_columns(
+    xls: "pd.ExcelFile", sheet: str, header: "pd.Index", wanted: list
+) -> "pd.DataFrame":
+    """Only the `wanted` columns of `sheet`, from the already open workbook."""
+    import pandas as pd
+
+    positions = [header.get_loc(c) for c in wanted]
+    if xls.engine != "openpyxl":
+        return xls.parse(sheet, usecols=positions)
+    # pandas' openpyxl reader converts every cell of every (framework) column in
+    # Python; iterating the read-only worksheet directly only converts the kept ones
+    rows = xls.book[sheet].iter_rows(min_row=2, values_only=True)
+    data = [
+        [_cell_value(row[i]) if i < len(row) else None for i in positions]
+        for row in rows
+    ]
+    return pd.DataFrame(data, columns=wanted, dtype=object)
+
+
+def _text_column(df: "pd.DataFrame", column) -> list[str]:
+    if column is None:
+        return [""] * len(df)
+    return df[column].fillna("").astype(str).str.strip().tolist()
+
+
+def _regulation_column(df: "pd.DataFrame", reg_cols: list) -> list[dict[str, str]]:
+    """Per-row {framework: requirement IDs}, skipping empty cells."""
+    regulations = {row: {} for row in df.index}
+    for column in reg_cols:
+        values = df[column]
+        values = values[values.notna()].astype(str).str.strip()
+        name = _clean_column_name(column)
+        for row, value in values[values != ""].items():
+            regulations[row][name] = value
+    return [regulations[row] for row in df.index]
+
+
+def _crosswalk_from_frame(
+    df: "pd.DataFrame", id_col, framework_cols: list
+) -> Crosswalk:
+    """Sparse control x framework matrix straight from the sheet's columns."""
+    rows, columns, values = [], [], []
+    for j, column in enumerate(framework_cols):
+        cells = df[column]
+        cells = cells[cells.notna()].astype(str).str.strip()
+        cells = cells[cells != ""]
+        rows.append(df.index.get_indexer(cells.index))
+        columns.append(np.full(len(cells), j, dtype=np.int32))
+        values.extend(cells.tolist())
+    return Crosswalk.from_triplets(
+        df[id_col].tolist(),
+        [_clean_column_name(c) for c in framework_cols],
+        np.concatenate(rows) if rows else np.empty(0, dtype=np.int32),
+        np.concatenate(columns) if columns else np.empty(0, dtype=np.int32),
+        values,
+    )
+
+
+def _validate_records(records: list[dict]) -> list[dict]:
+    """Validate all records in one pass, dropping (and logging) invalid ones."""
+    try:
+        _CONTROL_LIST_ADAPTER.validate_python(records)
+        return records
+    except ValidationError as e:
+        invalid = {}
+        for error in e.errors():
+            invalid.setdefault(error["loc"][0], []).append(error["msg"])
+    for index, messages in invalid.items():
+        logger.warning(
+            "Skipping control '%s' — failed schema validation: %s",
+            records[index].get("control_id", "UNKNOWN"),
+            "; ".join(messages),
         )
+    return [r for i, r in enumerate(records) if i not in invalid]
 
-        # Filter and clean
-        cols_to_keep = [id_col, domain_col, desc_col] + reg_cols
-        if weight_col:
-            cols_to_keep.append(weight_col)
-        if erl_col:
-            cols_to_keep.append(erl_col)
-        if question_col:
-            cols_to_keep.append(question_col)
-
-        cleaned_df = df[cols_to_keep].copy()
-        cleaned_df = cleaned_df.dropna(subset=[id_col, desc_col])
-
-        # Convert to dictionary format
-        records = []
-        for _, row in cleaned_df.iterrows():
-            weight_val = (
-                row[weight_col] if weight_col and pd.notna(row[weight_col]) else 1
-            )
-            # SCF usually has weights from 1 to 10
-            try:
-                weight_val = int(weight_val)
-            except ValueError:
-                weight_val = 1
-
-            erl_val = row[erl_col] if erl_col and pd.notna(row[erl_col]) else ""
-            question_val = (
-                row[question_col]
-                if question_col and pd.notna(row[question_col])
-                else ""
-            )
 
-            record = {
-                "control_id": row[id_col],
-                "domain": row[domain_col],
-                "description": row[desc_col],
-                "weight": weight_val,
-                "erl": str(erl_val).strip(),
-                "question": str(question_val).strip(),
-                "regulations": {},
-            }
-            # Add regulations if they are not NaN
-            for r_col in reg_cols:
-                val = row[r_col]
-                if pd.notna(val) and str(val).strip() != "":
-                    # Clean up the column name for the JSON key (remove newlines)
-                    clean_name = str(r_col).replace("\n", " ").strip()
-                    record["regulations"][clean_name] = str(val).strip()
-
-            # Validate record shape with Pydantic before storing
-            try:
-                SCFControl(**record)
-            except Exception as validation_err:
-                logger.warning(
-                    "Skipping control '%s' — failed schema validation: %s",
-                    record.get("control_id", "UNKNOWN"),
-                    validation_err,
+def extract_scf_records(raw_file: str = RAW_SCF_FILE) -> list[dict] | None:
+    """Validated control records from the SCF Excel file, or None on failure."""
+    data = extract_scf_data(raw_file)
+    return None if data is None else data[0]
+
+
+def extract_scf_data(
+    raw_file: str = RAW_SCF_FILE, frameworks: str = FRAMEWORK_SELECTION
+) -> tuple[list[dict], Crosswalk] | None:
+    """
+    Validated control records and the sparse framework crosswalk from the SCF
+    Excel file, or None on failure.
+
+    The workbook is opened once: the header row is read to pick the columns
+    the app needs, then only those columns are loaded. Records are built
+    column-wise and validated in a single pass. Records carry the
+    FRAMEWORK_KEYWORDS mappings; the crosswalk every framework column picked
+    by `frameworks` (see select_framework_columns).
+    """
+    import pandas as pd
+
+    logger.info("Parsing SCF Excel file...")
+    try:
+        with pd.ExcelFile(raw_file, engine=excel_engine()) as xls:
+            # Find the correct main sheet, usually named "SCF 2025.4" or similar
+            target_sheet = None
+            for sheet in xls.sheet_names:
+                if sheet.startswith("SCF ") and "Domains & Principles" not in sheet:
+                    target_sheet = sheet
+                    break
+
+            if not target_sheet:
+                logger.error(
+                    "Could not find the main SCF sheet. Available sheets: %s",
+                    xls.sheet_names,
+                )
+                return None
+
+            logger.info("Found main sheet: %s", target_sheet)
+            # headers usually start on row 0 now
+            columns = xls.parse(target_sheet, nrows=0).columns
+
+            # We only want to keep essential columns for the AI context to save tokens
+            id_col = _find_column(columns, "scf #")
+            domain_col = _find_column(columns, "domain", "scf")
+            desc_col = _find_column(columns, "description", "control")
+            weight_col = _find_column(columns, "relative control weighting")
+            erl_col = _find_column(columns, "evidence request list")
+            question_col = _find_column(columns, "scf control question")
+
+            if not id_col or not desc_col:
+                logger.error(
+                    "Could not find required columns in the Excel file. Available: %s",
+                    columns.tolist()[:10],
                 )
-                continue
+                return None
+
+            logger.info(
+                "Found columns: ID='%s', Domain='%s', Description='%s', Weight='%s'",
+                id_col,
+                domain_col,
+                desc_col,
+                weight_col,
+            )
 
-            records.append(record)
+            # Identify key regulatory columns (ISO, NIST, SOC 2, GDPR, CCPA, HIPAA, PCI)
+            # We search the column names for these keywords to dynamically find them
+            reg_cols = [
+                col
+                for col in columns
+                if any(
+                    kw in str(col).lower().replace("\n", " ")
+                    for kw in FRAMEWORK_KEYWORDS
+                )
+            ]
+            framework_cols = select_framework_columns(columns, frameworks)
+            logger.info(
+                "Extracting mappings for %d key frameworks/regulations "
+                "(%d in the crosswalk)...",
+                len(reg_cols),
+                len(framework_cols),
+            )
 
-        with open(PARSED_JSON_FILE, "w", encoding="utf-8") as f:
-            json.dump(records, f, indent=2, ensure_ascii=False)
+            cols_to_keep = [
+                c
+                for c in (
+                    id_col,
+                    domain_col,
+                    desc_col,
+                    weight_col,
+                    erl_col,
+                    question_col,
+                )
+                if c is not None
+            ]
+            cols_to_keep += [
+                c
+                for c in dict.fromkeys(reg_cols + framework_cols)
+                if c not in cols_to_keep
+            ]
+            df = _read_columns(xls, target_sheet, columns, cols_to_keep)
+
+        df = df.dropna(subset=[id_col, desc_col])
+
+        # SCF usually has weights from 1 to 10; unparseable weights default to 1
+        if weight_col:
+            weights = pd.to_numeric(df[weight_col], errors="coerce").fillna(1)
+            weights = weights.astype(int).tolist()
+        else:
+            weights = [1] * len(df)
+
+        columns = {
+            "control_id": df[id_col].tolist(),
+            "domain": df[domain_col].tolist() if domain_col else [""] * len(df),
+            "description": df[desc_col].tolist(),
+            "weight": weights,
+            "erl": _text_column(df, erl_col),
+            "question": _text_column(df, question_col),
+            "regulations": _regulation_column(df, reg_cols),
+        }
+        records = [dict(zip(columns, values)) for values in zip(*columns.values())]
+        records = _validate_records(records)
+
+        valid_ids = {r["control_id"] for r in records}
+        df = df[df[id_col].isin(valid_ids)].reset_index(drop=True)
+        crosswalk = _crosswalk_from_frame(df, id_col, framework_cols)
 
-        logger.info("Successfully parsed %d controls.", len(records))
-        logger.info("Saved lightweight AI database to %s", PARSED_JSON_FILE)
-        return True
+        logger.info(
+            "Successfully parsed %d controls (%d framework mappings).",
+            len(records),
+            crosswalk.nnz,
+        )
+        return records, crosswalk
 
     except Exception as e:
         logger.error("Error parsing Excel file: %s", e)
-        return False
+        return None
+
+
+def save_scf_records(records: list[dict], crosswalk: Crosswalk | None = None) -> None:
+    """Write the parsed JSON database and the artifacts derived from it."""
+    tmp_path = f"{PARSED_JSON_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(records, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, PARSED_JSON_FILE)
+
+    # Compact artifact with lazily loaded details, used by the app at runtime
+    write_compact_db(records)
+    # Full control x framework crosswalk, stored sparsely
+    if crosswalk is not None:
+        crosswalk.save(CROSSWALK_FILE)
+    # Inverted framework / requirement-ID index for the gap analyzer
+    write_regulation_index(crosswalk.iter_records() if crosswalk else records)
+    # BM25 lexical index over IDs, text and requirement codes for hybrid retrieval
+    write_bm25_index(_with_crosswalk(records, crosswalk) if crosswalk else records)
+
+    logger.info("Saved lightweight AI database to %s", PARSED_JSON_FILE)
+
+
+def _read_json(path: str, default):
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable %s: %s", path, e)
+        return default
+
+
+def load_release_state() -> dict:
+    return _read_json(RELEASE_STATE_FILE, {})
+
+
+def save_release_state(state: dict) -> None:
+    with open(RELEASE_STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+
+
+def check_latest_release(etag: str | None = None) -> dict | None:
+    """
+    The latest GitHub release as {"tag", "etag", "asset_name", "asset_url",
+    "published_at"}, or None when the release metadata still matches `etag`
+    (a conditional request that does not count against the API rate limit).
+    """
+    headers = {"Accept": "application/vnd.github.v3+json"}
+    if etag:
+        headers["If-None-Match"] = etag
+    response = requests.get(GITHUB_API_URL, headers=headers, timeout=10)
+    if response.status_code == 304:
+        return None
+    response.raise_for_status()
+
+    release_data = response.json()
+    asset = _xlsx_asset(release_data)
+    if not asset:
+        raise ValueError("Could not find an .xlsx file in the latest GitHub release.")
+    return {
+        "tag": release_data.get("tag_name"),
+        "etag": response.headers.get("ETag"),
+        "asset_name": asset["name"],
+        "asset_url": asset["browser_download_url"],
+        "published_at": release_data.get("published_at"),
+    }
+
+
+@dataclass
+class UpdateResult:
+    status: str
+    release: str | None = None
+    diff: dict = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def summary(self) -> dict:
+        return diff_summary(self.diff) if self.diff else {}
+
+
+def _with_crosswalk(records: list[dict], crosswalk: Crosswalk) -> list[dict]:
+    return [
+        {**r, "regulations": crosswalk.regulations(r["control_id"])} for r in records
+    ]
+
+
+def update_scf(force: bool = False) -> UpdateResult:
+    """
+    Release-aware SCF update.
+
+    Checks the latest GitHub release (conditionally, by ETag) and downloads it
+    only when its tag differs from the one the local data was built from (or
+    `force` is set). The new spreadsheet is diffed per control against the
+    current database; the parsed store, compact store and regulation index are
+    only rewritten when something changed, and the embedding store re-encodes
+    just the added or edited controls on next load. Every applied update is
+    appended to CHANGELOG_FILE.
+
+    `force` re-downloads the release and rewrites every derived artifact even
+    when nothing changed, repairing a corrupt or partial download.
+    """
+    setup_directories()
+    state = load_release_state()
+    have_raw = os.path.exists(RAW_SCF_FILE)
+    try:
+        release = check_latest_release(
+            state.get("etag") if have_raw and not force else None
+        )
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.error("Error checking the latest SCF release: %s", e)
+        return UpdateResult(UPDATE_FAILED, state.get("tag"), error=str(e))
+
+    if release is None or (
+        release["tag"] == state.get("tag") and have_raw and not force
+    ):
+        if os.path.exists(PARSED_JSON_FILE):
+            logger.info("SCF release %s is already up to date.", state.get("tag"))
+            return UpdateResult(UPDATE_UNCHANGED, state.get("tag"))
+        release = release or state
+    else:
+        logger.info(
+            "Downloading SCF release %s (%s)...", release["tag"], release["asset_name"]
+        )
+        try:
+            _download_file(release["asset_url"], RAW_SCF_FILE)
+        except (requests.exceptions.RequestException, OSError) as e:
+            logger.error("Error downloading SCF: %s", e)
+            return UpdateResult(UPDATE_FAILED, state.get("tag"), error=str(e))
+
+    data = extract_scf_data()
+    if data is None:
+        return UpdateResult(
+            UPDATE_FAILED, state.get("tag"), error="Failed to parse the SCF Excel file."
+        )
+    records, crosswalk = data
+
+    old_records = _read_json(PARSED_JSON_FILE, [])
+    old_crosswalk = load_crosswalk(CROSSWALK_FILE)
+    if old_crosswalk is not None:
+        # Diff regulation mappings over every crosswalk framework
+        old_records = _with_crosswalk(old_records, old_crosswalk)
+        diff = diff_controls(old_records, _with_crosswalk(records, crosswalk))
+    else:
+        diff = diff_controls(old_records, records)
+    changed = (
+        force
+        or not is_empty_diff(diff)
+        or not os.path.exists(PARSED_JSON_FILE)
+        or old_crosswalk is None
+    )
+    if changed:
+        save_scf_records(records, crosswalk)
+        append_changelog(
+            {
+                "timestamp": time.time(),
+                "previous_release": state.get("tag"),
+                "release": release.get("tag"),
+                "asset": release.get("asset_name"),
+                "summary": diff_summary(diff),
+                **diff,
+            },
+            CHANGELOG_FILE,
+        )
+    save_release_state(release)
+    logger.info("SCF release %s: %s", release.get("tag"), diff_summary(diff))
+    return UpdateResult(
+        UPDATE_APPLIED if changed else UPDATE_UNCHANGED, release.get("tag"), diff
+    )
 
 
 def main():
     logging.basicConfig(level=logging.INFO)
-    setup_directories()
-    if download_scf():
-        parse_scf()
+    result = update_scf()
+    if result.status == UPDATE_FAILED:
+        raise SystemExit(result.error)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,233 @@
+import codecs
+import json
+import queue
+import threading
+from collections.abc import Iterable, Iterator
+
+# Characters read from the underlying stream per refill
+DEFAULT_READ_SIZE = 1 << 16
+# Findings buffered between the reader thread and the mapper
+DEFAULT_QUEUE_SIZE = 256
+
+_WHITESPACE = " \t\r\n\ufeff"
+
+
+class _StreamBuffer:
+    """Sliding text window over a (text or binary) stream for incremental JSON."""
+
+    def __init__(self, stream, read_size: int = DEFAULT_READ_SIZE):
+        self._stream = stream
+        self._read_size = read_size
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._json = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Read more input; returns False once the stream is exhausted."""
+        if self.eof:
+            return False
+        data = self._stream.read(self._read_size)
+        if isinstance(data, bytes):
+            data = self._decoder.decode(data, final=not data)
+        if not data:
+            self.eof = True
+            return False
+        # Drop what has been consumed so the window stays bounded
+        self.buf = self.buf[self.pos :] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, or '' at end of input."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in findings stream, got {found!r}")
+        self.pos += 1
+
+    def decode(self):
+        """Decode the next complete JSON value, reading more input as needed."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number or literal touching the end of the window may be cut off
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+class FindingReader:
+    """
+    Streaming reader for Security Hub findings.
+
+    Yields findings one at a time, without loading the export, from:
+      - `{"Findings": [...]}` documents (the array is streamed element by element),
+      - paginated `get-findings` dumps: concatenated or line-delimited pages,
+        or a JSON array of pages,
+      - ASFF JSONL (one finding object per line) and plain JSON arrays.
+
+    Memory is bounded by the read window plus the finding being parsed.
+    `batch` becomes True once the input is known to hold a findings collection
+    rather than one standalone JSON object.
+    """
+
+    def __init__(self, stream, read_size: int = DEFAULT_READ_SIZE):
+        self._buffer = _StreamBuffer(stream, read_size)
+        self.batch = False
+
+    def __iter__(self) -> Iterator:
+        buffer = self._buffer
+        documents = 0
+        while char := buffer.peek():
+            documents += 1
+            if documents > 1:
+                self.batch = True
+            if char == "[":
+                self.batch = True
+                yield from self._iter_array(unwrap_pages=True)
+            elif char == "{":
+                yield from self._iter_object()
+            else:
+                raise ValueError(f"Unexpected {char!r} in findings stream")
+
+    def _iter_array(self, unwrap_pages: bool) -> Iterator:
+        buffer = self._buffer
+        buffer.expect("[")
+        if buffer.peek() == "]":
+            buffer.pos += 1
+            return
+        while True:
+            item = buffer.decode()
+            if (
+                unwrap_pages
+                and isinstance(item, dict)
+                and isinstance(item.get("Findings"), list)
+            ):
+                yield from item["Findings"]
+            else:
+                yield item
+            char = buffer.peek()
+            buffer.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError(f"Expected ',' or ']' in findings array, got {char!r}")
+
+    def _iter_object(self) -> Iterator:
+        """A page ({"Findings": [...], "NextToken": ...}) or a single finding."""
+        buffer = self._buffer
+        buffer.expect("{")
+        fields = {}
+        is_page = False
+        if buffer.peek() == "}":
+            buffer.pos += 1
+            return
+        while True:
+            key = buffer.decode()
+            buffer.expect(":")
+            if key == "Findings" and buffer.peek() == "[":
+                is_page = self.batch = True
+                yield from self._iter_array(unwrap_pages=False)
+            else:
+                fields[key] = buffer.decode()
+            char = buffer.peek()
+            buffer.pos += 1
+            if char == "}":
+                break
+            if char != ",":
+                raise ValueError(
+                    f"Expected ',' or '}}' in findings object, got {char!r}"
+                )
+        if not is_page:
+            yield fields
+
+
+def iter_findings(stream, read_size: int = DEFAULT_READ_SIZE) -> Iterator:
+    """Stream findings from a JSON / JSONL / paginated export (see FindingReader)."""
+    return iter(FindingReader(stream, read_size))
+
+
+def scan_findings(stream) -> tuple[bool, int, object | None]:
+    """
+    One streaming pass over an upload: (is it a findings collection, number of
+    findings, first finding). Only the first finding is kept in memory.
+    """
+    reader = FindingReader(stream)
+    count = 0
+    first = None
+    for finding in reader:
+        if count == 0:
+            first = finding
+        count += 1
+    return reader.batch, count, first
+
+
+class _Failure:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_DONE = object()
+
+
+def prefetch(items: Iterable, maxsize: int = DEFAULT_QUEUE_SIZE) -> Iterator:
+    """
+    Iterate `items` on a background thread through a bounded queue.
+
+    Parsing overlaps with whatever the consumer does (embedding, LLM calls),
+    while at most `maxsize` items are ever held in memory. Errors raised by the
+    producer are re-raised in the consumer; abandoning the iterator stops the
+    producer at its next item.
+    """
+    buffered: queue.Queue = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffered.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except Exception as e:  # noqa: BLE001 - re-raised in the consumer thread
+            put(_Failure(e))
+            return
+        put(_DONE)
+
+    producer = threading.Thread(target=produce, name="finding-reader", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffered.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
@@ -0,0 +1,146 @@
+import json
+import re
+
+# Top-level ASFF fields that vary between otherwise identical findings
+# (per-resource IDs, timestamps, account numbers, workflow bookkeeping).
+VOLATILE_FINDING_FIELDS = frozenset(
+    {
+        "Id",
+        "AwsAccountId",
+        "AwsAccountName",
+        "Region",
+        "CreatedAt",
+        "UpdatedAt",
+        "FirstObservedAt",
+        "LastObservedAt",
+        "ProcessedAt",
+        "RecordState",
+        "Workflow",
+        "WorkflowState",
+        "Note",
+        "UserDefinedFields",
+        "FindingProviderFields",
+        "Sample",
+        "Action",
+        "Process",
+        "Network",
+        "ThreatIntelIndicators",
+    }
+)
+
+# Resource attributes worth keeping: everything else (Id, Details, Tags, ...)
+# identifies a specific resource rather than the control failure.
+_STABLE_RESOURCE_FIELDS = ("Type", "Partition")
+
+# Compliance attributes that describe the failed control itself
+_STABLE_COMPLIANCE_FIELDS = (
+    "Status",
+    "SecurityControlId",
+    "RelatedRequirements",
+    "AssociatedStandards",
+)
+
+_ACCOUNT_NUMBER = re.compile(r"(?<!\d)\d{12}(?!\d)")
+
+
+def _mask_account_numbers(value):
+    if isinstance(value, str):
+        return _ACCOUNT_NUMBER.sub("<account>", value)
+    if isinstance(value, list):
+        return [_mask_account_numbers(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _mask_account_numbers(v) for k, v in value.items()}
+    return value
+
+
+def _canonical_compliance(compliance) -> dict:
+    if not isinstance(compliance, dict):
+        return {}
+    return {k: compliance[k] for k in _STABLE_COMPLIANCE_FIELDS if k in compliance}
+
+
+def canonicalize_finding(finding: dict) -> dict:
+    """
+    Strip volatile fields from a Security Hub (ASFF) finding.
+
+    What remains describes the control failure rather than the affected resource,
+    so the same check failing on 200 buckets canonicalizes to the same document.
+    """
+    canonical = {}
+    for key, value in finding.items():
+        if key in VOLATILE_FINDING_FIELDS:
+            continue
+        if key == "Resources" and isinstance(value, list):
+            types = []
+            for resource in value:
+                if not isinstance(resource, dict):
+                    continue
+                stable = {
+                    f: resource[f] for f in _STABLE_RESOURCE_FIELDS if f in resource
+                }
+                if stable and stable not in types:
+                    types.append(stable)
+            value = types
+        elif key == "Compliance":
+            value = _canonical_compliance(value)
+        canonical[key] = value
+    return _mask_account_numbers(canonical)
+
+
+def finding_group_key(finding: dict) -> str:
+    """Grouping key: GeneratorId + stable Compliance fields + Title."""
+    return json.dumps(
+        [
+            finding.get("GeneratorId", ""),
+            _canonical_compliance(finding.get("Compliance")),
+            finding.get("Title", ""),
+        ],
+        sort_keys=True,
+        default=str,
+    )
+
+
+def _dedup_key(finding: dict, canonical: dict) -> str:
+    if finding.get("GeneratorId") or finding.get("Title"):
+        return finding_group_key(finding)
+    # Without ASFF identity fields, only identical content is a duplicate
+    return json.dumps(canonical, sort_keys=True, default=str)
+
+
+def dedup_key(item) -> str | None:
+    """
+    Key under which group_findings merges `item` with its duplicates; None for
+    items that are not ASFF objects, which are always mapped on their own.
+    """
+    if not isinstance(item, dict):
+        return None
+    return _dedup_key(item, canonicalize_finding(item))
+
+
+def group_findings(findings: list) -> tuple[list[str], list[int]]:
+    """
+    De-duplicate findings before mapping.
+
+    Returns (texts, assignment): one canonical JSON text per unique group, in
+    first-seen order, and for every input finding the index of its group in
+    `texts`. Map `texts` once, then fan results out with `assignment` so per-
+    finding statistics (Hit Count, Priority Score) stay correct.
+    """
+    texts: list[str] = []
+    assignment: list[int] = []
+    group_index: dict[str, int] = {}
+
+    for finding in findings:
+        if not isinstance(finding, dict):
+            # Not an ASFF object: map it on its own, verbatim
+            assignment.append(len(texts))
+            texts.append(json.dumps(finding))
+            continue
+        canonical = canonicalize_finding(finding)
+        key = _dedup_key(finding, canonical)
+        if key not in group_index:
+            group_index[key] = len(texts)
+            texts.append(json.dumps(canonical))
+        assignment.append(group_index[key])
+
+    return texts, assignment
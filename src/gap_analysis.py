@@ -0,0 +1,184 @@
+from collections.abc import Callable, Iterable, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Minimum cosine similarity for a customer control name to count as covering
+# the nearest SCF control when its ID does not match an SCF ID directly.
+DEFAULT_NAME_MATCH_THRESHOLD = 0.5
+
+STATUS_COVERED = "✅ Covered"
+STATUS_GAP = "❌ Gap"
+
+MATCH_BY_ID = "ID"
+MATCH_BY_NAME = "Semantic"
+UNMATCHED = "Unmatched"
+
+NameMatcher = Callable[[Sequence[str]], tuple[list, np.ndarray]]
+
+
+def detect_inventory_columns(df: pd.DataFrame) -> tuple[str, str | None]:
+    """
+    Guess the (control ID, control name) columns of a customer inventory export.
+
+    Falls back to the first column for the ID and to None for the name.
+    """
+    columns = list(df.columns)
+    lowered = [str(c).lower() for c in columns]
+    id_col = next(
+        (c for c, low in zip(columns, lowered) if "control" in low and "id" in low),
+        columns[0],
+    )
+    name_col = next(
+        (
+            c
+            for c, low in zip(columns, lowered)
+            if c != id_col
+            and any(hint in low for hint in ("name", "title", "description"))
+        ),
+        None,
+    )
+    return id_col, name_col
+
+
+def resolve_inventory(
+    df: pd.DataFrame,
+    scf_ids: Iterable[str],
+    match_names: NameMatcher | None = None,
+    id_col: str | None = None,
+    name_col: str | None = None,
+    threshold: float = DEFAULT_NAME_MATCH_THRESHOLD,
+) -> pd.DataFrame:
+    """
+    Attach an SCF control to every row of a customer control inventory.
+
+    Rows whose ID already is an SCF ID are matched with a vectorized lookup.
+    The remaining rows (e.g. in-house IDs like 'SEC-01') are matched by control
+    name through `match_names`, called once with the unique unresolved names.
+    Adds the columns 'SCF Control ID', 'Match Type' and 'Match Score'.
+    """
+    detected_id, detected_name = detect_inventory_columns(df)
+    id_col = id_col or detected_id
+    name_col = name_col if name_col is not None else detected_name
+
+    resolved = df.copy()
+    ids = resolved[id_col].astype("string").str.strip().str.upper()
+    scf_index = pd.Index(pd.unique(pd.Series(list(scf_ids), dtype="string")))
+    by_id = ids.isin(scf_index).fillna(False).to_numpy(dtype=bool)
+
+    scf_match = pd.Series(pd.NA, index=resolved.index, dtype="string")
+    match_type = np.full(len(resolved), UNMATCHED, dtype=object)
+    scores = np.zeros(len(resolved), dtype=np.float32)
+    scf_match[by_id] = ids[by_id]
+    match_type[by_id] = MATCH_BY_ID
+    scores[by_id] = 1.0
+
+    if match_names is not None and name_col is not None:
+        names = resolved[name_col].astype("string").str.strip()
+        pending = ~by_id & names.notna().to_numpy() & (names != "").to_numpy()
+        if pending.any():
+            unique_names = pd.unique(names[pending])
+            matched_ids, matched_scores = match_names(list(unique_names))
+            lookup = pd.DataFrame(
+                {
+                    "name": unique_names,
+                    "scf": pd.array(matched_ids, dtype="string"),
+                    "score": np.asarray(matched_scores, dtype=np.float32),
+                }
+            ).set_index("name")
+            hits = lookup.reindex(names[pending])
+            accepted = (hits["score"] >= threshold).to_numpy() & hits[
+                "scf"
+            ].notna().to_numpy()
+            rows = np.flatnonzero(pending)[accepted]
+            scf_match.iloc[rows] = hits["scf"].to_numpy()[accepted]
+            match_type[rows] = MATCH_BY_NAME
+            scores[rows] = hits["score"].to_numpy()[accepted]
+
+    resolved["SCF Control ID"] = scf_match
+    resolved["Match Type"] = match_type
+    resolved["Match Score"] = scores.round(3)
+    return resolved
+
+
+def covered_control_ids(resolved: pd.DataFrame) -> set[str]:
+    """SCF control IDs covered by at least one resolved inventory row."""
+    return set(resolved["SCF Control ID"].dropna())
+
+
+def build_gap_table(
+    required: Sequence[Mapping],
+    resolved: pd.DataFrame,
+    id_col: str | None = None,
+) -> pd.DataFrame:
+    """
+    Gap checklist for the required SCF controls, built with joins, not row loops.
+
+    'Matched Controls' lists the customer control IDs that cover each SCF control.
+    """
+    id_col = id_col or detect_inventory_columns(resolved)[0]
+    df_req = pd.DataFrame(
+        {
+            "Required Control ID": [c["control_id"] for c in required],
+            "Domain": [c.get("domain", "") for c in required],
+            "Description": [c.get("description", "") for c in required],
+            "Evidence Request List (ERL)": [c.get("erl", "") for c in required],
+            "Control Question": [c.get("question", "") for c in required],
+        }
+    )
+    matched = (
+        resolved.dropna(subset=["SCF Control ID"])
+        .assign(_customer_id=lambda d: d[id_col].astype(str))
+        .groupby("SCF Control ID")["_customer_id"]
+        .agg(lambda ids: ", ".join(dict.fromkeys(ids)))
+    )
+    df_req["Matched Controls"] = (
+        df_req["Required Control ID"].map(matched).fillna("").astype(str)
+    )
+    df_req.insert(
+        0,
+        "Status",
+        np.where(df_req["Matched Controls"] != "", STATUS_COVERED, STATUS_GAP),
+    )
+    return df_req
+
+
+def coverage_matrix(
+    control_ids: Sequence[str],
+    frameworks: Mapping[str, Iterable[str]],
+    covered_ids: Iterable[str],
+) -> pd.DataFrame:
+    """
+    Coverage of every regulation column at once.
+
+    Builds a controls x frameworks indicator matrix from the inverted regulation
+    index and scores all frameworks with a single matrix-vector product. Returns
+    one row per framework: Required, Covered, Gaps and Coverage %.
+    """
+    position = {cid: i for i, cid in enumerate(control_ids)}
+    names = list(frameworks)
+    membership = np.zeros((len(position), len(names)), dtype=np.int32)
+    for col, fw in enumerate(names):
+        rows = [position[cid] for cid in frameworks[fw] if cid in position]
+        membership[rows, col] = 1
+
+    covered = np.zeros(len(position), dtype=np.int32)
+    covered[[position[cid] for cid in set(covered_ids) if cid in position]] = 1
+
+    required = membership.sum(axis=0)
+    covered_counts = covered @ membership
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent = np.where(required > 0, covered_counts / required * 100, 0.0)
+    return (
+        pd.DataFrame(
+            {
+                "Framework": names,
+                "Required": required,
+                "Covered": covered_counts,
+                "Gaps": required - covered_counts,
+                "Coverage %": percent.round(1),
+            }
+        )
+        .sort_values("Framework")
+        .reset_index(drop=True)
+    )
@@ -0,0 +1,340 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterable, Iterator
+from itertools import islice
+
+from src.findings import dedup_key
+from src.mapper import MappingResult, map_items
+from src.sqlite_utils import SQLiteConnection
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+JOB_DB_FILE = os.environ.get("SCF_JOB_DB_FILE", os.path.join(DATA_DIR, "jobs.sqlite"))
+# Inputs mapped (and persisted) per step; a restart loses at most one chunk
+JOB_CHUNK_SIZE = int(os.environ.get("SCF_JOB_CHUNK_SIZE", "50"))
+# Rows per INSERT while an upload is being copied into the store
+_INSERT_BATCH = 1000
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+ACTIVE_STATUSES = (JOB_PENDING, JOB_RUNNING)
+
+ITEM_PENDING = "pending"
+ITEM_DONE = "done"
+ITEM_FAILED = "failed"
+
+_JOB_COLUMNS = (
+    "id",
+    "name",
+    "status",
+    "params",
+    "total",
+    "completed",
+    "failed",
+    "error",
+    "created_at",
+    "updated_at",
+)
+_SELECT_JOBS = (
+    "SELECT id, name, status, params, total, completed, failed, error, "
+    "created_at, updated_at FROM jobs"
+)
+
+
+def _job_row(row) -> dict:
+    job = dict(zip(_JOB_COLUMNS, row))
+    job["params"] = json.loads(job["params"])
+    return job
+
+
+class JobStore:
+    """
+    SQLite store of background mapping jobs.
+
+    Each job keeps its inputs and, per input, a status and the serialized
+    MappingResult (or the error), so progress survives Streamlit reruns and
+    process restarts, and an interrupted job resumes at its first pending input.
+
+    Inputs also keep their de-duplication key (see src.findings.dedup_key):
+    duplicate findings anywhere in a job are mapped once, through the first
+    pending one, and share its result.
+    """
+
+    def __init__(self, path: str = JOB_DB_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, name TEXT NOT NULL, status TEXT NOT NULL, "
+                "params TEXT NOT NULL, total INTEGER NOT NULL DEFAULT 0, "
+                "completed INTEGER NOT NULL DEFAULT 0, "
+                "failed INTEGER NOT NULL DEFAULT 0, error TEXT, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_items ("
+                "job_id TEXT NOT NULL, idx INTEGER NOT NULL, status TEXT NOT NULL, "
+                "input TEXT NOT NULL, result TEXT, error TEXT, group_key TEXT, "
+                "PRIMARY KEY (job_id, idx))"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(job_items)")}
+            if "group_key" not in columns:
+                # Stores created before job-wide de-duplication
+                conn.execute("ALTER TABLE job_items ADD COLUMN group_key TEXT")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_job_items_status "
+                "ON job_items (job_id, status, idx)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_job_items_group "
+                "ON job_items (job_id, group_key)"
+            )
+
+    def _connect(self):
+        return SQLiteConnection(self.path)
+
+    def create_job(self, inputs: Iterable, params: dict, name: str = "") -> str:
+        """Copy `inputs` (findings or texts) into a new pending job; returns its id."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        total = 0
+        iterator = iter(inputs)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, name, status, params, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, name, JOB_PENDING, json.dumps(params), now, now),
+            )
+            while batch := list(islice(iterator, _INSERT_BATCH)):
+                conn.executemany(
+                    "INSERT INTO job_items (job_id, idx, status, input, group_key) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        (
+                            job_id,
+                            total + i,
+                            ITEM_PENDING,
+                            json.dumps(item),
+                            dedup_key(item),
+                        )
+                        for i, item in enumerate(batch)
+                    ),
+                )
+                total += len(batch)
+            conn.execute("UPDATE jobs SET total = ? WHERE id = ?", (total, job_id))
+        return job_id
+
+    def get_job(self, job_id: str) -> dict | None:
+        with self._connect() as conn:
+            row = conn.execute(_SELECT_JOBS + " WHERE id = ?", (job_id,)).fetchone()
+        return _job_row(row) if row else None
+
+    def list_jobs(self, limit: int = 20) -> list[dict]:
+        """Most recent jobs first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                _SELECT_JOBS + " ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [_job_row(row) for row in rows]
+
+    def active_job_ids(self) -> list[str]:
+        """Jobs that were queued or running, e.g. when the process last stopped."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                ACTIVE_STATUSES,
+            ).fetchall()
+        return [job_id for (job_id,) in rows]
+
+    def set_status(self, job_id: str, status: str, error: str | None = None) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, error, time.time(), job_id),
+            )
+
+    def pending_items(self, job_id: str, limit: int) -> list[tuple[int, object]]:
+        """
+        The next `limit` unmapped inputs, as (index, input): the first pending
+        input of each duplicate group, so no two of them are duplicates.
+        """
+        with self._connect() as conn:
+            # SQLite takes the bare `input` column from the MIN(idx) row
+            rows = conn.execute(
+                "SELECT MIN(idx), input FROM job_items WHERE job_id = ? AND status = ? "
+                "GROUP BY COALESCE(group_key, idx) ORDER BY MIN(idx) LIMIT ?",
+                (job_id, ITEM_PENDING, limit),
+            ).fetchall()
+        return [(idx, json.loads(item)) for idx, item in rows]
+
+    def record_results(
+        self, job_id: str, results: Iterable[tuple[int, object]]
+    ) -> None:
+        """
+        Persist (index, MappingResult | Exception | None) pairs in one
+        transaction. Each result also completes the pending duplicates of its
+        input.
+        """
+        done, failed = [], []
+        for idx, result in results:
+            where = (job_id, ITEM_PENDING, idx, job_id, idx)
+            if isinstance(result, MappingResult):
+                done.append((ITEM_DONE, result.model_dump_json(), None, *where))
+            else:
+                failed.append((ITEM_FAILED, None, str(result or "no result"), *where))
+        update = (
+            "UPDATE job_items SET status = ?, result = ?, error = ? "
+            "WHERE job_id = ? AND status = ? AND (idx = ? OR group_key = "
+            "(SELECT group_key FROM job_items WHERE job_id = ? AND idx = ?))"
+        )
+        with self._connect() as conn:
+            n_done = conn.executemany(update, done).rowcount if done else 0
+            n_failed = conn.executemany(update, failed).rowcount if failed else 0
+            conn.execute(
+                "UPDATE jobs SET completed = completed + ?, failed = failed + ?, "
+                "updated_at = ? WHERE id = ?",
+                (n_done + n_failed, n_failed, time.time(), job_id),
+            )
+
+    def iter_results(self, job_id: str) -> Iterator[MappingResult | Exception | None]:
+        """Results in input order; failed inputs yield an exception, pending ones None."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "SELECT status, result, error FROM job_items WHERE job_id = ? "
+                "ORDER BY idx",
+                (job_id,),
+            )
+            for status, result, error in cursor:
+                if status == ITEM_DONE:
+                    yield MappingResult.model_validate_json(result)
+                elif status == ITEM_FAILED:
+                    yield RuntimeError(error)
+                else:
+                    yield None
+
+    def delete_job(self, job_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM job_items WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+
+def _map_chunk(items: list, params: dict) -> list:
+    return map_items(items, **params)
+
+
+class JobRunner:
+    """
+    Runs JobStore jobs on background threads, one chunk of inputs at a time.
+    A chunk holds no duplicate findings, and each result is stored for every
+    duplicate of its input in the job, so de-duplication spans the whole job
+    rather than one chunk.
+
+    Results are written to the store after every chunk, so callers (the
+    Streamlit UI) only poll the store; a cancelled or interrupted job picks up
+    at its first pending input when started again.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        map_chunk: Callable[[list, dict], list] = _map_chunk,
+        chunk_size: int = JOB_CHUNK_SIZE,
+    ):
+        self.store = store
+        self.map_chunk = map_chunk
+        self.chunk_size = max(1, chunk_size)
+        self._threads: dict[str, threading.Thread] = {}
+        self._cancel: dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, inputs: Iterable, params: dict, name: str = "") -> str:
+        """Store the inputs as a new job and start mapping it in the background."""
+        job_id = self.store.create_job(inputs, params, name)
+        self.start(job_id)
+        return job_id
+
+    def start(self, job_id: str) -> bool:
+        """Start (or resume) a job; False if it is already running here."""
+        with self._lock:
+            thread = self._threads.get(job_id)
+            if thread is not None and thread.is_alive():
+                return False
+            cancel = threading.Event()
+            thread = threading.Thread(
+                target=self._run,
+                args=(job_id, cancel),
+                name=f"scf-job-{job_id[:8]}",
+                daemon=True,
+            )
+            self._cancel[job_id] = cancel
+            self._threads[job_id] = thread
+            thread.start()
+            return True
+
+    def resume_interrupted(self) -> list[str]:
+        """Restart every queued or running job that has no live worker thread."""
+        return [job_id for job_id in self.store.active_job_ids() if self.start(job_id)]
+
+    def cancel(self, job_id: str) -> None:
+        """Stop after the chunk in flight; the job can be resumed later."""
+        with self._lock:
+            cancel = self._cancel.get(job_id)
+        if cancel is not None:
+            cancel.set()
+
+    def is_running(self, job_id: str) -> bool:
+        with self._lock:
+            thread = self._threads.get(job_id)
+        return thread is not None and thread.is_alive()
+
+    def wait(self, job_id: str, timeout: float | None = None) -> None:
+        with self._lock:
+            thread = self._threads.get(job_id)
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self, job_id: str, cancel: threading.Event) -> None:
+        job = self.store.get_job(job_id)
+        if job is None:
+            return
+        self.store.set_status(job_id, JOB_RUNNING)
+        try:
+            while not cancel.is_set():
+                items = self.store.pending_items(job_id, self.chunk_size)
+                if not items:
+                    break
+                results = self.map_chunk([item for _, item in items], job["params"])
+                self.store.record_results(
+                    job_id, zip((idx for idx, _ in items), results)
+                )
+        except Exception as e:
+            logger.exception("Job %s failed", job_id)
+            self.store.set_status(job_id, JOB_FAILED, str(e))
+            return
+        self.store.set_status(job_id, JOB_CANCELLED if cancel.is_set() else JOB_DONE)
+
+
+_job_runner: JobRunner | None = None
+_job_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    """Process-wide JobRunner; jobs interrupted by a restart resume on first use."""
+    global _job_runner
+    with _job_runner_lock:
+        if _job_runner is None:
+            _job_runner = JobRunner(JobStore())
+            resumed = _job_runner.resume_interrupted()
+            if resumed:
+                logger.info("Resumed %d interrupted mapping job(s).", len(resumed))
+        return _job_runner
@@ -0,0 +1,142 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from src.sqlite_utils import SQLiteConnection
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+LLM_CACHE_FILE = os.environ.get(
+    "SCF_LLM_CACHE_FILE", os.path.join(DATA_DIR, "llm_cache.sqlite")
+)
+
+# Set SCF_LLM_CACHE=0 to always call the LLM
+LLM_CACHE_ENABLED = os.environ.get("SCF_LLM_CACHE", "1") != "0"
+# Entries older than this are treated as misses (default: 7 days)
+LLM_CACHE_TTL_SECONDS = int(os.environ.get("SCF_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+# Least-recently-used entries beyond this count are evicted
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("SCF_LLM_CACHE_MAX_ENTRIES", "10000"))
+
+
+def make_cache_key(*parts) -> str:
+    """Stable SHA-256 key over the given parts (prompt, model, top_k, ...)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """
+    Disk-backed (SQLite) cache of serialized LLM responses.
+
+    Entries expire after `ttl_seconds` and the table is bounded to `max_entries`
+    with least-recently-used eviction. Hit/miss/eviction counters are kept per
+    process and exposed through stats().
+    """
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_FILE,
+        ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_last_access "
+                "ON responses (last_access)"
+            )
+
+    def _connect(self):
+        return SQLiteConnection(self.path)
+
+    def get(self, key: str) -> str | None:
+        """Return the cached value for `key`, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created_at = row
+            if self.ttl_seconds > 0 and now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        """Store `value` under `key`, evicting the least recently used overflow."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            (count,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            overflow = count - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,),
+                )
+                self.evictions += overflow
+
+    def clear(self) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        with self._lock, self._connect() as conn:
+            (size,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": size,
+        }
+
+
+_response_cache: ResponseCache | None = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache | None:
+    """Process-wide ResponseCache, or None when disabled via SCF_LLM_CACHE=0."""
+    global _response_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            try:
+                _response_cache = ResponseCache()
+            except sqlite3.Error as e:
+                logger.warning("LLM response cache unavailable: %s", e)
+                return None
+        return _response_cache
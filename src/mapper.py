@@ -1,39 +1,90 @@
-import json
 import logging
 import os
+import threading
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING
 
 import numpy as np
-import streamlit as st
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from pydantic import BaseModel, Field
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from pydantic import BaseModel, Field, ValidationError
 from tenacity import (
     retry,
-    retry_if_exception_type,
+    retry_if_exception,
     stop_after_attempt,
     wait_exponential,
 )
 
+from src.bm25 import BM25Index, reciprocal_rank_fusion
+from src.chunker import split_document
+from src.context_builder import (
+    CONTEXT_MAX_CANDIDATES,
+    build_context,
+    context_token_budget,
+    estimate_tokens,
+)
+from src.embedding_store import load_embeddings, matrix_version
+from src.findings import group_findings
+from src.llm_cache import get_response_cache, make_cache_key
+from src.rate_limiter import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    RESPONSE_TOKEN_ALLOWANCE,
+    get_http_client,
+    get_rate_limiter,
+    is_transient_error,
+)
+from src.reranker import (
+    HYBRID_MARGIN_THRESHOLD,
+    RERANK_CANDIDATES,
+    get_reranker,
+    score_margin,
+    validate_mode,
+)
+from src.scf_repository import SCFRepository, get_scf_repository
+from src.vector_index import VectorIndex, load_or_build_index
+
+if TYPE_CHECKING:
+    # Heavy (torch / LangChain) imports are deferred to first use; see
+    # scripts/benchmark_import_time.py
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_groq import ChatGroq
+    from sentence_transformers import SentenceTransformer
+
 # Load environment variables (like GROQ_API_KEY)
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
-PARSED_JSON_FILE = os.path.join(DATA_DIR, "scf_parsed.json")
-EMBEDDINGS_CACHE_FILE = os.path.join(DATA_DIR, "scf_embeddings.npy")
-
 # Sentence-transformers model for embedding-based semantic retrieval
 _EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
 
+# Maximum number of in-flight LLM requests for batch mapping
+DEFAULT_BATCH_CONCURRENCY = int(os.environ.get("SCF_BATCH_CONCURRENCY", "4"))
+# Inputs packed into one LLM request by map_batch_to_scf (1 = no packing)
+DEFAULT_PACK_SIZE = int(os.environ.get("SCF_PACK_SIZE", "1"))
+# Minimum Jaccard overlap of retrieved candidates for inputs to share a request
+PACK_MIN_OVERLAP = float(os.environ.get("SCF_PACK_MIN_OVERLAP", "0.2"))
+# Candidates per input compared when grouping, and context budget growth per
+# extra packed input (fraction of the single-input budget)
+PACK_OVERLAP_DEPTH = 20
+PACK_BUDGET_GROWTH = 0.25
+
+# Weight of a control's mean similarity over a section's chunks, against its
+# best single-chunk similarity, when merging chunk candidates
+CHUNK_SUPPORT_WEIGHT = float(os.environ.get("SCF_CHUNK_SUPPORT_WEIGHT", "0.3"))
+# Fuse BM25 lexical ranks into the embedding ranks, so exact tokens such as
+# "CC6.1", "CIS 2.1.5" or "KMS" reach the candidate list (SCF_HYBRID_RETRIEVAL=0
+# for embeddings only)
+HYBRID_RETRIEVAL = os.environ.get("SCF_HYBRID_RETRIEVAL", "1") != "0"
+
 
 class MappedControl(BaseModel):
     control_id: str = Field(description="The exact SCF ID, e.g., 'GOV-01'")
     domain: str = Field(description="The primary SCF Domain")
-    confidence: int = Field(description="Confidence score from 0 to 100")
+    # None for reranker-only mappings ("fast"/"hybrid" modes): the
+    # cross-encoder's scores are not a calibrated confidence
+    confidence: int | None = Field(description="Confidence score from 0 to 100")
     justification: str = Field(
         description="A concise 1-sentence justification for why this control matches the input."
     )
@@ -53,6 +104,38 @@ class MappingResult(BaseModel):
     )
 
 
+class PackedMapping(MappingResult):
+    input_id: int = Field(description="The number of the INPUT this result is for")
+
+
+class PackedMappingResult(BaseModel):
+    results: list[PackedMapping] = Field(
+        description="Exactly one entry per INPUT, each with its top SCF controls."
+    )
+
+
+class SectionMapping(BaseModel):
+    index: int
+    heading: str = ""
+    text: str
+    mapping: MappingResult | None = None
+    error: str | None = None
+
+
+class DocumentControl(MappedControl):
+    sections: list[int] = Field(
+        default_factory=list,
+        description="Indexes of the document sections mapped to this control.",
+    )
+
+
+class DocumentMapping(BaseModel):
+    sections: list[SectionMapping]
+    rollup: list[DocumentControl] = Field(
+        description="Controls across all sections, best confidence first."
+    )
+
+
 class ScopeRecommendation(BaseModel):
     recommended_domains: list[str] = Field(
         description="List of major SCF Domains relevant to the audit scope."
@@ -66,42 +149,188 @@ class ScopeRecommendation(BaseModel):
     )
 
 
-@st.cache_resource(show_spinner="Loading SCF database...")
-def load_scf_database():
-    """Loads the parsed JSON database of the SCF framework. Cached across Streamlit reruns."""
-    if not os.path.exists(PARSED_JSON_FILE):
-        logger.warning("SCF Database not found. Please run fetch_scf.py first.")
+def load_scf_database() -> SCFRepository | list:
+    """
+    Returns the shared SCFRepository (a sequence of controls with precomputed
+    lookup indexes). Cached once per process and reloaded only when the SCF data
+    on disk changes. Returns [] when the database has not been fetched yet.
+    """
+    repository = get_scf_repository()
+    if repository is None:
+        logger.warning(
+            "SCF Database not found. Please run `python -m src.fetch_scf` first."
+        )
         return []
-    with open(PARSED_JSON_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return repository
 
 
-@st.cache_resource(show_spinner="Building semantic search index...")
-def _get_embedding_model() -> SentenceTransformer:
-    """Load the sentence-transformers model. Cached so it is only downloaded once."""
-    return SentenceTransformer(_EMBEDDING_MODEL_NAME)
+_embedding_model: "SentenceTransformer | None" = None
+_embedding_model_lock = threading.Lock()
 
 
-def _build_or_load_embeddings(scf_data: list[dict]) -> np.ndarray:
+def _get_embedding_model() -> "SentenceTransformer":
     """
-    Build (or load from disk cache) embeddings for all SCF control descriptions.
+    Load the sentence-transformers model once per process.
 
-    Embeddings are persisted to EMBEDDINGS_CACHE_FILE so they are computed
-    only once per SCF release, not on every Streamlit rerun.
+    A plain process-wide singleton rather than st.cache_resource, so the mapper
+    runs the same under Streamlit, the CLI and tests. sentence_transformers
+    (and torch) are imported here, on first use, not at module import.
     """
-    if os.path.exists(EMBEDDINGS_CACHE_FILE):
-        logger.info("Loading cached SCF embeddings from %s", EMBEDDINGS_CACHE_FILE)
-        return np.load(EMBEDDINGS_CACHE_FILE)
+    global _embedding_model
+    with _embedding_model_lock:
+        if _embedding_model is None:
+            from sentence_transformers import SentenceTransformer
 
-    logger.info(
-        "Building SCF embeddings for %d controls (one-time cost)...", len(scf_data)
-    )
+            _embedding_model = SentenceTransformer(_EMBEDDING_MODEL_NAME)
+        return _embedding_model
+
+
+def _encode_texts(texts: list[str]) -> np.ndarray:
+    """Embed a list of texts with the shared sentence-transformers model."""
     model = _get_embedding_model()
-    texts = [f"{c['control_id']} {c['domain']}: {c['description']}" for c in scf_data]
-    embeddings = model.encode(texts, show_progress_bar=False, convert_to_numpy=True)
-    np.save(EMBEDDINGS_CACHE_FILE, embeddings)
-    logger.info("Saved embeddings cache to %s", EMBEDDINGS_CACHE_FILE)
-    return embeddings
+    return model.encode(texts, show_progress_bar=False, convert_to_numpy=True)
+
+
+def _build_or_load_embeddings(scf_data: list[dict]) -> np.ndarray:
+    """
+    Return the L2-normalized embeddings for all SCF control descriptions.
+
+    Backed by the versioned embedding store: the matrix is rebuilt (incrementally)
+    only when the parsed controls or the model change, memory-mapped from
+    EMBEDDINGS_CACHE_FILE and kept in a process-wide cache between calls.
+    """
+    return load_embeddings(scf_data, _EMBEDDING_MODEL_NAME, _encode_texts)
+
+
+_vector_index: VectorIndex | None = None
+_vector_index_lock = threading.Lock()
+
+
+def _get_vector_index(scf_data: list[dict]) -> VectorIndex:
+    """
+    Return the process-wide search index for the current SCF embeddings.
+
+    Exact NumPy search by default; SCF_INDEX_BACKEND selects an HNSW graph
+    (hnswlib or faiss-cpu), persisted next to the embeddings store.
+    """
+    global _vector_index
+    corpus_embeddings = _build_or_load_embeddings(scf_data)
+    with _vector_index_lock:
+        if _vector_index is None or _vector_index.source is not corpus_embeddings:
+            # The embedding store already persists L2-normalized rows
+            _vector_index = load_or_build_index(
+                corpus_embeddings, matrix_version(corpus_embeddings)
+            )
+        return _vector_index
+
+
+_warmup_threads: dict[str, threading.Thread] = {}
+_warmup_lock = threading.Lock()
+
+
+def _warm_up(mode: str) -> None:
+    try:
+        _get_embedding_model()
+        scf_data = load_scf_database()
+        if scf_data:
+            _get_vector_index(scf_data)
+            _get_lexical_index(scf_data)
+        if mode != "llm":
+            get_reranker()
+        logger.info("Mapping models warmed up (mode=%s)", mode)
+    except (ImportError, OSError, RuntimeError, ValueError) as e:
+        # The first mapping call loads (and reports) whatever failed here
+        logger.warning("Background model warm-up failed: %s", e)
+
+
+def start_warmup(mode: str = "llm") -> threading.Thread:
+    """
+    Load the embedding model and SCF vector index (plus the reranker unless
+    `mode` is "llm") on a daemon thread, e.g. while the user is still typing.
+
+    Idempotent per mode; the loaders are lock-guarded singletons, so a mapping
+    call that starts mid warm-up simply waits for the same model.
+    """
+    validate_mode(mode)
+    with _warmup_lock:
+        thread = _warmup_threads.get(mode)
+        if thread is None:
+            thread = threading.Thread(
+                target=_warm_up, args=(mode,), name=f"warmup-{mode}", daemon=True
+            )
+            _warmup_threads[mode] = thread
+            thread.start()
+        return thread
+
+
+def _get_lexical_index(scf_data: list[dict]) -> BM25Index | None:
+    """The repository's BM25 index, or None for embeddings-only retrieval."""
+    if not HYBRID_RETRIEVAL or not isinstance(scf_data, SCFRepository):
+        return None
+    return scf_data.bm25
+
+
+def _semantic_search_batch(
+    input_texts: Sequence[str], scf_data: list[dict], top_k: int = 50
+) -> tuple[list[list[int]], np.ndarray]:
+    """
+    Return, for each input text, the indices of its top_k most similar SCF
+    controls and their cosine similarities, best first.
+
+    All queries are embedded in a single vectorized encode call and scored against
+    the corpus with one matrix operation, so a batch upload costs one retrieval pass.
+    With hybrid retrieval, each query's embedding top_k and BM25 top_k are merged
+    by reciprocal rank fusion. The fused ranking only sets the order: every
+    candidate keeps its cosine similarity as its score, so downstream
+    similarity cuts behave as with embeddings alone.
+    """
+    if not input_texts:
+        return [], np.empty((0, 0), dtype=np.float32)
+
+    index = _get_vector_index(scf_data)
+    query_embeddings = _encode_texts(list(input_texts))
+    top_indices, top_scores = index.search(query_embeddings, top_k)
+
+    lexical = _get_lexical_index(scf_data)
+    if lexical is not None and top_indices.shape[1]:
+        fused = [
+            reciprocal_rank_fusion([dense, lexical_indices], top_k)
+            for dense, (lexical_indices, _) in zip(
+                top_indices, lexical.search(input_texts, top_k)
+            )
+        ]
+        top_indices = np.stack([indices for indices, _ in fused])
+        top_scores = index.similarities(query_embeddings, top_indices)
+
+    if top_indices.shape[1]:
+        logger.info(
+            "Semantic filter: top-%d controls retrieved for %d inputs (best similarity=%.3f)",
+            top_indices.shape[1],
+            len(input_texts),
+            float(top_scores[0].max()),
+        )
+    return top_indices.tolist(), top_scores
+
+
+def _semantic_candidates_batch(
+    input_texts: Sequence[str], scf_data: list[dict], top_k: int = 50
+) -> list[tuple[list[dict], np.ndarray]]:
+    """Per input text: its top_k SCF controls (best first) and their similarities."""
+    indices, scores = _semantic_search_batch(input_texts, scf_data, top_k)
+    return [
+        ([scf_data[i] for i in row], row_scores)
+        for row, row_scores in zip(indices, scores)
+    ]
+
+
+def _semantic_filter_batch(
+    input_texts: Sequence[str], scf_data: list[dict], top_k: int = 50
+) -> list[list[dict]]:
+    """Batched _semantic_filter: one list of top_k SCF controls per input text."""
+    return [
+        controls
+        for controls, _ in _semantic_candidates_batch(input_texts, scf_data, top_k)
+    ]
 
 
 def _semantic_filter(
@@ -113,20 +342,39 @@ def _semantic_filter(
     Uses sentence-transformers (all-MiniLM-L6-v2) + cosine similarity instead of
     naive keyword matching — correctly handles synonyms like 'encryption'/'cryptography'.
     """
-    model = _get_embedding_model()
-    corpus_embeddings = _build_or_load_embeddings(scf_data)
+    return _semantic_filter_batch([input_text], scf_data, top_k)[0]
 
-    query_embedding = model.encode([input_text], convert_to_numpy=True)
-    similarities = cosine_similarity(query_embedding, corpus_embeddings)[0]
 
-    top_indices = np.argsort(similarities)[::-1][:top_k]
-    results = [scf_data[i] for i in top_indices]
-    logger.info(
-        "Semantic filter: top-%d controls retrieved (best similarity=%.3f)",
-        top_k,
-        float(similarities[top_indices[0]]),
-    )
-    return results
+def match_control_names_to_scf(
+    names: Sequence[str], chunk_size: int = 4096
+) -> tuple[list[str | None], np.ndarray]:
+    """
+    Nearest SCF control for each free-text control name (e.g. a customer's
+    "Data Encryption at Rest"), by embedding similarity.
+
+    Duplicate names are embedded once and all queries are scored in chunks of
+    `chunk_size` against the shared VectorIndex, so a 100k-row inventory costs
+    one batched encode rather than one retrieval per row. Returns
+    (control_ids, scores) aligned with `names`; thresholding is up to the caller.
+    """
+    scf_data = load_scf_database()
+    if not scf_data or not names:
+        return [None] * len(names), np.zeros(len(names), dtype=np.float32)
+
+    unique = list(dict.fromkeys(str(n) for n in names))
+    index = _get_vector_index(scf_data)
+    best = np.empty(len(unique), dtype=np.intp)
+    best_scores = np.empty(len(unique), dtype=np.float32)
+    for start in range(0, len(unique), chunk_size):
+        query = _encode_texts(unique[start : start + chunk_size])
+        indices, scores = index.search(query, 1)
+        best[start : start + len(query)] = indices[:, 0]
+        best_scores[start : start + len(query)] = scores[:, 0]
+
+    position = {name: i for i, name in enumerate(unique)}
+    rows = np.fromiter((position[str(n)] for n in names), dtype=np.intp)
+    ids = [scf_data[i]["control_id"] for i in best[rows]]
+    return ids, best_scores[rows]
 
 
 def _validate_mapping_result(
@@ -146,7 +394,8 @@ def _validate_mapping_result(
                 m.control_id,
             )
             continue
-        m.confidence = max(0, min(100, m.confidence))
+        if m.confidence is not None:
+            m.confidence = max(0, min(100, m.confidence))
         valid_mappings.append(m)
 
     result.mappings = valid_mappings
@@ -172,27 +421,43 @@ def construct_scf_context(scf_data):
 @retry(
     wait=wait_exponential(multiplier=1, min=2, max=60),
     stop=stop_after_attempt(3),
-    retry=retry_if_exception_type(Exception),
+    retry=retry_if_exception(is_transient_error),
     reraise=True,
 )
-def _invoke_chain(chain, inputs: dict):
-    """Invoke a LangChain chain with exponential backoff retry for transient errors."""
-    return chain.invoke(inputs)
+def _invoke_chain(chain, inputs: dict, priority: int = PRIORITY_INTERACTIVE):
+    """
+    Invoke a LangChain chain through the shared Groq rate-limit scheduler.
+
+    The request waits for RPM/TPM budget (estimated from its inputs) in
+    priority order; only transient failures (429, timeouts, 5xx) are retried,
+    and a 429 pauses all requests for the server's retry-after.
+    """
+    tokens = (
+        estimate_tokens("".join(str(v) for v in inputs.values()))
+        + RESPONSE_TOKEN_ALLOWANCE
+    )
+    with get_rate_limiter().slot(tokens, priority):
+        return chain.invoke(inputs)
 
 
-def map_text_to_scf(input_text: str, top_k: int = 3, persona_prompt: str = None):
+def _groq_llm() -> "ChatGroq":
     """
-    Takes an input string (policy snippet or JSON dump) and asks the LLM
-    to map it to the top_k most relevant SCF controls.
+    ChatGroq whose responses feed the shared rate-limit scheduler. Retries are
+    owned by _invoke_chain and the scheduler, so the client does not retry.
     """
-    scf_data = load_scf_database()
-    if not scf_data:
-        return None
+    from langchain_groq import ChatGroq
 
-    llm = ChatGroq(
-        temperature=0, model_name=os.environ.get("GROQ_MODEL", "llama-3.1-8b-instant")
+    return ChatGroq(
+        temperature=0,
+        model_name=os.environ.get("GROQ_MODEL", "llama-3.1-8b-instant"),
+        max_retries=0,
+        http_client=get_http_client(),
     )
-    structured_llm = llm.with_structured_output(MappingResult)
+
+
+def _build_mapping_prompt(persona_prompt: str | None = None) -> "ChatPromptTemplate":
+    """Build the SCF mapping prompt for the given auditor persona."""
+    from langchain_core.prompts import ChatPromptTemplate
 
     base_persona = "You are an expert IT Auditor and GRC Engineer."
     if persona_prompt:
@@ -211,25 +476,96 @@ def map_text_to_scf(input_text: str, top_k: int = 3, persona_prompt: str = None)
         ]
     )
 
-    chain = prompt | structured_llm
+    return prompt
 
-    logger.info("Sending mapping request to Groq (Llama-3)...")
 
-    # Semantic RAG filter: embed + cosine similarity instead of naive keyword matching
-    filtered_scf = _semantic_filter(input_text, scf_data, top_k=50)
+def _build_mapping_chain(persona_prompt: str | None = None):
+    """Build the prompt | structured-LLM chain used for SCF mapping."""
+    llm = _groq_llm()
+    structured_llm = llm.with_structured_output(MappingResult)
 
-    context_str = construct_scf_context(filtered_scf)
-    logger.info(
-        "Semantic filter selected %d controls for LLM context.", len(filtered_scf)
+    return _build_mapping_prompt(persona_prompt) | structured_llm
+
+
+def _invoke_mapping_chain_cached(
+    chain,
+    inputs: dict,
+    persona_prompt: str | None,
+    scf_version: str,
+    priority: int = PRIORITY_INTERACTIVE,
+    schema: type[BaseModel] = MappingResult,
+) -> BaseModel:
+    """
+    _invoke_chain behind the persistent LLM response cache.
+
+    The key covers the rendered prompt, GROQ_MODEL, top_k, persona and SCF data
+    version. Cached responses are stored before validation, so callers always
+    re-run _validate_mapping_result against the current SCF dict. `schema` is
+    the chain's structured-output model.
+    """
+    cache = get_response_cache()
+    if cache is None:
+        return _invoke_chain(chain, inputs, priority)
+
+    key = make_cache_key(
+        chain.first.format(**inputs),
+        os.environ.get("GROQ_MODEL", "llama-3.1-8b-instant"),
+        inputs["top_k"],
+        persona_prompt or "",
+        scf_version,
     )
+    cached = cache.get(key)
+    if cached is not None:
+        try:
+            return schema.model_validate_json(cached)
+        except ValidationError as e:
+            logger.warning("Discarding unreadable cached LLM response: %s", e)
 
-    response = _invoke_chain(
-        chain, {"scf_context": context_str, "input_text": input_text, "top_k": top_k}
+    response = _invoke_chain(chain, inputs, priority)
+    cache.set(key, response.model_dump_json())
+    return response
+
+
+def _map_with_chain(
+    chain,
+    input_text: str,
+    filtered_scf: list[dict],
+    scf_dict: dict[str, dict],
+    top_k: int,
+    persona_prompt: str | None = None,
+    scf_version: str = "",
+    similarities: Sequence[float] | None = None,
+    priority: int = PRIORITY_INTERACTIVE,
+) -> MappingResult:
+    """
+    Run the LLM call, validation and enrichment for a single pre-filtered input.
+
+    The SCF context is token-budgeted for GROQ_MODEL: given the retrieval
+    `similarities`, candidates past the similarity elbow are dropped as well.
+    """
+    logger.info("Sending mapping request to Groq (Llama-3)...")
+
+    context_str, _ = build_context(
+        filtered_scf,
+        similarities,
+        context_token_budget(os.environ.get("GROQ_MODEL", "llama-3.1-8b-instant")),
     )
 
-    # Build lookup dict for validation and regulation enrichment
-    scf_dict = {c["control_id"]: c for c in scf_data}
+    response = _invoke_mapping_chain_cached(
+        chain,
+        {"scf_context": context_str, "input_text": input_text, "top_k": top_k},
+        persona_prompt,
+        scf_version,
+        priority,
+    )
+
+    return _finalize_mapping(response, scf_dict)
 
+
+def _finalize_mapping(
+    response: MappingResult, scf_dict: dict[str, dict]
+) -> MappingResult:
+    """Validate an LLM mapping and enrich it from the SCF database."""
     # Post-LLM validation: drop hallucinated IDs, clamp confidence
     response = _validate_mapping_result(response, scf_dict)
 
@@ -241,28 +577,601 @@ def map_text_to_scf(input_text: str, top_k: int = 3, persona_prompt: str = None)
     return response
 
 
+def _build_packed_mapping_chain(persona_prompt: str | None = None):
+    """Prompt | structured-LLM chain mapping several inputs in one request."""
+    from langchain_core.prompts import ChatPromptTemplate
+
+    base_persona = "You are an expert IT Auditor and GRC Engineer."
+    if persona_prompt:
+        base_persona = f"{base_persona} {persona_prompt}"
+
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            (
+                "system",
+                f"{base_persona} Your task is to map each of the user's inputs (policy snippets or cloud security findings) to the most relevant controls from the Secure Controls Framework (SCF). Map every input independently.\n\nHere is the SCF database:\n{{scf_context}}",
+            ),
+            (
+                "user",
+                "Please map each of the following {n_inputs} inputs to its top {top_k} most relevant SCF controls. Return exactly one result per input, with input_id set to the INPUT number.\n\n{inputs}",
+            ),
+        ]
+    )
+    llm = _groq_llm()
+    return prompt | llm.with_structured_output(PackedMappingResult)
+
+
+def _pack_inputs(
+    indices: Sequence[int],
+    candidates: Sequence[tuple[list[dict], Sequence[float]]],
+    pack_size: int,
+    min_overlap: float = PACK_MIN_OVERLAP,
+    overlap_depth: int = PACK_OVERLAP_DEPTH,
+) -> list[list[int]]:
+    """
+    Greedily group inputs whose retrieved candidates overlap.
+
+    Each pack starts from the first unpacked input; further inputs join while
+    the pack has room and the Jaccard overlap of their top `overlap_depth`
+    candidate IDs with the pack's union is at least `min_overlap`, so the
+    packed prompt can share one SCF context.
+    """
+    top_ids = {
+        idx: {c["control_id"] for c in candidates[idx][0][:overlap_depth]}
+        for idx in indices
+    }
+    remaining = list(indices)
+    packs = []
+    while remaining:
+        seed = remaining.pop(0)
+        pack = [seed]
+        union = set(top_ids[seed])
+        for idx in list(remaining):
+            if len(pack) >= pack_size:
+                break
+            ids = top_ids[idx]
+            if ids and len(ids & union) / len(ids | union) >= min_overlap:
+                pack.append(idx)
+                union |= ids
+                remaining.remove(idx)
+        packs.append(pack)
+    return packs
+
+
+def _map_pack_with_chain(
+    chain,
+    single_chain,
+    texts: Sequence[str],
+    candidates: Sequence[tuple[list[dict], Sequence[float]]],
+    scf_dict: dict[str, dict],
+    top_k: int,
+    persona_prompt: str | None = None,
+    scf_version: str = "",
+    priority: int = PRIORITY_BATCH,
+) -> list[MappingResult]:
+    """
+    Map several inputs with one LLM call over their shared SCF context.
+
+    The context is the union of the inputs' candidates ordered by best
+    similarity, token-budgeted like a single prompt (with some headroom per
+    extra input). Every per-input result goes through _validate_mapping_result;
+    an input the model left out is mapped on its own with `single_chain`.
+    """
+    best: dict[str, tuple[dict, float]] = {}
+    for controls, similarities in candidates:
+        for control, score in zip(controls, similarities):
+            cid = control["control_id"]
+            if cid not in best or score > best[cid][1]:
+                best[cid] = (control, float(score))
+    union = sorted(best.values(), key=lambda item: -item[1])
+
+    budget = context_token_budget(os.environ.get("GROQ_MODEL", "llama-3.1-8b-instant"))
+    context_str, _ = build_context(
+        [control for control, _ in union],
+        [score for _, score in union],
+        int(budget * (1 + PACK_BUDGET_GROWTH * (len(texts) - 1))),
+    )
+    inputs_str = "\n\n".join(f"INPUT {n}:\n{text}" for n, text in enumerate(texts, 1))
+    logger.info("Sending packed mapping request for %d inputs to Groq...", len(texts))
+    response = _invoke_mapping_chain_cached(
+        chain,
+        {
+            "scf_context": context_str,
+            "inputs": inputs_str,
+            "n_inputs": len(texts),
+            "top_k": top_k,
+        },
+        persona_prompt,
+        scf_version,
+        priority,
+        schema=PackedMappingResult,
+    )
+
+    by_input = {item.input_id: item for item in response.results}
+    results = []
+    for n, (text, (controls, similarities)) in enumerate(zip(texts, candidates), 1):
+        item = by_input.get(n)
+        if item is None:
+            logger.warning("Packed response omitted input %d; mapping it alone.", n)
+            results.append(
+                _map_with_chain(
+                    single_chain,
+                    text,
+                    controls,
+                    scf_dict,
+                    top_k,
+                    persona_prompt=persona_prompt,
+                    scf_version=scf_version,
+                    similarities=similarities,
+                    priority=priority,
+                )
+            )
+            continue
+        results.append(
+            _finalize_mapping(MappingResult(mappings=item.mappings), scf_dict)
+        )
+    return results
+
+
+def _rerank_batch(
+    texts: Sequence[str], filtered_batch: Sequence[list[dict]]
+) -> list[tuple[list[dict], np.ndarray]]:
+    """Second-stage rerank of each input's best RERANK_CANDIDATES retrieved controls."""
+    return get_reranker().rerank_batch(
+        texts, [filtered[:RERANK_CANDIDATES] for filtered in filtered_batch]
+    )
+
+
+def _is_confident(scores: np.ndarray, mode: str) -> bool:
+    """Whether a reranked input can skip the LLM in the given mode."""
+    return mode == "fast" or (
+        mode == "hybrid" and score_margin(scores) >= HYBRID_MARGIN_THRESHOLD
+    )
+
+
+def _local_mapping(
+    controls: list[dict], scores: np.ndarray, top_k: int
+) -> MappingResult:
+    """
+    Build a MappingResult straight from reranker output, without the LLM.
+    The mappings carry no confidence; the justification quotes the score.
+    """
+    mappings = []
+    for control, score in zip(controls[:top_k], scores[:top_k]):
+        mappings.append(
+            MappedControl(
+                control_id=control["control_id"],
+                domain=control["domain"],
+                confidence=None,
+                justification=(
+                    f"Ranked #{len(mappings) + 1} by the local reranker "
+                    f"(cross-encoder score {float(score):.2f}); LLM not consulted."
+                ),
+                description=control["description"],
+                regulations=control.get("regulations", {}),
+            )
+        )
+    return MappingResult(mappings=mappings)
+
+
+def map_text_to_scf(
+    input_text: str, top_k: int = 3, persona_prompt: str = None, mode: str = "llm"
+):
+    """
+    Takes an input string (policy snippet or JSON dump) and asks the LLM
+    to map it to the top_k most relevant SCF controls.
+
+    mode="fast" answers from the local cross-encoder reranker only; "hybrid"
+    does the same unless the reranker's margin is below HYBRID_MARGIN_THRESHOLD,
+    in which case the LLM decides; "llm" always asks the LLM.
+    """
+    mode = validate_mode(mode)
+    scf_data = load_scf_database()
+    if not scf_data:
+        return None
+
+    # Lookup dict for validation and regulation enrichment
+    scf_dict = scf_data.by_id
+
+    # Semantic RAG filter: embed + cosine similarity instead of naive keyword matching
+    filtered_scf, similarities = _semantic_candidates_batch(
+        [input_text], scf_data, top_k=CONTEXT_MAX_CANDIDATES
+    )[0]
+
+    if mode != "llm":
+        ranked, scores = _rerank_batch([input_text], [filtered_scf])[0]
+        if _is_confident(scores, mode):
+            return _local_mapping(ranked, scores, top_k)
+
+    chain = _build_mapping_chain(persona_prompt)
+
+    return _map_with_chain(
+        chain,
+        input_text,
+        filtered_scf,
+        scf_dict,
+        top_k,
+        persona_prompt=persona_prompt,
+        scf_version=scf_data.version,
+        similarities=similarities,
+    )
+
+
+def map_batch_to_scf(
+    texts: Sequence[str],
+    top_k: int = 3,
+    persona_prompt: str | None = None,
+    concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    progress_callback: Callable[[int, int], None] | None = None,
+    mode: str = "llm",
+    pack_size: int = DEFAULT_PACK_SIZE,
+) -> list[MappingResult | Exception | None]:
+    """
+    Map many inputs (e.g. a Security Hub "Findings" array) to SCF controls concurrently.
+
+    Up to `concurrency` LLM requests are in flight at once. Each request keeps the
+    same retry and hallucination-guard behaviour as map_text_to_scf. Results are
+    returned in input order; an input whose mapping failed holds the raised
+    exception instead of a MappingResult, so one bad finding never aborts the batch.
+
+    With mode="fast" or "hybrid" the whole batch is reranked locally in one pass
+    first and only the inputs the reranker is unsure about (none, in fast mode)
+    are sent to the LLM; see map_text_to_scf.
+
+    With pack_size > 1, inputs whose retrieved candidates overlap are packed up
+    to pack_size per LLM request over one shared SCF context (see _pack_inputs),
+    and the per-input results are validated individually.
+
+    progress_callback(completed, total) is invoked from the calling thread after
+    each input finishes, so it is safe to drive Streamlit widgets from it.
+    """
+    mode = validate_mode(mode)
+    if not texts:
+        return []
+
+    scf_data = load_scf_database()
+    if not scf_data:
+        return [None] * len(texts)
+
+    # Retrieval for the whole upload runs once, in the calling thread, as a
+    # single batched encode + matrix multiply; workers only make LLM calls.
+    candidates = _semantic_candidates_batch(
+        texts, scf_data, top_k=CONTEXT_MAX_CANDIDATES
+    )
+    return _map_candidates(
+        texts,
+        candidates,
+        scf_data,
+        top_k,
+        persona_prompt=persona_prompt,
+        concurrency=concurrency,
+        progress_callback=progress_callback,
+        mode=mode,
+        pack_size=pack_size,
+    )
+
+
+def _map_candidates(
+    texts: Sequence[str],
+    candidates: list[tuple[list[dict], np.ndarray]],
+    scf_data: SCFRepository,
+    top_k: int,
+    persona_prompt: str | None = None,
+    concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    progress_callback: Callable[[int, int], None] | None = None,
+    mode: str = "llm",
+    pack_size: int = DEFAULT_PACK_SIZE,
+) -> list[MappingResult | Exception | None]:
+    """
+    map_batch_to_scf after retrieval: rerank and/or map each input's retrieved
+    (controls, similarities) concurrently, results in input order.
+    """
+    filtered_batch = [controls for controls, _ in candidates]
+
+    total = len(texts)
+    results: list[MappingResult | Exception | None] = [None] * total
+    completed = 0
+    pending = list(range(total))
+
+    if mode != "llm":
+        pending = []
+        for idx, (ranked, scores) in enumerate(_rerank_batch(texts, filtered_batch)):
+            if _is_confident(scores, mode):
+                results[idx] = _local_mapping(ranked, scores, top_k)
+                completed += 1
+            else:
+                pending.append(idx)
+        logger.info(
+            "Reranker (%s mode) resolved %d of %d inputs without the LLM.",
+            mode,
+            completed,
+            total,
+        )
+        if progress_callback and completed:
+            progress_callback(completed, total)
+        if not pending:
+            return results
+
+    chain = _build_mapping_chain(persona_prompt)
+    scf_dict = scf_data.by_id
+    scf_version = scf_data.version
+
+    packs = (
+        _pack_inputs(pending, candidates, pack_size)
+        if pack_size > 1
+        else [[idx] for idx in pending]
+    )
+    if pack_size > 1:
+        logger.info("Packed %d inputs into %d LLM requests.", len(pending), len(packs))
+        packed_chain = _build_packed_mapping_chain(persona_prompt)
+
+    def map_pack(pack: list[int]) -> list[MappingResult]:
+        if len(pack) == 1:
+            idx = pack[0]
+            return [
+                _map_with_chain(
+                    chain,
+                    texts[idx],
+                    filtered_batch[idx],
+                    scf_dict,
+                    top_k,
+                    persona_prompt=persona_prompt,
+                    scf_version=scf_version,
+                    similarities=candidates[idx][1],
+                    priority=PRIORITY_BATCH,
+                )
+            ]
+        return _map_pack_with_chain(
+            packed_chain,
+            chain,
+            [texts[idx] for idx in pack],
+            [candidates[idx] for idx in pack],
+            scf_dict,
+            top_k,
+            persona_prompt=persona_prompt,
+            scf_version=scf_version,
+            priority=PRIORITY_BATCH,
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {executor.submit(map_pack, pack): pack for pack in packs}
+        for future in as_completed(futures):
+            pack = futures[future]
+            try:
+                pack_results = future.result()
+            except Exception as e:
+                # Failures are captured per input, so one bad pack does not
+                # sink the batch; logged with its traceback
+                logger.exception(
+                    "Error mapping input(s) %s",
+                    ", ".join(f"#{idx + 1}" for idx in pack),
+                )
+                pack_results = [e] * len(pack)
+            for idx, result in zip(pack, pack_results):
+                results[idx] = result
+                completed += 1
+                if progress_callback:
+                    progress_callback(completed, total)
+
+    cache = get_response_cache()
+    if cache is not None:
+        logger.info(
+            "LLM response cache: %(hits)d hits, %(misses)d misses, %(entries)d entries",
+            cache.stats(),
+        )
+    return results
+
+
+def _aggregate_candidates(
+    chunk_candidates: Sequence[tuple[list[dict], np.ndarray]],
+    weight: float = CHUNK_SUPPORT_WEIGHT,
+    top_k: int = CONTEXT_MAX_CANDIDATES,
+) -> tuple[list[dict], np.ndarray]:
+    """
+    Merge the retrieved candidates of a section's chunks, best first.
+
+    A control scores (1 - weight) x its best chunk similarity + weight x its
+    mean similarity over all chunks (0 where a chunk did not retrieve it), so
+    controls the whole section is about outrank one-sentence matches.
+    """
+    best: dict[str, float] = {}
+    total: dict[str, float] = {}
+    controls: dict[str, dict] = {}
+    for chunk_controls, scores in chunk_candidates:
+        for control, score in zip(chunk_controls, np.asarray(scores).tolist()):
+            control_id = control["control_id"]
+            controls[control_id] = control
+            best[control_id] = max(best.get(control_id, score), score)
+            total[control_id] = total.get(control_id, 0.0) + score
+    n_chunks = max(len(chunk_candidates), 1)
+    merged = {
+        control_id: (1 - weight) * best[control_id]
+        + weight * total[control_id] / n_chunks
+        for control_id in controls
+    }
+    ranked = sorted(merged, key=merged.get, reverse=True)[:top_k]
+    return (
+        [controls[control_id] for control_id in ranked],
+        np.array([merged[control_id] for control_id in ranked], dtype=np.float32),
+    )
+
+
+def _confidence_key(mapping: MappedControl) -> int:
+    """Sort key: unrated (reranker-only) mappings rank below any LLM confidence."""
+    return -1 if mapping.confidence is None else mapping.confidence
+
+
+def _rollup_sections(sections: Sequence[SectionMapping]) -> list[DocumentControl]:
+    """One entry per mapped control, with its best confidence and its sections."""
+    rollup: dict[str, DocumentControl] = {}
+    for section in sections:
+        if section.mapping is None:
+            continue
+        for mapping in section.mapping.mappings:
+            control = rollup.get(mapping.control_id)
+            if control is None:
+                rollup[mapping.control_id] = DocumentControl(
+                    **mapping.model_dump(), sections=[section.index]
+                )
+                continue
+            control.sections.append(section.index)
+            if _confidence_key(mapping) > _confidence_key(control):
+                control.confidence = mapping.confidence
+                control.justification = mapping.justification
+    return sorted(
+        rollup.values(),
+        key=lambda c: (-_confidence_key(c), -len(c.sections), c.control_id),
+    )
+
+
+def map_document_to_scf(
+    text: str,
+    top_k: int = 3,
+    persona_prompt: str | None = None,
+    mode: str = "llm",
+    concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    progress_callback: Callable[[int, int], None] | None = None,
+) -> DocumentMapping | None:
+    """
+    Map a long policy document section by section, plus a document-level rollup.
+
+    The document is split by headings and paragraphs (see split_document); all
+    overlapping chunks are embedded in one batch and retrieved separately, since
+    the embedding model truncates long inputs. Each section's chunk candidates
+    are merged (_aggregate_candidates) and the sections are mapped concurrently
+    like a map_batch_to_scf batch, one bounded LLM prompt per section.
+    Returns None when the SCF database is missing.
+    """
+    mode = validate_mode(mode)
+    scf_data = load_scf_database()
+    if not scf_data:
+        return None
+
+    sections = split_document(text)
+    chunks = [chunk for section in sections for chunk in section.chunks]
+    chunk_candidates: list[list] = [[] for _ in sections]
+    for chunk, candidates in zip(
+        chunks,
+        _semantic_candidates_batch(
+            [chunk.text for chunk in chunks], scf_data, top_k=CONTEXT_MAX_CANDIDATES
+        ),
+    ):
+        chunk_candidates[chunk.section].append(candidates)
+    logger.info(
+        "Document split into %d sections / %d retrieval chunks.",
+        len(sections),
+        len(chunks),
+    )
+
+    section_texts = [
+        f"{section.heading}\n{section.text}" if section.heading else section.text
+        for section in sections
+    ]
+    results = _map_candidates(
+        section_texts,
+        [_aggregate_candidates(candidates) for candidates in chunk_candidates],
+        scf_data,
+        top_k,
+        persona_prompt=persona_prompt,
+        concurrency=concurrency,
+        progress_callback=progress_callback,
+        mode=mode,
+        pack_size=1,
+    )
+
+    section_mappings = [
+        SectionMapping(
+            index=section.index,
+            heading=section.heading,
+            text=section.text,
+            mapping=result if isinstance(result, MappingResult) else None,
+            error=str(result) if isinstance(result, Exception) else None,
+        )
+        for section, result in zip(sections, results)
+    ]
+    return DocumentMapping(
+        sections=section_mappings, rollup=_rollup_sections(section_mappings)
+    )
+
+
+def map_findings_to_scf(
+    findings: list,
+    top_k: int = 3,
+    persona_prompt: str | None = None,
+    concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    progress_callback: Callable[[int, int], None] | None = None,
+    mode: str = "llm",
+    pack_size: int = DEFAULT_PACK_SIZE,
+) -> list[MappingResult | Exception | None]:
+    """
+    Map a Security Hub "Findings" array, de-duplicating findings first.
+
+    Findings that differ only in resource IDs, timestamps or account numbers are
+    grouped (GeneratorId / Compliance / Title) and each unique group is mapped
+    once. The group's result is fanned back out, so the returned list still has
+    one entry per input finding, in input order. progress_callback reports
+    progress over the unique groups.
+    """
+    texts, assignment = group_findings(findings)
+    if texts:
+        logger.info(
+            "Finding de-duplication: %d findings -> %d unique groups.",
+            len(findings),
+            len(texts),
+        )
+    group_results = map_batch_to_scf(
+        texts,
+        top_k=top_k,
+        persona_prompt=persona_prompt,
+        concurrency=concurrency,
+        progress_callback=progress_callback,
+        mode=mode,
+        pack_size=pack_size,
+    )
+    return [group_results[g] for g in assignment]
+
+
+def map_items(
+    items: list,
+    top_k: int,
+    concurrency: int,
+    mode: str = "llm",
+    pack_size: int = DEFAULT_PACK_SIZE,
+    persona_prompt: str | None = None,
+) -> list:
+    """Map one chunk: findings are de-duplicated, plain texts are mapped as-is."""
+    map_fn = (
+        map_batch_to_scf
+        if all(isinstance(item, str) for item in items)
+        else map_findings_to_scf
+    )
+    return map_fn(
+        items,
+        top_k=top_k,
+        persona_prompt=persona_prompt,
+        concurrency=concurrency,
+        mode=mode,
+        pack_size=pack_size,
+    )
+
+
 def analyze_audit_scope(scope_text: str):
     """
     Takes an audit scope document/text and asks the LLM to recommend relevant SCF Domains and Controls to test.
     """
+    from langchain_core.prompts import ChatPromptTemplate
+
     scf_data = load_scf_database()
     if not scf_data:
         return None
 
-    llm = ChatGroq(
-        temperature=0, model_name=os.environ.get("GROQ_MODEL", "llama-3.1-8b-instant")
-    )
+    llm = _groq_llm()
     structured_llm = llm.with_structured_output(ScopeRecommendation)
 
     # Compress context to bypass strict Groq rate limits.
     # Instead of passing 1,451 IDs, we just pass the Domain and its specific ID Prefix.
-    domain_prefixes = {}
-    for c in scf_data:
-        prefix = c["control_id"].split("-")[0]
-        domain_prefixes[c["domain"]] = prefix
-
     context_lines = []
-    for dom, prefix in domain_prefixes.items():
+    for dom, prefix in scf_data.domain_prefixes.items():
         context_lines.append(f"{dom} (Prefix: {prefix}-)")
 
     domain_context = (
@@ -301,7 +1210,7 @@ if __name__ == "__main__":
             logger.info("Mapping Results:")
             for mapping in result.mappings:
                 logger.info(
-                    " - %s (%s) [Confidence: %d%%]",
+                    " - %s (%s) [Confidence: %s%%]",
                     mapping.control_id,
                     mapping.domain,
                     mapping.confidence,
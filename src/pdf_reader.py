@@ -0,0 +1,162 @@
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+PDF_CACHE_DIR = os.environ.get("SCF_PDF_CACHE_DIR", os.path.join(DATA_DIR, "pdf_cache"))
+
+# Set SCF_PDF_CACHE=0 to always re-extract uploaded PDFs
+PDF_CACHE_ENABLED = os.environ.get("SCF_PDF_CACHE", "1") != "0"
+# Worker processes extracting pages (1 = extract in-process)
+PDF_WORKERS = int(os.environ.get("SCF_PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Pages per worker task; documents up to this size are extracted in-process
+PDF_PAGES_PER_TASK = int(os.environ.get("SCF_PDF_PAGES_PER_TASK", "16"))
+
+
+class PdfPage(NamedTuple):
+    number: int  # 1-based
+    text: str
+
+
+def file_sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _read_source(source) -> bytes:
+    """Bytes of a path, a bytes object or a (binary) file-like object."""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read()
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    source.seek(0)
+    return source.read()
+
+
+def _extract_pages(data: bytes, start: int, end: int) -> list[str]:
+    """Text of pages [start, end), calling extract_text once per page."""
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return [(page.extract_text() or "") for page in pdf.pages[start:end]]
+
+
+# Each pool worker receives the document once, not once per task
+_worker_data: bytes = b""
+
+
+def _init_worker(data: bytes) -> None:
+    global _worker_data
+    _worker_data = data
+
+
+def _extract_worker_range(page_range: tuple[int, int]) -> list[str]:
+    return _extract_pages(_worker_data, *page_range)
+
+
+def _page_count(data: bytes) -> int:
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return len(pdf.pages)
+
+
+def _iter_page_texts(
+    data: bytes, n_pages: int, workers: int, pages_per_task: int
+) -> Iterator[list[str]]:
+    """Page texts in document order, one task's worth at a time."""
+    if workers <= 1 or n_pages <= pages_per_task:
+        yield _extract_pages(data, 0, n_pages)
+        return
+    ranges = [
+        (start, min(start + pages_per_task, n_pages))
+        for start in range(0, n_pages, pages_per_task)
+    ]
+    # spawn: forking the (multi-threaded) app or model process is not safe
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(ranges)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(data,),
+    ) as pool:
+        # map() yields in submission order as soon as each range is done
+        yield from pool.map(_extract_worker_range, ranges)
+
+
+def _cache_path(digest: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, f"{digest}.json")
+
+
+def _load_cached_pages(digest: str, cache_dir: str) -> list[str] | None:
+    path = _cache_path(digest, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["pages"]
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Ignoring unreadable PDF cache entry %s: %s", path, e)
+        return None
+
+
+def _save_cached_pages(digest: str, pages: list[str], cache_dir: str) -> None:
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _cache_path(digest, cache_dir)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"sha256": digest, "pages": pages}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def extract_pdf_pages(
+    source,
+    workers: int = PDF_WORKERS,
+    pages_per_task: int = PDF_PAGES_PER_TASK,
+    cache_dir: str | None = PDF_CACHE_DIR,
+    progress_callback: Callable[[int, int], None] | None = None,
+) -> Iterator[PdfPage]:
+    """
+    Stream the non-empty pages of a PDF (path, bytes or uploaded file) in order.
+
+    Page ranges are extracted in parallel worker processes and yielded as soon
+    as the next range in document order is done. Extractions are cached by the
+    file's SHA-256 in `cache_dir` (None, or SCF_PDF_CACHE=0, disables it), so
+    re-uploading the same document does not parse it again.
+    """
+    data = _read_source(source)
+    if not PDF_CACHE_ENABLED:
+        cache_dir = None
+    digest = file_sha256(data)
+    cached = _load_cached_pages(digest, cache_dir) if cache_dir else None
+    if cached is not None:
+        logger.info("Loaded %d cached PDF pages for %s", len(cached), digest[:12])
+        chunks: Iterator[list[str]] = iter([cached])
+        n_pages = len(cached)
+    else:
+        n_pages = _page_count(data)
+        chunks = _iter_page_texts(data, n_pages, workers, pages_per_task)
+
+    pages: list[str] = []
+    for chunk in chunks:
+        for text in chunk:
+            pages.append(text)
+            if text.strip():
+                yield PdfPage(len(pages), text)
+        if progress_callback:
+            progress_callback(len(pages), n_pages)
+
+    if cached is None and cache_dir:
+        try:
+            _save_cached_pages(digest, pages, cache_dir)
+        except OSError as e:
+            logger.warning("Could not cache PDF extraction: %s", e)
@@ -0,0 +1,242 @@
+import heapq
+import itertools
+import logging
+import os
+import re
+import threading
+import time
+from collections.abc import Mapping
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Provider ceilings (Groq free tier for llama-3.1-8b-instant); override per
+# account / model. Rate-limit response headers tighten these at runtime.
+GROQ_RPM_LIMIT = int(os.environ.get("GROQ_RPM_LIMIT", "30"))
+GROQ_TPM_LIMIT = int(os.environ.get("GROQ_TPM_LIMIT", "6000"))
+# Completion tokens reserved per request on top of the prompt estimate
+RESPONSE_TOKEN_ALLOWANCE = int(os.environ.get("GROQ_RESPONSE_TOKENS", "400"))
+
+# Lower value = served first. Interactive single mappings jump the batch queue.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# Groq 400s caused by the model's own output (a malformed tool call or JSON);
+# the same request can succeed on a second sample
+RETRYABLE_ERROR_CODES = ("tool_use_failed", "json_validate_failed")
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_duration(value) -> float | None:
+    """Parse Groq's reset / retry-after values ('7.66s', '2m59.56s', '120ms', '3')."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _response_headers(exc: BaseException) -> Mapping:
+    response = getattr(exc, "response", None)
+    return getattr(response, "headers", None) or {}
+
+
+def retry_after_seconds(exc: BaseException) -> float | None:
+    """Server-requested back-off carried by a 429 response, if any."""
+    headers = _response_headers(exc)
+    return parse_duration(headers.get("retry-after")) or parse_duration(
+        headers.get("x-ratelimit-reset-tokens")
+    )
+
+
+def _error_code(exc: BaseException) -> str | None:
+    """The `code` of a Groq error body ({"error": {"code": ...}} or its inner dict)."""
+    body = getattr(exc, "body", None)
+    if isinstance(body, Mapping):
+        body = body.get("error", body)
+    return body.get("code") if isinstance(body, Mapping) else None
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """
+    Whether a failed LLM call is worth retrying.
+
+    Rate limits, timeouts, connection failures and 5xx responses are, and so
+    are malformed model outputs: Groq's 400 tool_use_failed /
+    json_validate_failed and structured-output parse failures. Other bad
+    requests, authentication errors and plain ValueErrors are not.
+    """
+    # Deferred: only reached after a call failed, when the client is loaded anyway
+    import groq
+    from langchain_core.exceptions import OutputParserException
+    from pydantic import ValidationError
+
+    if isinstance(exc, (groq.APIConnectionError, TimeoutError, ConnectionError)):
+        return True
+    if isinstance(exc, (OutputParserException, ValidationError)):
+        return True
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        if status == 400:
+            return _error_code(exc) in RETRYABLE_ERROR_CODES
+        return status in (408, 409, 429) or status >= 500
+    return False
+
+
+class TokenBucket:
+    """Continuously refilling budget of `capacity` units per `period` seconds."""
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = float(capacity)
+        self.period = period
+        self.level = float(capacity)
+        self._updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (0 if they are now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def limit_to(self, remaining: float, now: float) -> None:
+        """Lower the level to what the provider reports as remaining."""
+        self._refill(now)
+        self.level = min(self.level, float(remaining))
+
+
+class RateLimitScheduler:
+    """
+    Shared admission control for LLM requests across threads.
+
+    Every request reserves one unit of the requests-per-minute bucket and its
+    estimated tokens from the tokens-per-minute bucket before it is sent.
+    Waiting requests are served strictly by (priority, arrival). Rate-limit
+    headers and 429 responses tighten the buckets or pause all traffic for
+    the advertised retry-after, so a batch stays just under the ceiling
+    instead of bouncing off it.
+    """
+
+    def __init__(self, rpm: int = GROQ_RPM_LIMIT, tpm: int = GROQ_TPM_LIMIT):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.rate_limited = 0
+        self._paused_until = 0.0
+        self._waiting: list[tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def acquire(self, tokens: int, priority: int = PRIORITY_BATCH) -> None:
+        """Block until the request may be sent, then reserve its budget."""
+        ticket = (priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    timeout = None
+                    if self._waiting[0] == ticket:
+                        now = time.monotonic()
+                        timeout = max(
+                            self._paused_until - now,
+                            self.requests.wait_time(1, now),
+                            self.tokens.wait_time(tokens, now),
+                        )
+                        if timeout <= 0:
+                            self.requests.take(1, now)
+                            self.tokens.take(tokens, now)
+                            return
+                    self._condition.wait(timeout)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, tokens: int, priority: int = PRIORITY_BATCH):
+        """acquire() around one request, feeding rate-limit errors back in."""
+        self.acquire(tokens, priority)
+        try:
+            yield
+        except Exception as e:
+            self.observe_error(e)
+            raise
+
+    def observe_headers(self, headers: Mapping) -> None:
+        """Sync the buckets with Groq's x-ratelimit-remaining-* headers."""
+        now = time.monotonic()
+        with self._condition:
+            for bucket, header in (
+                (self.tokens, "x-ratelimit-remaining-tokens"),
+                (self.requests, "x-ratelimit-remaining-requests"),
+            ):
+                try:
+                    remaining = float(headers.get(header))
+                except (TypeError, ValueError):
+                    continue
+                bucket.limit_to(remaining, now)
+
+    def observe_error(self, exc: BaseException) -> None:
+        """On a 429, drain the token bucket and pause everyone for retry-after."""
+        if getattr(exc, "status_code", None) != 429:
+            return
+        self.observe_headers(_response_headers(exc))
+        delay = retry_after_seconds(exc) or self.tokens.period / 10
+        with self._condition:
+            self.rate_limited += 1
+            now = time.monotonic()
+            self.tokens.limit_to(0, now)
+            self._paused_until = max(self._paused_until, now + delay)
+            self._condition.notify_all()
+        logger.warning("Groq rate limit hit; pausing requests for %.1fs.", delay)
+
+
+_scheduler: RateLimitScheduler | None = None
+_scheduler_lock = threading.Lock()
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimitScheduler:
+    """Process-wide scheduler shared by every LLM call (UI, batch and CLI)."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RateLimitScheduler()
+        return _scheduler
+
+
+def _observe_response(response) -> None:
+    get_rate_limiter().observe_headers(response.headers)
+
+
+def get_http_client():
+    """
+    Process-wide httpx client for ChatGroq. Every response, successful or not,
+    passes its x-ratelimit-remaining-* headers to the shared scheduler.
+    """
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            import httpx
+
+            _http_client = httpx.Client(event_hooks={"response": [_observe_response]})
+        return _http_client
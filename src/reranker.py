@@ -0,0 +1,111 @@
+import logging
+import os
+import threading
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Cross-encoder used to rescore the bi-encoder's candidates
+RERANKER_MODEL_NAME = os.environ.get(
+    "SCF_RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"
+)
+# Candidates per input passed from semantic retrieval to the reranker
+RERANK_CANDIDATES = int(os.environ.get("SCF_RERANK_CANDIDATES", "20"))
+# In hybrid mode, the LLM is only consulted when the best candidate's
+# cross-encoder logit beats the runner-up's by less than this gap. A logit gap
+# does not depend on how many candidates were reranked (a softmax share does).
+HYBRID_MARGIN_THRESHOLD = float(os.environ.get("SCF_RERANK_MARGIN", "1.1"))
+
+# "llm": always ask the LLM (original behaviour); "fast": reranker only, fully
+# offline; "hybrid": reranker, falling back to the LLM on ambiguous inputs
+MAPPING_MODES = ("fast", "hybrid", "llm")
+
+
+def validate_mode(mode: str) -> str:
+    if mode not in MAPPING_MODES:
+        raise ValueError(
+            f"Unknown mapping mode {mode!r}; expected one of {MAPPING_MODES}"
+        )
+    return mode
+
+
+def reranker_text(control: Mapping) -> str:
+    return f"{control['domain']}: {control['description']}"
+
+
+def score_margin(scores: np.ndarray) -> float:
+    """Logit gap between the best and second-best candidate (inf if unopposed)."""
+    if len(scores) == 0:
+        return 0.0
+    if len(scores) == 1:
+        return float("inf")
+    return float(scores[0] - scores[1])
+
+
+class Reranker:
+    """
+    Second retrieval stage: scores (input, control) pairs jointly with a
+    cross-encoder and orders each input's candidates by its logits.
+
+    The logits are relevance scores for ranking and for the hybrid margin
+    only: they are not calibrated against SCF mappings, so they are never
+    reported as a percentage confidence.
+
+    `model` is anything with a sentence-transformers CrossEncoder-style
+    predict(pairs) method returning one logit per pair.
+    """
+
+    def __init__(self, model):
+        self.model = model
+
+    def rerank_batch(
+        self, queries: Sequence[str], candidates: Sequence[Sequence[Mapping]]
+    ) -> list[tuple[list[Mapping], np.ndarray]]:
+        """
+        Rerank each query's candidates, best first.
+
+        All (query, candidate) pairs of the batch are scored with a single
+        predict call. Returns, per query, (controls, logits).
+        """
+        pairs = [
+            (query, reranker_text(control))
+            for query, controls in zip(queries, candidates)
+            for control in controls
+        ]
+        logits = (
+            np.asarray(
+                self.model.predict(
+                    pairs, show_progress_bar=False, convert_to_numpy=True
+                ),
+                dtype=np.float64,
+            )
+            if pairs
+            else np.empty(0)
+        )
+
+        results = []
+        start = 0
+        for controls in candidates:
+            scores = logits[start : start + len(controls)]
+            start += len(controls)
+            order = np.argsort(-scores, kind="stable")
+            results.append(([controls[i] for i in order], scores[order]))
+        return results
+
+
+_reranker: Reranker | None = None
+_reranker_lock = threading.Lock()
+
+
+def get_reranker() -> Reranker:
+    """Process-wide Reranker; the cross-encoder is loaded on first use."""
+    global _reranker
+    with _reranker_lock:
+        if _reranker is None:
+            from sentence_transformers import CrossEncoder
+
+            logger.info("Loading reranker model %s", RERANKER_MODEL_NAME)
+            _reranker = Reranker(CrossEncoder(RERANKER_MODEL_NAME))
+        return _reranker
@@ -0,0 +1,90 @@
+import json
+import os
+from collections.abc import Iterable, Mapping
+
+# Per-control fields compared between two SCF releases
+DIFF_FIELDS = ("domain", "description", "weight", "erl", "question")
+
+
+def _diff_regulations(old: Mapping, new: Mapping) -> dict:
+    """Framework columns a control gained, lost, or whose requirement IDs changed."""
+    added = {fw: new[fw] for fw in new.keys() - old.keys()}
+    removed = {fw: old[fw] for fw in old.keys() - new.keys()}
+    changed = {
+        fw: {"old": old[fw], "new": new[fw]}
+        for fw in old.keys() & new.keys()
+        if old[fw] != new[fw]
+    }
+    return {
+        key: dict(sorted(value.items()))
+        for key, value in (("added", added), ("removed", removed), ("changed", changed))
+        if value
+    }
+
+
+def diff_control(old: Mapping, new: Mapping) -> dict:
+    """Changed fields of one control: {field: {"old", "new"}, "regulations": {...}}."""
+    changes = {
+        field: {"old": old.get(field), "new": new.get(field)}
+        for field in DIFF_FIELDS
+        if old.get(field) != new.get(field)
+    }
+    regulations = _diff_regulations(
+        old.get("regulations") or {}, new.get("regulations") or {}
+    )
+    if regulations:
+        changes["regulations"] = regulations
+    return changes
+
+
+def diff_controls(
+    old_records: Iterable[Mapping], new_records: Iterable[Mapping]
+) -> dict:
+    """
+    Per-control diff between two parsed SCF databases.
+
+    Returns {"added": [ids], "removed": [ids], "changed": {id: changes}}, with
+    ids sorted and `changes` as produced by diff_control.
+    """
+    old = {r["control_id"]: r for r in old_records}
+    new = {r["control_id"]: r for r in new_records}
+    changed = {}
+    for control_id in sorted(old.keys() & new.keys()):
+        changes = diff_control(old[control_id], new[control_id])
+        if changes:
+            changed[control_id] = changes
+    return {
+        "added": sorted(new.keys() - old.keys()),
+        "removed": sorted(old.keys() - new.keys()),
+        "changed": changed,
+    }
+
+
+def is_empty_diff(diff: Mapping) -> bool:
+    return not (diff["added"] or diff["removed"] or diff["changed"])
+
+
+def diff_summary(diff: Mapping) -> dict:
+    """Counts per change type, e.g. for logs and the UI."""
+    changed = diff["changed"].values()
+    return {
+        "added": len(diff["added"]),
+        "removed": len(diff["removed"]),
+        "changed": len(diff["changed"]),
+        "description_changed": sum("description" in c for c in changed),
+        "regulations_changed": sum("regulations" in c for c in changed),
+    }
+
+
+def append_changelog(entry: Mapping, path: str) -> None:
+    """Append one release entry to the JSON Lines changelog."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False, sort_keys=True) + "\n")
+
+
+def read_changelog(path: str) -> list[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
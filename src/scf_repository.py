@@ -0,0 +1,244 @@
+import hashlib
+import json
+import logging
+import threading
+from collections.abc import Iterator, Mapping, Sequence
+from functools import cached_property
+
+from src.bm25 import (
+    BM25_INDEX_FILE,
+    BM25Index,
+    compute_index_version,
+    control_corpus,
+    load_bm25_index,
+)
+from src.crosswalk import CROSSWALK_FILE, Crosswalk, load_crosswalk
+from src.scf_store import (
+    REGULATION_INDEX_FILE,
+    SCFStore,
+    build_regulation_index,
+    get_scf_store,
+    load_regulation_index,
+    normalize_requirement,
+    write_regulation_index,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_framework(name: str) -> str:
+    return str(name).lower().replace(" ", "")
+
+
+class RegulationIndex:
+    """
+    Inverted regulation index: framework -> SCF control IDs and
+    (framework, requirement ID) -> SCF control IDs.
+
+    Framework names may be given exactly (e.g. 'ISO 27001 2022') or as a short
+    name matched against the column names (e.g. 'SOC 2', 'PCI DSS'); a short
+    name matching several columns resolves to all of them. Resolutions are
+    memoized, so repeated lookups are dictionary hits.
+    """
+
+    def __init__(self, index: dict):
+        self.frameworks: dict[str, frozenset[str]] = {
+            fw: frozenset(ids) for fw, ids in index["frameworks"].items()
+        }
+        self.requirements: dict[str, dict[str, frozenset[str]]] = {
+            fw: {req: frozenset(ids) for req, ids in reqs.items()}
+            for fw, reqs in index["requirements"].items()
+        }
+        self._resolved: dict[str, tuple[str, ...]] = {}
+
+    def resolve(self, framework: str) -> tuple[str, ...]:
+        """Regulation column names matching `framework`."""
+        resolved = self._resolved.get(framework)
+        if resolved is None:
+            if framework in self.frameworks:
+                resolved = (framework,)
+            else:
+                key = _normalize_framework(framework)
+                resolved = tuple(
+                    fw for fw in self.frameworks if key in _normalize_framework(fw)
+                )
+            self._resolved[framework] = resolved
+        return resolved
+
+    def controls_for(
+        self, framework: str, requirement: str | None = None
+    ) -> frozenset[str]:
+        """
+        SCF control IDs mapped to `framework`, or to one of its requirements,
+        e.g. controls_for("SOC 2", "CC6.1") or controls_for("PCI DSS", "3.5.1").
+        """
+        columns = self.resolve(framework)
+        if requirement is None:
+            if len(columns) == 1:
+                return self.frameworks[columns[0]]
+            return frozenset().union(*(self.frameworks[fw] for fw in columns))
+        req = normalize_requirement(requirement)
+        return frozenset().union(
+            *(self.requirements.get(fw, {}).get(req, frozenset()) for fw in columns)
+        )
+
+    def controls_for_any(self, frameworks) -> frozenset[str]:
+        """Union: controls required by at least one of `frameworks`."""
+        return frozenset().union(*(self.controls_for(fw) for fw in frameworks))
+
+    def controls_for_all(self, frameworks) -> frozenset[str]:
+        """Intersection: controls required by every one of `frameworks`."""
+        sets = [self.controls_for(fw) for fw in frameworks]
+        return frozenset.intersection(*sets) if sets else frozenset()
+
+
+class SCFRepository(Sequence):
+    """
+    In-process view of the SCF database with precomputed lookup indexes.
+
+    Behaves as a read-only sequence of control records (SCF order), so it can be
+    passed anywhere a list of controls is expected. Regulation indexes need every
+    control's details and are therefore built on first use, once per repository.
+    """
+
+    def __init__(
+        self,
+        controls: Sequence[Mapping],
+        regulation_index_path: str | None = None,
+        crosswalk_path: str | None = None,
+        bm25_index_path: str | None = None,
+    ):
+        self.controls = list(controls)
+        self._regulation_index_path = regulation_index_path
+        self._crosswalk_path = crosswalk_path
+        self._bm25_index_path = bm25_index_path
+        self.by_id: dict[str, Mapping] = {c["control_id"]: c for c in self.controls}
+        self.by_domain: dict[str, list[Mapping]] = {}
+        self.by_prefix: dict[str, list[Mapping]] = {}
+        self.domain_prefixes: dict[str, str] = {}
+        for c in self.controls:
+            prefix = c["control_id"].split("-")[0]
+            self.by_domain.setdefault(c["domain"], []).append(c)
+            self.by_prefix.setdefault(prefix, []).append(c)
+            self.domain_prefixes[c["domain"]] = prefix
+
+    def __len__(self) -> int:
+        return len(self.controls)
+
+    def __getitem__(self, index):
+        return self.controls[index]
+
+    def __iter__(self) -> Iterator[Mapping]:
+        return iter(self.controls)
+
+    def get(self, control_id: str) -> Mapping | None:
+        return self.by_id.get(control_id)
+
+    @cached_property
+    def version(self) -> str:
+        """Content hash of the controls' core fields."""
+        payload = json.dumps(
+            [[c["control_id"], c["domain"], c["description"]] for c in self.controls],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @cached_property
+    def crosswalk(self) -> Crosswalk | None:
+        """The sparse control x framework crosswalk of every selected framework."""
+        if not self._crosswalk_path:
+            return None
+        return load_crosswalk(self._crosswalk_path)
+
+    def regulations(self, control_id: str) -> dict[str, str]:
+        """All framework mappings of one control (the crosswalk, if built)."""
+        if self.crosswalk is not None:
+            return self.crosswalk.regulations(control_id)
+        control = self.get(control_id)
+        return dict(control["regulations"]) if control else {}
+
+    @cached_property
+    def regulation_index(self) -> RegulationIndex:
+        """
+        The inverted regulation index built at parse time. Rebuilt from the
+        crosswalk, or the controls, (and re-persisted) if the artifact is
+        missing or stale.
+        """
+        path = self._regulation_index_path
+        raw = load_regulation_index(path) if path else None
+        if raw is None:
+            source = self.controls
+            if self.crosswalk is not None:
+                source = list(self.crosswalk.iter_records())
+            if path:
+                try:
+                    raw = write_regulation_index(source, path)
+                except OSError as e:
+                    logger.warning("Could not persist regulation index: %s", e)
+            if raw is None:
+                raw = build_regulation_index(source)
+        return RegulationIndex(raw)
+
+    @cached_property
+    def bm25(self) -> BM25Index:
+        """
+        The BM25 lexical index built at parse time, aligned with the controls.
+        Rebuilt (and re-persisted) if the artifact is missing or its content
+        hash does not match the current controls and mappings.
+        """
+        path = self._bm25_index_path
+        control_ids, documents = control_corpus(self.controls, self.regulations)
+        version = compute_index_version(control_ids, documents)
+        index = load_bm25_index(path, version) if path else None
+        if index is None:
+            index = BM25Index.build(control_ids, documents)
+            if path:
+                try:
+                    index.save(path)
+                except OSError as e:
+                    logger.warning("Could not persist BM25 index: %s", e)
+        return index
+
+    @cached_property
+    def controls_by_regulation(self) -> dict[str, list[Mapping]]:
+        """Regulation column name -> controls mapped to it, in SCF order."""
+        order = {cid: i for i, cid in enumerate(self.by_id)}
+        return {
+            fw: [
+                self.by_id[cid]
+                for cid in sorted(ids & order.keys(), key=order.__getitem__)
+            ]
+            for fw, ids in self.regulation_index.frameworks.items()
+        }
+
+    @cached_property
+    def regulation_names(self) -> list[str]:
+        return sorted(self.controls_by_regulation)
+
+
+_repository: SCFRepository | None = None
+_repository_store: SCFStore | None = None
+_repository_lock = threading.Lock()
+
+
+def get_scf_repository() -> SCFRepository | None:
+    """
+    Process-wide SCFRepository, rebuilt only when the SCF data on disk changes.
+
+    Keyed on the memoized SCFStore, which itself is keyed on the file mtime.
+    Returns None when no SCF data has been fetched yet.
+    """
+    global _repository, _repository_store
+    store = get_scf_store()
+    if store is None:
+        return None
+    with _repository_lock:
+        if _repository is None or _repository_store is not store:
+            _repository = SCFRepository(
+                store.records(),
+                regulation_index_path=REGULATION_INDEX_FILE,
+                crosswalk_path=CROSSWALK_FILE,
+                bm25_index_path=BM25_INDEX_FILE,
+            )
+            _repository_store = store
+        return _repository
@@ -0,0 +1,262 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+from collections.abc import Iterator, Mapping
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+PARSED_JSON_FILE = os.path.join(DATA_DIR, "scf_parsed.json")
+COMPACT_DB_FILE = os.path.join(DATA_DIR, "scf_compact.bin")
+REGULATION_INDEX_FILE = os.path.join(DATA_DIR, "scf_regulation_index.json")
+
+# Fields loaded eagerly for every control (retrieval, prompts, listings)
+CORE_FIELDS = ("control_id", "domain", "description", "weight")
+# Bulky fields fetched lazily, per control, only when accessed
+DETAIL_FIELDS = ("regulations", "erl", "question")
+
+_MAGIC = b"SCFC\x01"
+_HEADER_LEN = struct.Struct("<Q")
+
+
+def write_compact_db(records: list[dict], path: str = COMPACT_DB_FILE) -> None:
+    """
+    Write parsed SCF records to the compact binary format.
+
+    Layout: magic | u64 header length | compact columnar JSON header with the
+    core fields and per-control detail offsets | concatenated detail records.
+    The detail section is only read on demand, by byte offset.
+    """
+    blobs = []
+    offsets = []
+    lengths = []
+    position = 0
+    for r in records:
+        blob = json.dumps(
+            {f: r.get(f) for f in DETAIL_FIELDS if f in r},
+            separators=(",", ":"),
+            ensure_ascii=False,
+        ).encode("utf-8")
+        blobs.append(blob)
+        offsets.append(position)
+        lengths.append(len(blob))
+        position += len(blob)
+
+    header = {
+        "count": len(records),
+        "columns": {f: [r.get(f) for r in records] for f in CORE_FIELDS},
+        "detail_offsets": offsets,
+        "detail_lengths": lengths,
+    }
+    header_bytes = json.dumps(header, separators=(",", ":"), ensure_ascii=False).encode(
+        "utf-8"
+    )
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(_HEADER_LEN.pack(len(header_bytes)))
+        f.write(header_bytes)
+        f.writelines(blobs)
+    os.replace(tmp_path, path)
+    logger.info("Saved compact SCF database (%d controls) to %s", len(records), path)
+
+
+def normalize_requirement(requirement: str) -> str:
+    """Canonical form of a requirement ID, e.g. ' cc6.1 ' -> 'CC6.1'."""
+    return " ".join(str(requirement).split()).upper()
+
+
+def build_regulation_index(records) -> dict:
+    """
+    Invert the controls' regulation mappings.
+
+    Returns {"frameworks": {framework: [control_id, ...]},
+             "requirements": {framework: {requirement_id: [control_id, ...]}}}
+    with the newline-separated requirement strings split and normalized, and
+    control IDs in SCF order.
+    """
+    frameworks: dict[str, list[str]] = {}
+    requirements: dict[str, dict[str, list[str]]] = {}
+    for r in records:
+        cid = r["control_id"]
+        for framework, value in (r.get("regulations") or {}).items():
+            frameworks.setdefault(framework, []).append(cid)
+            by_requirement = requirements.setdefault(framework, {})
+            for requirement in str(value).split("\n"):
+                key = normalize_requirement(requirement)
+                if not key:
+                    continue
+                ids = by_requirement.setdefault(key, [])
+                if not ids or ids[-1] != cid:
+                    ids.append(cid)
+    return {"frameworks": frameworks, "requirements": requirements}
+
+
+def write_regulation_index(records, path: str = REGULATION_INDEX_FILE) -> dict:
+    """Build the inverted regulation index and persist it next to the SCF data."""
+    index = build_regulation_index(records)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"), ensure_ascii=False)
+    os.replace(tmp_path, path)
+    logger.info(
+        "Saved regulation index (%d frameworks) to %s", len(index["frameworks"]), path
+    )
+    return index
+
+
+def load_regulation_index(
+    path: str = REGULATION_INDEX_FILE, compact_path: str = COMPACT_DB_FILE
+) -> dict | None:
+    """Load the persisted regulation index, or None if missing or older than the data."""
+    if not os.path.exists(path):
+        return None
+    if os.path.exists(compact_path) and os.path.getmtime(path) < os.path.getmtime(
+        compact_path
+    ):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable regulation index: %s", e)
+        return None
+
+
+class LazyControl(Mapping):
+    """
+    Read-only control record: core fields are in memory, detail fields
+    (regulations, erl, question) are fetched from the store on first access.
+    """
+
+    __slots__ = ("_core", "_details", "_store")
+
+    def __init__(self, core: dict, store: "SCFStore"):
+        self._core = core
+        self._store = store
+        self._details: dict | None = None
+
+    def _load_details(self) -> dict:
+        if self._details is None:
+            self._details = self._store.details(self._core["control_id"])
+        return self._details
+
+    def __getitem__(self, key):
+        if key in self._core:
+            return self._core[key]
+        if key in DETAIL_FIELDS:
+            return self._load_details()[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._core
+        yield from DETAIL_FIELDS
+
+    def __len__(self) -> int:
+        return len(self._core) + len(DETAIL_FIELDS)
+
+    def __repr__(self) -> str:
+        return f"LazyControl({self._core['control_id']!r})"
+
+
+class SCFStore:
+    """Reader for the compact SCF database with lazily loaded control details."""
+
+    def __init__(self, path: str = COMPACT_DB_FILE):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a compact SCF database")
+            (header_len,) = _HEADER_LEN.unpack(f.read(_HEADER_LEN.size))
+            header = json.loads(f.read(header_len).decode("utf-8"))
+        self._data_start = len(_MAGIC) + _HEADER_LEN.size + header_len
+
+        columns = header["columns"]
+        self.ids: list[str] = columns["control_id"]
+        self._cores = [
+            dict(zip(CORE_FIELDS, values))
+            for values in zip(*(columns[f] for f in CORE_FIELDS))
+        ]
+        self._offsets: list[int] = header["detail_offsets"]
+        self._lengths: list[int] = header["detail_lengths"]
+        self._position = {cid: i for i, cid in enumerate(self.ids)}
+        self._records = [LazyControl(core, self) for core in self._cores]
+        self._details_cache: dict[str, dict] = {}
+        self._mmap: mmap.mmap | None = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, control_id) -> bool:
+        return control_id in self._position
+
+    def _detail_bytes(self, i: int) -> bytes:
+        with self._lock:
+            if self._mmap is None:
+                with open(self.path, "rb") as f:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        start = self._data_start + self._offsets[i]
+        return self._mmap[start : start + self._lengths[i]]
+
+    def details(self, control_id: str) -> dict:
+        """Return {regulations, erl, question} for one control, read on demand."""
+        cached = self._details_cache.get(control_id)
+        if cached is not None:
+            return cached
+        i = self._position[control_id]
+        raw = json.loads(self._detail_bytes(i).decode("utf-8"))
+        details = {
+            "regulations": raw.get("regulations") or {},
+            "erl": raw.get("erl") or "",
+            "question": raw.get("question") or "",
+        }
+        self._details_cache[control_id] = details
+        return details
+
+    def get(self, control_id: str) -> LazyControl | None:
+        i = self._position.get(control_id)
+        return None if i is None else self._records[i]
+
+    def records(self) -> list[LazyControl]:
+        """All controls in SCF order; detail fields stay lazy."""
+        return list(self._records)
+
+
+_store: SCFStore | None = None
+_store_mtime: float | None = None
+_store_lock = threading.Lock()
+
+
+def get_scf_store(
+    json_path: str = PARSED_JSON_FILE, compact_path: str = COMPACT_DB_FILE
+) -> SCFStore | None:
+    """
+    Shared, memoized accessor for the SCF database.
+
+    Loads the compact artifact, (re)generating it from the parsed JSON when it is
+    missing or older than the JSON. The loaded store is reused until the file on
+    disk changes. Returns None when no SCF data has been fetched yet.
+    """
+    global _store, _store_mtime
+    with _store_lock:
+        json_mtime = os.path.getmtime(json_path) if os.path.exists(json_path) else None
+        compact_exists = os.path.exists(compact_path)
+        if json_mtime is not None and (
+            not compact_exists or os.path.getmtime(compact_path) < json_mtime
+        ):
+            logger.info("Building compact SCF database from %s", json_path)
+            with open(json_path, "r", encoding="utf-8") as f:
+                write_compact_db(json.load(f), compact_path)
+        elif not compact_exists:
+            return None
+
+        mtime = os.path.getmtime(compact_path)
+        if _store is None or _store.path != compact_path or _store_mtime != mtime:
+            _store = SCFStore(compact_path)
+            _store_mtime = mtime
+        return _store
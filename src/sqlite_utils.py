@@ -0,0 +1,20 @@
+import sqlite3
+from contextlib import closing
+
+
+class SQLiteConnection:
+    """Short-lived SQLite connection that commits on success and always closes."""
+
+    def __init__(self, path: str, timeout: float = 30):
+        self._conn = sqlite3.connect(path, timeout=timeout)
+
+    def __enter__(self) -> sqlite3.Connection:
+        return self._conn
+
+    def __exit__(self, exc_type, exc, tb):
+        with closing(self._conn):
+            if exc_type is None:
+                self._conn.commit()
+            else:
+                self._conn.rollback()
+        return False
@@ -1,10 +1,16 @@
 import os
 import streamlit as st
-from fetch_scf import PARSED_JSON_FILE, download_scf, parse_scf
+from fetch_scf import (
+    PARSED_JSON_FILE,
+    UPDATE_APPLIED,
+    UPDATE_FAILED,
+    load_release_state,
+    update_scf,
+)
 
 
 def render_sidebar():
-    """Renders the main navigational sidebar and returns the selected tool mode and AI persona."""
+    """Renders the main navigational sidebar and returns the selected tool mode, AI persona and mapping mode."""
     with st.sidebar:
         st.title("🛡️ Secure Controls Framework (SCF)")
         st.markdown("### GRC Assistant Platform")
@@ -29,16 +35,34 @@ def render_sidebar():
         db_status = "🟢 Ready" if os.path.exists(PARSED_JSON_FILE) else "🔴 Not Found"
         st.write(f"**JSON SCF Database:** {db_status}")
 
-        if st.button("🔄 Force Update SCF Framework Data"):
-            with st.spinner("Downloading from official SCF GitHub..."):
-                if download_scf():
-                    if parse_scf():
-                        st.success("Successfully updated and parsed the latest SCF!")
-                        st.rerun()
-                    else:
-                        st.error("Failed to parse the SCF Excel file.")
-                else:
-                    st.error("Failed to download the SCF.")
+        release = load_release_state().get("tag")
+        if release:
+            st.write(f"**SCF Release:** {release}")
+
+        # Shown once after the rerun that follows a successful update
+        update_message = st.session_state.pop("scf_update_message", None)
+        if update_message:
+            st.success(update_message)
+
+        force_update = st.checkbox(
+            "Force re-download",
+            help="Download and re-parse the latest release even if it is already installed, e.g. to repair a corrupt or partial download.",
+        )
+        if st.button("🔄 Check for SCF Framework Updates"):
+            with st.spinner("Checking the official SCF GitHub releases..."):
+                result = update_scf(force=force_update)
+            if result.status == UPDATE_FAILED:
+                st.error(f"Failed to update the SCF: {result.error}")
+            elif result.status == UPDATE_APPLIED:
+                summary = result.summary
+                st.session_state["scf_update_message"] = (
+                    f"Updated to SCF {result.release}: {summary['added']} added, "
+                    f"{summary['removed']} removed, {summary['changed']} changed controls."
+                )
+                # Re-render the status above with the new release and data
+                st.rerun()
+            else:
+                st.info(f"SCF {result.release} is already up to date.")
 
         # Advanced Settings specifically for Crosswalker
         if app_mode == "🔍 SCF Auto-Crosswalker":
@@ -53,12 +77,25 @@ def render_sidebar():
             ]
             selected_persona = st.selectbox("AI Persona Lens", persona_options)
             persona_prompt = None if "None" in selected_persona else selected_persona
+
+            mode_options = {
+                "🤖 LLM (always ask Llama-3)": "llm",
+                "⚖️ Hybrid (LLM only for ambiguous inputs)": "hybrid",
+                "⚡ Fast (local reranker only, offline)": "fast",
+            }
+            selected_mode = st.radio(
+                "Mapping Mode",
+                list(mode_options),
+                help="Fast and Hybrid rerank the retrieved controls locally with a cross-encoder; Hybrid calls the LLM only when the top match is not clearly ahead. Reranker-only mappings show no confidence percentage.",
+            )
+            mapping_mode = mode_options[selected_mode]
         else:
             persona_prompt = None
+            mapping_mode = "llm"
 
         st.markdown("---")
         st.info(
             "Licensed under CC Attribution-NoDerivatives 4.0. Data provided by securecontrolsframework.com"
         )
 
-    return app_mode, persona_prompt
+    return app_mode, persona_prompt, mapping_mode
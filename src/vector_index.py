@@ -0,0 +1,304 @@
+import importlib.util
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+from src.embedding_store import EMBEDDINGS_CACHE_FILE, l2_normalize
+
+logger = logging.getLogger(__name__)
+
+# Retrieval backend: "exact" (NumPy brute force), or an approximate HNSW graph
+# from hnswlib ("hnsw") or faiss-cpu ("faiss"), both optional dependencies
+INDEX_BACKEND = os.environ.get("SCF_INDEX_BACKEND", "exact")
+INDEX_BACKENDS = ("exact", "hnsw", "faiss")
+_BACKEND_MODULES = {"hnsw": "hnswlib", "faiss": "faiss"}
+
+# HNSW graph degree and build / query beam widths (higher: better recall,
+# slower); ef_search is raised to k when a query asks for more neighbours
+HNSW_M = int(os.environ.get("SCF_HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.environ.get("SCF_HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.environ.get("SCF_HNSW_EF_SEARCH", "128"))
+
+
+def top_k_indices(similarities: np.ndarray, k: int) -> np.ndarray:
+    """
+    Row-wise indices of the k highest scores, best first.
+
+    np.argpartition selects the top-k in O(n) per row; only those k entries are
+    then sorted, instead of a full argsort over every SCF control.
+    """
+    k = min(k, similarities.shape[1])
+    if k <= 0:
+        return np.empty((similarities.shape[0], 0), dtype=np.intp)
+    if k < similarities.shape[1]:
+        candidates = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.tile(np.arange(k), (similarities.shape[0], 1))
+    candidate_scores = np.take_along_axis(similarities, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def gather_similarities(
+    vectors: np.ndarray, query_vecs: np.ndarray, indices: np.ndarray
+) -> np.ndarray:
+    """Cosine similarity of each query to its own rows `indices[i]` of `vectors`."""
+    queries = l2_normalize(np.atleast_2d(query_vecs))
+    indices = np.asarray(indices, dtype=np.intp)
+    if not indices.size:
+        return np.empty(indices.shape, dtype=np.float32)
+    rows = np.asarray(vectors, dtype=np.float32)[indices]
+    return np.einsum("qkd,qd->qk", rows, queries).astype(np.float32)
+
+
+class VectorIndex:
+    """
+    Exact cosine-similarity index over a fixed matrix of embeddings.
+
+    Rows are L2-normalized once at build time, so a query batch is scored with a
+    single BLAS matrix product instead of re-normalizing the corpus per call.
+    """
+
+    backend = "exact"
+
+    def __init__(self, vectors: np.ndarray, normalized: bool = False):
+        self.source = vectors
+        if normalized:
+            self.vectors = np.asarray(vectors, dtype=np.float32)
+        else:
+            self.vectors = l2_normalize(vectors)
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    def search(self, query_vecs: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return (indices, scores) of the k nearest rows for each query, best first.
+
+        Both arrays have shape (n_queries, min(k, len(index))).
+        """
+        queries = l2_normalize(np.atleast_2d(query_vecs))
+        similarities = queries @ self.vectors.T
+        indices = top_k_indices(similarities, k)
+        return indices, np.take_along_axis(similarities, indices, axis=1)
+
+    def similarities(self, query_vecs: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        """Exact cosine of each query to the given rows, shape of `indices`."""
+        return gather_similarities(self.vectors, query_vecs, indices)
+
+
+class _HNSWIndex:
+    """Approximate inner-product (= cosine, on normalized rows) HNSW index."""
+
+    backend = ""
+
+    def __init__(self, source: np.ndarray, index, count: int):
+        self.source = source
+        self.index = index
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def search(self, query_vecs: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Same contract as VectorIndex.search; results are approximate."""
+        queries = l2_normalize(np.atleast_2d(query_vecs))
+        k = min(k, self.count)
+        if k <= 0:
+            empty = np.empty((queries.shape[0], 0))
+            return empty.astype(np.intp), empty.astype(np.float32)
+        indices, scores = self._search(queries, k)
+        indices = indices.astype(np.intp)
+        scores = scores.astype(np.float32)
+        # faiss pads a row with label -1 when the graph walk finds fewer than k
+        # neighbours; answer those queries exactly rather than return row -1
+        incomplete = (indices < 0).any(axis=1)
+        if incomplete.any():
+            indices[incomplete], scores[incomplete] = VectorIndex(self.source).search(
+                queries[incomplete], k
+            )
+        return indices, scores
+
+    def similarities(self, query_vecs: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        """Exact cosine of each query to the given rows, shape of `indices`."""
+        return gather_similarities(self.source, query_vecs, indices)
+
+
+class HnswlibIndex(_HNSWIndex):
+    backend = "hnsw"
+
+    def __init__(self, source: np.ndarray, index, count: int):
+        super().__init__(source, index, count)
+        # set_ef is not safe to call concurrently with queries
+        self._ef_lock = threading.Lock()
+        self._ef = HNSW_EF_SEARCH
+        index.set_ef(self._ef)
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, m: int, ef_construction: int):
+        import hnswlib
+
+        data = np.ascontiguousarray(vectors, dtype=np.float32)
+        index = hnswlib.Index(space="ip", dim=data.shape[1])
+        index.init_index(max_elements=len(data), M=m, ef_construction=ef_construction)
+        index.add_items(data, np.arange(len(data)))
+        return cls(vectors, index, len(data))
+
+    @classmethod
+    def load(cls, path: str, vectors: np.ndarray):
+        import hnswlib
+
+        index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        index.load_index(path, max_elements=len(vectors))
+        return cls(vectors, index, len(vectors))
+
+    def save(self, path: str) -> None:
+        self.index.save_index(path)
+
+    def _search(self, queries: np.ndarray, k: int):
+        with self._ef_lock:
+            if k > self._ef:
+                self._ef = k
+                self.index.set_ef(k)
+            labels, distances = self.index.knn_query(queries, k=k)
+        # hnswlib's "ip" distance is 1 - inner product
+        return labels, 1.0 - distances
+
+
+class FaissIndex(_HNSWIndex):
+    backend = "faiss"
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, m: int, ef_construction: int):
+        import faiss
+
+        data = np.ascontiguousarray(vectors, dtype=np.float32)
+        index = faiss.IndexHNSWFlat(data.shape[1], m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = ef_construction
+        index.add(data)
+        return cls(vectors, index, len(data))
+
+    @classmethod
+    def load(cls, path: str, vectors: np.ndarray):
+        import faiss
+
+        return cls(vectors, faiss.read_index(path), len(vectors))
+
+    def save(self, path: str) -> None:
+        import faiss
+
+        faiss.write_index(self.index, path)
+
+    def _search(self, queries: np.ndarray, k: int):
+        import faiss
+
+        # Per-call parameters: no shared state to mutate across threads
+        params = faiss.SearchParametersHNSW(efSearch=max(HNSW_EF_SEARCH, k))
+        scores, labels = self.index.search(
+            np.ascontiguousarray(queries, dtype=np.float32), k, params=params
+        )
+        return labels, scores
+
+
+_ANN_CLASSES = {"hnsw": HnswlibIndex, "faiss": FaissIndex}
+
+
+def resolve_backend(backend: str = INDEX_BACKEND) -> str:
+    """`backend`, or "exact" (with a warning) if its library is not installed."""
+    if backend not in INDEX_BACKENDS:
+        raise ValueError(
+            f"Unknown index backend {backend!r}; expected one of {INDEX_BACKENDS}"
+        )
+    module = _BACKEND_MODULES.get(backend)
+    if module and importlib.util.find_spec(module) is None:
+        logger.warning(
+            "Index backend %r needs %s, which is not installed; using exact search.",
+            backend,
+            module,
+        )
+        return "exact"
+    return backend
+
+
+def index_path(backend: str, cache_file: str = EMBEDDINGS_CACHE_FILE) -> str:
+    """Persisted ANN graph next to the embeddings, e.g. scf_embeddings.hnsw.index."""
+    return f"{os.path.splitext(cache_file)[0]}.{backend}.index"
+
+
+def _index_manifest(backend: str, version: str, vectors: np.ndarray) -> dict:
+    return {
+        "backend": backend,
+        "version": version,
+        "count": int(vectors.shape[0]),
+        "dim": int(vectors.shape[1]),
+        "m": HNSW_M,
+        "ef_construction": HNSW_EF_CONSTRUCTION,
+    }
+
+
+def _read_index_manifest(path: str) -> dict | None:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable index manifest: %s", e)
+        return None
+
+
+def build_index(vectors: np.ndarray, backend: str = INDEX_BACKEND):
+    """In-memory index over L2-normalized `vectors` (no persistence)."""
+    backend = resolve_backend(backend)
+    if backend == "exact":
+        return VectorIndex(vectors, normalized=True)
+    return _ANN_CLASSES[backend].build(vectors, HNSW_M, HNSW_EF_CONSTRUCTION)
+
+
+def load_or_build_index(
+    vectors: np.ndarray,
+    version: str | None,
+    backend: str = INDEX_BACKEND,
+    path: str | None = None,
+):
+    """
+    Search index over the L2-normalized embedding matrix `vectors`.
+
+    The exact backend needs no build. An ANN graph is loaded from `path`
+    (default: next to the embeddings store) when its manifest matches the
+    embeddings `version` and the HNSW parameters, and is otherwise built and
+    saved there; with version=None it is built in memory only.
+    """
+    backend = resolve_backend(backend)
+    if backend == "exact":
+        return VectorIndex(vectors, normalized=True)
+
+    cls = _ANN_CLASSES[backend]
+    path = path or index_path(backend)
+    manifest_path = f"{path}.json"
+    manifest = _index_manifest(backend, version or "", vectors)
+    if version and _read_index_manifest(manifest_path) == manifest:
+        try:
+            index = cls.load(path, vectors)
+            logger.info(
+                "Loaded %s index (%d vectors) from %s", backend, len(index), path
+            )
+            return index
+        except (OSError, RuntimeError) as e:
+            logger.warning("Rebuilding unreadable %s index: %s", backend, e)
+
+    logger.info("Building %s index over %d vectors...", backend, len(vectors))
+    index = cls.build(vectors, HNSW_M, HNSW_EF_CONSTRUCTION)
+    if version:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        index.save(tmp_path)
+        with open(f"{manifest_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+        logger.info("Saved %s index to %s", backend, path)
+    return index
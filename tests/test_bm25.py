@@ -0,0 +1,133 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from src.bm25 import (
+    BM25Index,
+    load_bm25_index,
+    reciprocal_rank_fusion,
+    tokenize,
+    write_bm25_index,
+)
+from src.scf_repository import SCFRepository
+
+CONTROLS = [
+    {
+        "control_id": "IAC-06",
+        "domain": "Identification & Authentication",
+        "description": "Use multi-factor authentication (MFA) for privileged accounts.",
+        "question": "Does the organization enforce MFA?",
+        "regulations": {"AICPA SOC 2 (2017)": "CC6.1", "CIS CSC v8.1": "6.5"},
+    },
+    {
+        "control_id": "CRY-05",
+        "domain": "Cryptographic Protections",
+        "description": "Encrypt data at rest with keys managed in a KMS.",
+        "question": "Is data at rest encrypted?",
+        "regulations": {"CIS AWS Foundations": "2.1.1\n2.1.5"},
+    },
+    {
+        "control_id": "NET-04",
+        "domain": "Network Security",
+        "description": "Restrict network traffic with data flow enforcement.",
+        "question": "",
+        "regulations": {},
+    },
+]
+
+
+def test_tokenize_keeps_requirement_codes_whole():
+    assert tokenize("CIS 2.1.5: enable S3.8 on GOV-01, full-disk!") == [
+        "cis",
+        "2.1.5",
+        "enable",
+        "s3.8",
+        "on",
+        "gov-01",
+        "gov",
+        "01",
+        "full-disk",
+        "full",
+        "disk",
+    ]
+
+
+def test_exact_codes_rank_their_control_first():
+    index = BM25Index.from_controls(CONTROLS)
+    ids = index.control_ids
+
+    for query, expected in [
+        ("Finding: CIS 2.1.5 S3 bucket lacks default encryption", "CRY-05"),
+        ("Root user without MFA", "IAC-06"),
+        ("SOC 2 CC6.1 exception", "IAC-06"),
+        ("net-04", "NET-04"),
+    ]:
+        ((indices, scores),) = index.search([query], k=2)
+        assert ids[indices[0]] == expected, query
+        assert list(scores) == sorted(scores, reverse=True)
+
+    # Only matching controls are returned
+    ((indices, _),) = index.search(["unrelated words"], k=3)
+    assert len(indices) == 0
+
+
+def test_scores_match_bm25_formula():
+    index = BM25Index.build(["a", "b"], ["kms kms key", "key"], k1=1.2, b=0.0)
+    idf = np.log1p((2 - 1 + 0.5) / (1 + 0.5))
+    assert index.scores("kms")[0] == pytest.approx(idf * 2 * 2.2 / (2 + 1.2))
+    assert index.scores("kms")[1] == 0
+
+
+def test_index_round_trips_and_goes_stale(tmp_path):
+    path = str(tmp_path / "bm25.npz")
+    built = write_bm25_index(CONTROLS, path)
+
+    loaded = load_bm25_index(path, built.version)
+    assert loaded.control_ids == built.control_ids
+    assert np.array_equal(loaded.scores("kms mfa"), built.scores("kms mfa"))
+
+    assert load_bm25_index(path, "other content") is None
+
+
+def test_repository_rebuilds_misaligned_index(tmp_path):
+    path = str(tmp_path / "bm25.npz")
+    write_bm25_index(CONTROLS[::-1], path)
+
+    repo = SCFRepository(CONTROLS, bm25_index_path=path)
+    assert repo.bm25.control_ids == ["IAC-06", "CRY-05", "NET-04"]
+    assert load_bm25_index(path).control_ids == repo.bm25.control_ids
+
+
+def test_repository_rebuilds_index_when_control_text_changes(tmp_path):
+    path = str(tmp_path / "bm25.npz")
+    write_bm25_index(CONTROLS, path)
+    # Same control IDs in the same order, new wording
+    updated = [dict(CONTROLS[0], description="Require phishing-resistant FIDO2 keys.")]
+    updated += CONTROLS[1:]
+
+    repo = SCFRepository(updated, bm25_index_path=path)
+    ((indices, _),) = repo.bm25.search(["fido2"], k=1)
+    assert repo.bm25.control_ids[indices[0]] == "IAC-06"
+    assert load_bm25_index(path).version == repo.bm25.version
+
+    # Unchanged content: the persisted index is reused as is
+    with patch("src.scf_repository.BM25Index.build") as mock_build:
+        assert SCFRepository(updated, bm25_index_path=path).bm25.version == (
+            repo.bm25.version
+        )
+    mock_build.assert_not_called()
+
+
+def test_reciprocal_rank_fusion():
+    indices, scores = reciprocal_rank_fusion(
+        [np.array([0, 1, 2]), np.array([2, 3])], k=3, rrf_k=60
+    )
+    # 2 is ranked by both lists, 0 first by one of them
+    assert indices.tolist() == [2, 0, 1]
+    assert scores[0] == pytest.approx((1 / 63 + 1 / 61) * 61 / 2)
+    assert scores[1] == pytest.approx(0.5)
+
+    # An empty lexical ranking leaves the dense order intact
+    indices, _ = reciprocal_rank_fusion([np.array([4, 1]), np.array([])], k=5)
+    assert indices.tolist() == [4, 1]
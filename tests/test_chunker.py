@@ -0,0 +1,41 @@
+from src.chunker import is_heading, split_document
+
+
+def test_is_heading():
+    assert is_heading("## Access Control")
+    assert is_heading("4.2 Encryption Standards")
+    assert is_heading("Section 7 - Incident Response")
+    assert is_heading("ACCEPTABLE USE")
+    assert not is_heading("All laptops must be encrypted.")
+    assert not is_heading("3 devices were lost last year and reported")
+
+
+def test_split_document_by_heading_with_overlapping_chunks():
+    body = " ".join(f"word{i}" for i in range(25))
+    text = f"Intro paragraph.\n\n1. Encryption\n{body}\n\n2. Access Control\nUse MFA."
+
+    sections = split_document(text, chunk_words=10, overlap_words=3)
+
+    assert [s.heading for s in sections] == ["", "1. Encryption", "2. Access Control"]
+    encryption = sections[1]
+    windows = [c.text.split("\n")[1].split() for c in encryption.chunks]
+    assert all(len(w) <= 10 for w in windows)
+    # Consecutive chunks share the overlap, and together cover the section
+    assert windows[0][-3:] == windows[1][:3]
+    assert windows[-1][-1] == "word24"
+    assert all(c.text.startswith("1. Encryption\n") for c in encryption.chunks)
+    assert {c.section for c in encryption.chunks} == {1}
+
+
+def test_long_section_is_split_into_parts_on_paragraphs():
+    paragraphs = [" ".join(["policy"] * 40) for _ in range(5)]
+    text = "DATA HANDLING\n" + "\n\n".join(paragraphs)
+
+    sections = split_document(text, section_words=100)
+
+    assert [s.heading for s in sections] == [
+        "DATA HANDLING (part 1)",
+        "DATA HANDLING (part 2)",
+        "DATA HANDLING (part 3)",
+    ]
+    assert [len(s.text.split()) for s in sections] == [80, 80, 40]
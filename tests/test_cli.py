@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+from unittest.mock import patch
+
+from src.cli import (
+    CsvResultWriter,
+    JsonlResultWriter,
+    crosswalk,
+    iter_inputs,
+    main,
+)
+from src.mapper import MappedControl, MappingResult
+
+RESULT = MappingResult(
+    mappings=[
+        MappedControl(
+            control_id="CRY-01",
+            domain="Cryptography",
+            confidence=90,
+            justification="Encryption at rest.",
+        )
+    ]
+)
+
+
+def test_iter_inputs_reads_findings_export_and_jsonl(tmp_path):
+    export = tmp_path / "findings.json"
+    export.write_text(json.dumps({"Findings": [{"Title": "a"}, {"Title": "b"}]}))
+    stream = tmp_path / "findings.jsonl"
+    stream.write_text('{"Title": "a"}\n\nnot json\n{"Title": "c"}\n')
+    text = tmp_path / "policy.txt"
+    text.write_text("All data must be encrypted.")
+
+    assert list(iter_inputs(str(export))) == [{"Title": "a"}, {"Title": "b"}]
+    assert list(iter_inputs(str(stream))) == [{"Title": "a"}, {"Title": "c"}]
+    assert list(iter_inputs(str(text))) == ["All data must be encrypted."]
+
+
+@patch("src.mapper.map_findings_to_scf")
+def test_crosswalk_writes_each_chunk(mock_map, tmp_path):
+    stream = tmp_path / "findings.jsonl"
+    stream.write_text("".join(json.dumps({"Title": t}) + "\n" for t in "abc"))
+    mock_map.side_effect = lambda items, **_: [
+        ValueError("boom") if item["Title"] == "b" else RESULT for item in items
+    ]
+    out = io.StringIO()
+
+    processed, failed = crosswalk([str(stream)], JsonlResultWriter(out), chunk_size=2)
+
+    assert (processed, failed) == (3, 1)
+    assert [len(call.args[0]) for call in mock_map.call_args_list] == [2, 1]
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r["index"] for r in records] == [0, 1, 2]
+    assert records[0]["mappings"][0]["control_id"] == "CRY-01"
+    assert records[1]["error"] == "boom"
+
+
+def test_csv_writer_one_row_per_mapping():
+    out = io.StringIO()
+    writer = CsvResultWriter(out)
+    writer.write("f.json", 0, RESULT)
+    writer.write("f.json", 1, None)
+
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert rows[0]["control_id"] == "CRY-01"
+    assert rows[0]["rank"] == "1"
+    assert rows[1]["error"] == "no result"
+
+
+@patch("src.cli.load_scf_database", return_value=[])
+def test_main_fails_without_scf_database(mock_load, capsys):
+    assert main(["missing.json"]) == 1
+    assert "SCF database not found" in capsys.readouterr().err
@@ -0,0 +1,80 @@
+import pytest
+
+from src.context_builder import (
+    DEFAULT_CONTEXT_TOKEN_BUDGET,
+    build_context,
+    context_token_budget,
+    cut_candidates,
+    estimate_tokens,
+    truncate_description,
+)
+
+
+def make_controls(n: int, description: str = "Short description.") -> list[dict]:
+    return [
+        {
+            "control_id": f"GOV-{i:02d}",
+            "domain": "Governance",
+            "description": description,
+        }
+        for i in range(n)
+    ]
+
+
+def test_cut_candidates_at_elbow_and_relative_floor():
+    # Clear elbow after the 3rd candidate
+    scores = [0.80, 0.78, 0.77, 0.50, 0.49, 0.48]
+    assert cut_candidates(scores, min_k=2, elbow_min_gap=0.1) == 3
+    # Flat scores: no elbow, floor keeps everything
+    assert cut_candidates([0.5] * 10, min_k=2) == 10
+    # Floor: everything below 0.6 x best is dropped
+    assert cut_candidates([0.9, 0.85, 0.6, 0.5, 0.1], min_k=1, elbow_min_gap=1) == 3
+    # Never below min_k, never above max_k
+    assert cut_candidates([0.9, 0.1, 0.05], min_k=2) == 2
+    assert cut_candidates([0.5] * 10, min_k=2, max_k=4) == 4
+    # Rank-fused order: the cut depends on the similarities, not their order
+    assert (
+        cut_candidates([0.49, 0.80, 0.78, 0.77, 0.50, 0.48], 2, elbow_min_gap=0.1) == 3
+    )
+
+
+def test_truncate_description_on_word_boundary():
+    text = "Mechanisms exist to   facilitate the implementation of controls."
+    assert truncate_description(text, 1000) == " ".join(text.split())
+    short = truncate_description(text, 30)
+    assert short.endswith("…")
+    assert len(short) <= 30
+    assert short == "Mechanisms exist to…"
+
+
+def test_build_context_respects_token_budget_and_logs_savings():
+    controls = make_controls(20, description="x " * 400)
+    context, stats = build_context(
+        controls, [0.9] * 20, token_budget=200, max_description_chars=100
+    )
+
+    assert stats.tokens <= 200
+    assert 0 < stats.included < 20
+    assert context.count("\n") == stats.included - 1
+    assert stats.tokens_saved > 0
+    assert stats.tokens == sum(
+        estimate_tokens(line) + 1 for line in context.split("\n")
+    )
+
+
+def test_build_context_always_keeps_best_candidate():
+    context, stats = build_context(make_controls(3), None, token_budget=1)
+    assert stats.included == 1
+    assert context.startswith("[GOV-00] Governance: Short description.")
+
+
+def test_context_token_budget(monkeypatch):
+    monkeypatch.delenv("SCF_CONTEXT_TOKEN_BUDGET", raising=False)
+    assert context_token_budget("unknown-model") == DEFAULT_CONTEXT_TOKEN_BUDGET
+    monkeypatch.setenv("SCF_CONTEXT_TOKEN_BUDGET", "1234")
+    assert context_token_budget("llama-3.1-8b-instant") == 1234
+
+
+@pytest.mark.parametrize("text, tokens", [("", 0), ("abcd", 1), ("abcde", 2)])
+def test_estimate_tokens(text, tokens):
+    assert estimate_tokens(text) == tokens
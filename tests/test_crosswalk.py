@@ -0,0 +1,38 @@
+import numpy as np
+
+from src.crosswalk import Crosswalk, load_crosswalk
+
+RECORDS = [
+    {"control_id": "CRY-01", "regulations": {"GDPR": "Art 32", "SOC 2": "CC6.1"}},
+    {"control_id": "GOV-01", "regulations": {}},
+    {"control_id": "IAC-01", "regulations": {"SOC 2": "CC6.1", "DORA": "Art 9"}},
+]
+
+
+def test_crosswalk_from_records_is_csr_with_interned_strings():
+    crosswalk = Crosswalk.from_records(RECORDS)
+
+    assert crosswalk.frameworks == ["GDPR", "SOC 2", "DORA"]
+    assert crosswalk.requirements == ["Art 32", "CC6.1", "Art 9"]
+    assert crosswalk.indptr.tolist() == [0, 2, 2, 4]
+    assert crosswalk.nnz == 4
+    assert [crosswalk.regulations(r["control_id"]) for r in RECORDS] == [
+        r["regulations"] for r in RECORDS
+    ]
+    assert crosswalk.regulations("UNKNOWN") == {}
+    assert crosswalk.controls_for("SOC 2") == ["CRY-01", "IAC-01"]
+    assert crosswalk.controls_for("HIPAA") == []
+
+
+def test_crosswalk_save_load_roundtrip(tmp_path):
+    path = str(tmp_path / "crosswalk.npz")
+    crosswalk = Crosswalk.from_records(RECORDS)
+    crosswalk.save(path)
+
+    loaded = load_crosswalk(path)
+
+    assert loaded.control_ids == crosswalk.control_ids
+    assert loaded.frameworks == crosswalk.frameworks
+    assert np.array_equal(loaded.indptr, crosswalk.indptr)
+    assert list(loaded.iter_records()) == RECORDS
+    assert load_crosswalk(str(tmp_path / "missing.npz")) is None
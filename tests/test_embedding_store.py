@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+import src.embedding_store as store
+
+CONTROLS = [
+    {
+        "control_id": "GOV-01",
+        "domain": "Governance",
+        "description": "Security program.",
+    },
+    {"control_id": "CRY-01", "domain": "Cryptography", "description": "Encrypt data."},
+]
+
+
+class FakeEncoder:
+    """Deterministic stand-in for the sentence-transformers model."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(t), 1.0, 2.0] for t in texts], dtype=np.float32)
+
+
+@pytest.fixture(autouse=True)
+def isolated_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        store, "EMBEDDINGS_CACHE_FILE", str(tmp_path / "scf_embeddings.npy")
+    )
+    monkeypatch.setattr(
+        store, "EMBEDDINGS_MANIFEST_FILE", str(tmp_path / "scf_embeddings.json")
+    )
+    store.clear_cache()
+    yield
+    store.clear_cache()
+
+
+def test_embeddings_are_normalized_and_memory_mapped():
+    encoder = FakeEncoder()
+    matrix = store.load_embeddings(CONTROLS, "test-model", encoder)
+
+    assert isinstance(matrix, np.memmap)
+    assert matrix.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(matrix, axis=1), 1.0, rtol=1e-5)
+
+
+def test_same_version_is_served_from_process_cache():
+    encoder = FakeEncoder()
+    first = store.load_embeddings(CONTROLS, "test-model", encoder)
+    second = store.load_embeddings(CONTROLS, "test-model", encoder)
+
+    assert first is second
+    assert len(encoder.calls) == 1
+
+
+def test_disk_store_is_reused_across_processes():
+    store.load_embeddings(CONTROLS, "test-model", FakeEncoder())
+    store.clear_cache()
+
+    encoder = FakeEncoder()
+    store.load_embeddings(CONTROLS, "test-model", encoder)
+    assert encoder.calls == []
+
+
+def test_changed_control_is_reencoded_incrementally():
+    store.load_embeddings(CONTROLS, "test-model", FakeEncoder())
+
+    updated = [CONTROLS[0], {**CONTROLS[1], "description": "Encrypt all data."}]
+    encoder = FakeEncoder()
+    matrix = store.load_embeddings(updated, "test-model", encoder)
+
+    assert encoder.calls == [["CRY-01 Cryptography: Encrypt all data."]]
+    assert matrix.shape == (2, 3)
+
+
+def test_model_change_invalidates_store():
+    store.load_embeddings(CONTROLS, "test-model", FakeEncoder())
+
+    encoder = FakeEncoder()
+    store.load_embeddings(CONTROLS, "other-model", encoder)
+    assert len(encoder.calls[0]) == 2
+
+
+def test_float16_storage():
+    matrix = store.load_embeddings(CONTROLS, "test-model", FakeEncoder(), "float16")
+    assert matrix.dtype == np.float16
@@ -1,8 +1,10 @@
+import json
 from unittest.mock import patch
 import pytest
 import requests
 from pydantic import ValidationError
 
+from src.crosswalk import Crosswalk
 from src.fetch_scf import SCFControl, setup_directories
 
 
@@ -116,3 +118,239 @@ def test_download_scf_no_xlsx_asset(mock_get, tmp_path, monkeypatch):
     }
     result = fetch_scf_module.download_scf()
     assert result is False
+
+
+# --- update_scf ---
+
+RELEASE = {
+    "tag_name": "2025.4",
+    "published_at": "2025-12-01T00:00:00Z",
+    "assets": [{"name": "scf.xlsx", "browser_download_url": "http://x/scf.xlsx"}],
+}
+CONTROL = {
+    "control_id": "CRY-01",
+    "domain": "Cryptography",
+    "description": "Encrypt data at rest.",
+    "weight": 5,
+    "erl": "",
+    "question": "",
+    "regulations": {"GDPR": "Art 32"},
+}
+
+
+@pytest.fixture
+def scf_files(tmp_path, monkeypatch):
+    import src.fetch_scf as fetch_scf_module
+
+    paths = {
+        "DATA_DIR": tmp_path,
+        "RAW_SCF_FILE": tmp_path / "scf_raw.xlsx",
+        "PARSED_JSON_FILE": tmp_path / "scf_parsed.json",
+        "RELEASE_STATE_FILE": tmp_path / "scf_release.json",
+        "CHANGELOG_FILE": tmp_path / "scf_changelog.jsonl",
+        "CROSSWALK_FILE": tmp_path / "scf_crosswalk.npz",
+    }
+    for name, path in paths.items():
+        monkeypatch.setattr(fetch_scf_module, name, str(path))
+    monkeypatch.setattr(fetch_scf_module, "write_compact_db", lambda records: None)
+    monkeypatch.setattr(
+        fetch_scf_module, "write_regulation_index", lambda records: None
+    )
+    monkeypatch.setattr(fetch_scf_module, "write_bm25_index", lambda records: None)
+    monkeypatch.setattr(
+        fetch_scf_module,
+        "_download_file",
+        lambda url, path: open(path, "wb").close(),
+    )
+    return paths
+
+
+def _api_response(status=200, etag='"v1"'):
+    response = requests.Response()
+    response.status_code = status
+    response.headers["ETag"] = etag
+    response._content = json.dumps(RELEASE).encode() if status == 200 else b""
+    return response
+
+
+def test_update_scf_applies_new_release_and_writes_changelog(scf_files):
+    import src.fetch_scf as fetch_scf_module
+    from src.scf_diff import read_changelog
+
+    scf_files["PARSED_JSON_FILE"].write_text(json.dumps([CONTROL]))
+    new_records = [
+        {**CONTROL, "regulations": {"GDPR": "Art 32", "HIPAA": "164.312"}},
+        {**CONTROL, "control_id": "CRY-02"},
+    ]
+    data = (new_records, Crosswalk.from_records(new_records))
+    with (
+        patch("src.fetch_scf.requests.get", return_value=_api_response()),
+        patch.object(fetch_scf_module, "extract_scf_data", return_value=data),
+    ):
+        result = fetch_scf_module.update_scf()
+
+    assert result.status == fetch_scf_module.UPDATE_APPLIED
+    assert result.release == "2025.4"
+    assert result.diff["added"] == ["CRY-02"]
+    assert result.diff["changed"]["CRY-01"] == {
+        "regulations": {"added": {"HIPAA": "164.312"}}
+    }
+    assert json.loads(scf_files["PARSED_JSON_FILE"].read_text()) == new_records
+    assert fetch_scf_module.load_release_state()["etag"] == '"v1"'
+    assert scf_files["CROSSWALK_FILE"].exists()
+
+    (entry,) = read_changelog(str(scf_files["CHANGELOG_FILE"]))
+    assert entry["release"] == "2025.4"
+    assert entry["summary"]["added"] == 1
+    assert entry["summary"]["regulations_changed"] == 1
+
+
+def test_update_scf_skips_download_when_etag_matches(scf_files):
+    import src.fetch_scf as fetch_scf_module
+
+    scf_files["RAW_SCF_FILE"].write_bytes(b"xlsx")
+    scf_files["PARSED_JSON_FILE"].write_text(json.dumps([CONTROL]))
+    fetch_scf_module.save_release_state({"tag": "2025.4", "etag": '"v1"'})
+
+    with (
+        patch(
+            "src.fetch_scf.requests.get", return_value=_api_response(status=304)
+        ) as mock_get,
+        patch.object(fetch_scf_module, "extract_scf_data") as mock_extract,
+    ):
+        result = fetch_scf_module.update_scf()
+
+    assert result.status == fetch_scf_module.UPDATE_UNCHANGED
+    assert mock_get.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+    mock_extract.assert_not_called()
+    assert not scf_files["CHANGELOG_FILE"].exists()
+
+
+def test_update_scf_force_redownloads_and_rewrites(scf_files):
+    import src.fetch_scf as fetch_scf_module
+
+    scf_files["RAW_SCF_FILE"].write_bytes(b"partial")
+    scf_files["PARSED_JSON_FILE"].write_text(json.dumps([CONTROL]))
+    Crosswalk.from_records([CONTROL]).save(str(scf_files["CROSSWALK_FILE"]))
+    fetch_scf_module.save_release_state({"tag": "2025.4", "etag": '"v1"'})
+    data = ([CONTROL], Crosswalk.from_records([CONTROL]))
+
+    with (
+        patch("src.fetch_scf.requests.get", return_value=_api_response()) as mock_get,
+        patch.object(fetch_scf_module, "extract_scf_data", return_value=data),
+        patch.object(fetch_scf_module, "save_scf_records") as mock_save,
+    ):
+        result = fetch_scf_module.update_scf(force=True)
+
+    assert "If-None-Match" not in mock_get.call_args.kwargs.get("headers", {})
+    assert scf_files["RAW_SCF_FILE"].read_bytes() == b""  # downloaded again
+    mock_save.assert_called_once()
+    assert result.status == fetch_scf_module.UPDATE_APPLIED
+
+
+def test_update_scf_reports_network_failure(scf_files):
+    import src.fetch_scf as fetch_scf_module
+
+    with patch(
+        "src.fetch_scf.requests.get",
+        side_effect=requests.exceptions.ConnectionError("offline"),
+    ):
+        result = fetch_scf_module.update_scf()
+
+    assert result.status == fetch_scf_module.UPDATE_FAILED
+    assert "offline" in result.error
+
+
+# --- extract_scf_records ---
+
+
+def test_extract_scf_records_projects_columns_and_skips_invalid(tmp_path):
+    from openpyxl import Workbook
+
+    from src.fetch_scf import extract_scf_records
+
+    workbook = Workbook()
+    workbook.active.title = "Domains & Principles"
+    sheet = workbook.create_sheet("SCF 2025.4")
+    sheet.append(
+        [
+            "SCF Domain",
+            "SCF #",
+            "Control Description",
+            "Unrelated Column",
+            "Relative Control Weighting",
+            "GDPR\nArticles",
+            "HIPAA",
+        ]
+    )
+    sheet.append(["Cryptography", "CRY-01", "Encrypt.", "x", 5, "Art 32", 164.0])
+    sheet.append(["Cryptography", "CRY-02", "Rotate keys.", "x", "high", "", None])
+    sheet.append(["Cryptography", "BAD", "Invalid ID.", "x", 1, None, None])
+    sheet.append(["Cryptography", None, "No ID.", "x", 1, None, None])
+    path = tmp_path / "scf.xlsx"
+    workbook.save(path)
+
+    records = extract_scf_records(str(path))
+
+    assert records == [
+        {
+            "control_id": "CRY-01",
+            "domain": "Cryptography",
+            "description": "Encrypt.",
+            "weight": 5,
+            "erl": "",
+            "question": "",
+            "regulations": {"GDPR Articles": "Art 32", "HIPAA": "164"},
+        },
+        {
+            "control_id": "CRY-02",
+            "domain": "Cryptography",
+            "description": "Rotate keys.",
+            "weight": 1,
+            "erl": "",
+            "question": "",
+            "regulations": {},
+        },
+    ]
+
+
+def test_extract_scf_data_builds_crosswalk_from_selected_frameworks(tmp_path):
+    from openpyxl import Workbook
+
+    from src.fetch_scf import extract_scf_data, select_framework_columns
+
+    header = [
+        "SCF #",
+        "Control Description",
+        "Relative Control Weighting",
+        "SCF CORE\nFundamentals",
+        "FedRAMP\nR5 (moderate)",
+        "EMEA\nEU\nDORA",
+        "Risk\nR-AC-1",
+    ]
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "SCF 2025.4"
+    sheet.append(header)
+    sheet.append(["CRY-01", "Encrypt.", 5, "x", "SC-28", "Art 9", "x"])
+    sheet.append(["CRY-02", "Rotate keys.", 5, "x", None, "Art 9", None])
+    path = tmp_path / "scf.xlsx"
+    workbook.save(path)
+
+    assert select_framework_columns(header, "all") == [
+        "FedRAMP\nR5 (moderate)",
+        "EMEA\nEU\nDORA",
+    ]
+    assert select_framework_columns(header, "fedramp") == ["FedRAMP\nR5 (moderate)"]
+
+    records, crosswalk = extract_scf_data(str(path), frameworks="all")
+
+    assert [r["regulations"] for r in records] == [{}, {}]
+    assert crosswalk.frameworks == ["FedRAMP R5 (moderate)", "EMEA EU DORA"]
+    assert crosswalk.regulations("CRY-01") == {
+        "FedRAMP R5 (moderate)": "SC-28",
+        "EMEA EU DORA": "Art 9",
+    }
+    assert crosswalk.controls_for("EMEA EU DORA") == ["CRY-01", "CRY-02"]
+    # Identical cells are interned once
+    assert crosswalk.requirements == ["SC-28", "Art 9"]
@@ -0,0 +1,74 @@
+import io
+import json
+import threading
+
+import pytest
+
+from src.finding_reader import FindingReader, iter_findings, prefetch, scan_findings
+
+FINDINGS = [
+    {"Id": "arn:1", "Title": "S3 bucket public", "Count": 12345, "Ok": True},
+    {"Id": "arn:2", "Title": "Ünïcode ✓", "Nested": {"a": [1, 2.5, None]}},
+    {"Id": "arn:3", "Title": "MFA disabled"},
+]
+
+
+def read_all(text: str, read_size: int = 7, binary: bool = False) -> list:
+    stream = io.BytesIO(text.encode("utf-8")) if binary else io.StringIO(text)
+    return list(iter_findings(stream, read_size=read_size))
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_findings_document_streamed_with_tiny_reads(binary):
+    doc = json.dumps({"NextToken": "x", "Findings": FINDINGS, "Other": [1]})
+    assert read_all(doc, binary=binary) == FINDINGS
+
+
+def test_asff_jsonl_and_concatenated_pages():
+    jsonl = "\n".join(json.dumps(f) for f in FINDINGS) + "\n"
+    assert read_all(jsonl) == FINDINGS
+
+    pages = json.dumps({"Findings": FINDINGS[:2], "NextToken": "t"}) + json.dumps(
+        {"Findings": FINDINGS[2:]}
+    )
+    assert read_all(pages) == FINDINGS
+
+    page_array = json.dumps([{"Findings": FINDINGS[:1]}, {"Findings": FINDINGS[1:]}])
+    assert read_all(page_array) == FINDINGS
+
+
+def test_scan_findings_distinguishes_single_object():
+    single = io.BytesIO(b'\xef\xbb\xbf{"Title": "one"}')
+    assert scan_findings(single) == (False, 1, {"Title": "one"})
+
+    export = io.StringIO(json.dumps({"Findings": FINDINGS}))
+    assert scan_findings(export) == (True, 3, FINDINGS[0])
+
+
+def test_reader_rejects_malformed_input():
+    with pytest.raises(ValueError):
+        list(FindingReader(io.StringIO('{"Findings": [{"a": 1} {"b": 2}]}')))
+    with pytest.raises(ValueError):
+        list(FindingReader(io.StringIO('{"Findings": [{"a": 1}')))
+
+
+def test_prefetch_is_bounded_and_propagates_errors():
+    produced = []
+    release = threading.Event()
+
+    def source():
+        for i in range(100):
+            produced.append(i)
+            yield i
+        release.wait(1)
+        raise RuntimeError("boom")
+
+    items = prefetch(source(), maxsize=4)
+    assert next(items) == 0
+    # The producer can only run ahead by the queue size (plus one in hand)
+    threading.Event().wait(0.3)
+    assert len(produced) <= 6
+
+    release.set()
+    with pytest.raises(RuntimeError, match="boom"):
+        list(items)
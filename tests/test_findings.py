@@ -0,0 +1,65 @@
+import json
+from unittest.mock import patch
+
+from src.findings import canonicalize_finding, group_findings
+
+
+def _finding(bucket, account="123456789012", title="S3.8 Block public access"):
+    return {
+        "Id": f"arn:aws:securityhub:us-east-1:{account}:finding/{bucket}",
+        "GeneratorId": "aws-foundational-security-best-practices/v/1.0.0/S3.8",
+        "AwsAccountId": account,
+        "CreatedAt": "2024-01-01T00:00:00Z",
+        "UpdatedAt": "2024-01-02T00:00:00Z",
+        "Title": title,
+        "Description": f"Bucket policy allows public access in {account}.",
+        "Resources": [
+            {"Type": "AwsS3Bucket", "Id": f"arn:aws:s3:::{bucket}", "Region": "eu"}
+        ],
+        "Compliance": {"Status": "FAILED", "SecurityControlId": "S3.8"},
+    }
+
+
+def test_canonicalize_strips_volatile_fields():
+    canonical = canonicalize_finding(_finding("bucket-a"))
+
+    assert "Id" not in canonical
+    assert "AwsAccountId" not in canonical
+    assert "CreatedAt" not in canonical
+    assert canonical["Resources"] == [{"Type": "AwsS3Bucket"}]
+    assert "123456789012" not in json.dumps(canonical)
+
+
+def test_group_findings_collapses_same_control_failure():
+    findings = [
+        _finding("bucket-a"),
+        _finding("bucket-b", account="210987654321"),
+        _finding("bucket-c", title="S3.1 Other check"),
+        _finding("bucket-d"),
+    ]
+
+    texts, assignment = group_findings(findings)
+
+    assert len(texts) == 2
+    assert assignment == [0, 0, 1, 0]
+
+
+def test_group_findings_keeps_non_asff_items_separate():
+    texts, assignment = group_findings([{"foo": 1}, {"foo": 2}, {"foo": 1}, "raw"])
+    assert len(texts) == 3
+    assert assignment == [0, 1, 0, 2]
+
+
+@patch("src.mapper.map_batch_to_scf")
+def test_map_findings_fans_results_out(mock_batch):
+    from src.mapper import map_findings_to_scf
+
+    mock_batch.side_effect = lambda texts, **kwargs: [f"result-{t}" for t in texts]
+    findings = [_finding("a"), _finding("b"), _finding("c", title="Other")]
+
+    results = map_findings_to_scf(findings)
+
+    assert len(mock_batch.call_args.args[0]) == 2
+    assert results[0] == results[1]
+    assert results[0] != results[2]
+    assert len(results) == 3
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+from src.gap_analysis import (
+    MATCH_BY_ID,
+    MATCH_BY_NAME,
+    STATUS_COVERED,
+    STATUS_GAP,
+    UNMATCHED,
+    build_gap_table,
+    coverage_matrix,
+    covered_control_ids,
+    detect_inventory_columns,
+    resolve_inventory,
+)
+
+SCF_IDS = ["GOV-01", "GOV-02", "CRY-01", "IAC-06"]
+
+INVENTORY = pd.DataFrame(
+    {
+        "Control ID": ["gov-01 ", "SEC-01", "CRY-02", "IAM-01", "SEC-01"],
+        "Control Name": [
+            "Security program",
+            "Information Security Policy",
+            "Data Encryption in Transit",
+            "Favourite colour",
+            "Information Security Policy",
+        ],
+        "Status": ["Implemented"] * 5,
+    }
+)
+
+NAME_MATCHES = {
+    "Information Security Policy": ("GOV-02", 0.81),
+    "Data Encryption in Transit": ("CRY-01", 0.74),
+    "Favourite colour": ("GOV-01", 0.12),
+}
+
+
+def fake_match_names(names):
+    fake_match_names.calls.append(list(names))
+    ids, scores = zip(*(NAME_MATCHES[n] for n in names))
+    return list(ids), np.array(scores)
+
+
+fake_match_names.calls = []
+
+
+def test_detect_inventory_columns():
+    assert detect_inventory_columns(INVENTORY) == ("Control ID", "Control Name")
+    assert detect_inventory_columns(pd.DataFrame({"ref": [], "owner": []})) == (
+        "ref",
+        None,
+    )
+
+
+def test_resolve_inventory_matches_ids_then_names():
+    fake_match_names.calls = []
+    resolved = resolve_inventory(INVENTORY, SCF_IDS, match_names=fake_match_names)
+
+    assert resolved["SCF Control ID"].tolist()[:3] == ["GOV-01", "GOV-02", "CRY-01"]
+    assert pd.isna(resolved["SCF Control ID"].iloc[3])
+    assert resolved["Match Type"].tolist() == [
+        MATCH_BY_ID,
+        MATCH_BY_NAME,
+        MATCH_BY_NAME,
+        UNMATCHED,
+        MATCH_BY_NAME,
+    ]
+    # Unresolved names are embedded once, in a single batch
+    assert fake_match_names.calls == [
+        [
+            "Information Security Policy",
+            "Data Encryption in Transit",
+            "Favourite colour",
+        ]
+    ]
+    assert covered_control_ids(resolved) == {"GOV-01", "GOV-02", "CRY-01"}
+
+
+def test_resolve_inventory_without_name_matcher_uses_ids_only():
+    resolved = resolve_inventory(INVENTORY, SCF_IDS)
+    assert covered_control_ids(resolved) == {"GOV-01"}
+
+
+def test_build_gap_table_lists_matching_customer_controls():
+    resolved = resolve_inventory(INVENTORY, SCF_IDS, match_names=fake_match_names)
+    required = [
+        {"control_id": cid, "domain": "D", "description": cid} for cid in SCF_IDS
+    ]
+
+    table = build_gap_table(required, resolved)
+
+    assert table["Status"].tolist() == [
+        STATUS_COVERED,
+        STATUS_COVERED,
+        STATUS_COVERED,
+        STATUS_GAP,
+    ]
+    assert table.set_index("Required Control ID").loc["GOV-02", "Matched Controls"] == (
+        "SEC-01"
+    )
+
+
+def test_coverage_matrix_scores_every_framework():
+    frameworks = {
+        "ISO 27001 2022": ["GOV-01", "GOV-02"],
+        "AICPA SOC 2 (2017)": ["GOV-02", "CRY-01", "IAC-06"],
+        "Empty": [],
+    }
+
+    matrix = coverage_matrix(SCF_IDS, frameworks, {"GOV-02", "CRY-01"}).set_index(
+        "Framework"
+    )
+
+    assert matrix.loc["ISO 27001 2022", "Covered"] == 1
+    assert matrix.loc["AICPA SOC 2 (2017)", "Required"] == 3
+    assert matrix.loc["AICPA SOC 2 (2017)", "Gaps"] == 1
+    assert matrix.loc["AICPA SOC 2 (2017)", "Coverage %"] == 66.7
+    assert matrix.loc["Empty", "Coverage %"] == 0.0
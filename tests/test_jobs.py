@@ -0,0 +1,159 @@
+import threading
+
+from src.jobs import (
+    JOB_CANCELLED,
+    JOB_DONE,
+    JOB_FAILED,
+    JobRunner,
+    JobStore,
+)
+from src.mapper import MappedControl, MappingResult
+
+
+def _result(control_id):
+    return MappingResult(
+        mappings=[
+            MappedControl(
+                control_id=control_id,
+                domain="Cryptography",
+                confidence=90,
+                justification="Encryption at rest.",
+            )
+        ]
+    )
+
+
+def test_store_roundtrips_inputs_and_results(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    job_id = store.create_job(
+        iter([{"Title": "a"}, {"Title": "b"}, "text"]), {"top_k": 3}, "export.json"
+    )
+
+    job = store.get_job(job_id)
+    assert job["total"] == 3
+    assert job["params"] == {"top_k": 3}
+    assert store.active_job_ids() == [job_id]
+    assert store.pending_items(job_id, 2) == [(0, {"Title": "a"}), (1, {"Title": "b"})]
+
+    store.record_results(job_id, [(0, _result("CRY-01")), (1, ValueError("bad"))])
+
+    job = store.get_job(job_id)
+    assert (job["completed"], job["failed"]) == (2, 1)
+    assert store.pending_items(job_id, 10) == [(2, "text")]
+    first, second, third = store.iter_results(job_id)
+    assert first.mappings[0].control_id == "CRY-01"
+    assert str(second) == "bad"
+    assert third is None
+
+
+def test_runner_maps_job_in_chunks(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    calls = []
+
+    def map_chunk(items, params):
+        calls.append((list(items), params))
+        return [_result(f"C-{item}") for item in items]
+
+    runner = JobRunner(store, map_chunk=map_chunk, chunk_size=2)
+    job_id = runner.submit(["1", "2", "3"], {"mode": "fast"})
+    runner.wait(job_id, timeout=5)
+
+    assert calls == [(["1", "2"], {"mode": "fast"}), (["3"], {"mode": "fast"})]
+    assert store.get_job(job_id)["status"] == JOB_DONE
+    assert [r.mappings[0].control_id for r in store.iter_results(job_id)] == [
+        "C-1",
+        "C-2",
+        "C-3",
+    ]
+
+
+def test_runner_maps_duplicates_once_across_chunks(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    calls = []
+
+    def map_chunk(items, params):
+        calls.append(list(items))
+        return [
+            ValueError("bad") if item["Title"] == "b" else _result(item["Title"])
+            for item in items
+        ]
+
+    # The duplicates of "a" and "b" fall in later chunks of one input each
+    findings = [
+        {"Id": "1", "Title": "a"},
+        {"Id": "2", "Title": "b"},
+        {"Id": "3", "Title": "a"},
+        {"Id": "4", "Title": "c"},
+        {"Id": "5", "Title": "b"},
+    ]
+    runner = JobRunner(store, map_chunk=map_chunk, chunk_size=1)
+    job_id = runner.submit(findings, {})
+    runner.wait(job_id, timeout=5)
+
+    assert [item["Id"] for (item,) in calls] == ["1", "2", "4"]
+    job = store.get_job(job_id)
+    assert (job["status"], job["completed"], job["failed"]) == (JOB_DONE, 5, 2)
+    results = list(store.iter_results(job_id))
+    assert [results[i].mappings[0].control_id for i in (0, 2, 3)] == ["a", "a", "c"]
+    assert [str(results[i]) for i in (1, 4)] == ["bad", "bad"]
+
+
+def test_interrupted_job_resumes_from_first_pending_input(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    store = JobStore(path)
+    job_id = store.create_job(["1", "2", "3"], {})
+    store.record_results(job_id, [(0, _result("C-1"))])
+
+    # A fresh runner (e.g. after a restart) only maps what is still pending
+    seen = []
+
+    def map_chunk(items, params):
+        seen.extend(items)
+        return [_result(f"C-{item}") for item in items]
+
+    runner = JobRunner(JobStore(path), map_chunk=map_chunk)
+    assert runner.resume_interrupted() == [job_id]
+    runner.wait(job_id, timeout=5)
+
+    assert seen == ["2", "3"]
+    assert store.get_job(job_id)["completed"] == 3
+    assert store.get_job(job_id)["status"] == JOB_DONE
+
+
+def test_cancel_stops_after_current_chunk(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    started = threading.Event()
+    release = threading.Event()
+
+    def map_chunk(items, params):
+        started.set()
+        release.wait(5)
+        return [_result("C") for _ in items]
+
+    runner = JobRunner(store, map_chunk=map_chunk, chunk_size=1)
+    job_id = runner.submit(["1", "2", "3"], {})
+    assert started.wait(5)
+    runner.cancel(job_id)
+    release.set()
+    runner.wait(job_id, timeout=5)
+
+    job = store.get_job(job_id)
+    assert job["status"] == JOB_CANCELLED
+    assert job["completed"] == 1
+    assert store.active_job_ids() == []
+
+
+def test_failed_chunk_marks_job_failed(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+
+    def map_chunk(items, params):
+        raise RuntimeError("SCF database not found")
+
+    runner = JobRunner(store, map_chunk=map_chunk)
+    job_id = runner.submit(["1"], {})
+    runner.wait(job_id, timeout=5)
+
+    job = store.get_job(job_id)
+    assert job["status"] == JOB_FAILED
+    assert job["error"] == "SCF database not found"
+    assert job["completed"] == 0
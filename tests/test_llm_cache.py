@@ -0,0 +1,88 @@
+from unittest.mock import patch
+
+from langchain_core.runnables import RunnableLambda
+
+from src import llm_cache
+from src.llm_cache import ResponseCache, make_cache_key
+from src.mapper import MappedControl, MappingResult, _build_mapping_prompt
+
+
+def test_cache_roundtrip_and_counters(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    assert cache.get("k") is None
+    cache.set("k", "value")
+    assert cache.get("k") == "value"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_cache_entries_expire_after_ttl(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=60)
+    with patch("src.llm_cache.time.time", return_value=1000.0):
+        cache.set("k", "value")
+    with patch("src.llm_cache.time.time", return_value=1061.0):
+        assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=0, max_entries=2)
+    with patch("src.llm_cache.time.time", return_value=1.0):
+        cache.set("a", "1")
+    with patch("src.llm_cache.time.time", return_value=2.0):
+        cache.set("b", "2")
+    with patch("src.llm_cache.time.time", return_value=3.0):
+        cache.get("a")  # "b" is now the least recently used
+    with patch("src.llm_cache.time.time", return_value=4.0):
+        cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_key_depends_on_every_part():
+    base = make_cache_key("prompt", "model", 3, "", "v1")
+    assert base == make_cache_key("prompt", "model", 3, "", "v1")
+    assert base != make_cache_key("prompt", "model", 5, "", "v1")
+    assert base != make_cache_key("prompt", "model", 3, "", "v2")
+
+
+def test_cached_response_is_revalidated(tmp_path, monkeypatch):
+    """A cache hit skips the LLM and is re-checked against the current SCF dict."""
+    from src.mapper import _map_with_chain
+
+    monkeypatch.setattr(
+        llm_cache, "_response_cache", ResponseCache(str(tmp_path / "c.sqlite"))
+    )
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_ENABLED", True)
+
+    calls = []
+
+    def fake_llm(_prompt_value):
+        calls.append(1)
+        return MappingResult(
+            mappings=[
+                MappedControl(
+                    control_id=cid, domain="D", confidence=90, justification="J"
+                )
+                for cid in ("GOV-01", "CRY-01")
+            ]
+        )
+
+    chain = _build_mapping_prompt() | RunnableLambda(fake_llm)
+    controls = [{"control_id": "GOV-01", "domain": "D", "description": "x"}]
+
+    scf_dict = {"GOV-01": {}, "CRY-01": {}}
+    first = _map_with_chain(chain, "input", controls, scf_dict, 3, scf_version="v1")
+    # CRY-01 no longer exists in the SCF dict the second time round
+    second = _map_with_chain(
+        chain, "input", controls, {"GOV-01": {}}, 3, scf_version="v1"
+    )
+
+    assert len(calls) == 1
+    assert [m.control_id for m in first.mappings] == ["GOV-01", "CRY-01"]
+    assert [m.control_id for m in second.mappings] == ["GOV-01"]
@@ -1,4 +1,9 @@
+import os
+import subprocess  # nosec B404
+import sys
 from unittest.mock import patch
+import pytest
+from src.llm_cache import ResponseCache
 from src.mapper import construct_scf_context, MappedControl, ScopeRecommendation
 
 # --- Dummy Data ---
@@ -17,6 +22,14 @@ DUMMY_SCF_DATA = [
     },
 ]
 
+
+@pytest.fixture(autouse=True)
+def isolated_response_cache(tmp_path, monkeypatch):
+    """Keep mapped responses in a per-test cache instead of data/llm_cache.sqlite."""
+    cache = ResponseCache(str(tmp_path / "llm_cache.sqlite"))
+    monkeypatch.setattr("src.mapper.get_response_cache", lambda: cache)
+
+
 # --- Tests ---
 
 
@@ -64,3 +77,412 @@ def test_mapper_handles_empty_db(mock_load):
 
     assert map_text_to_scf("Test policy") is None
     assert analyze_audit_scope("Test scope") is None
+
+
+@patch("src.mapper._semantic_candidates_batch")
+@patch("src.mapper._build_mapping_chain")
+@patch("src.mapper._map_with_chain")
+@patch("src.mapper.load_scf_database")
+def test_map_batch_preserves_order_and_reports_progress(
+    mock_load, mock_map, mock_chain, mock_filter
+):
+    """Batch results come back in input order, failures are captured per input."""
+    from src.mapper import MappingResult, map_batch_to_scf
+    from src.scf_repository import SCFRepository
+
+    mock_load.return_value = SCFRepository(DUMMY_SCF_DATA)
+    mock_filter.return_value = [(DUMMY_SCF_DATA, [0.9, 0.5])] * 3
+
+    def fake_map(chain, text, filtered_scf, scf_dict, top_k, **kwargs):
+        if text == "boom":
+            raise RuntimeError("LLM failure")
+        return MappingResult(
+            mappings=[
+                MappedControl(
+                    control_id=text,
+                    domain="Test",
+                    confidence=90,
+                    justification="Test.",
+                )
+            ]
+        )
+
+    mock_map.side_effect = fake_map
+    progress = []
+
+    results = map_batch_to_scf(
+        ["GOV-01", "boom", "CRY-01"],
+        concurrency=3,
+        progress_callback=lambda done, total: progress.append((done, total)),
+    )
+
+    assert results[0].mappings[0].control_id == "GOV-01"
+    assert isinstance(results[1], RuntimeError)
+    assert results[2].mappings[0].control_id == "CRY-01"
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+    mock_filter.assert_called_once()
+
+
+@patch("src.mapper.load_scf_database")
+def test_map_batch_handles_empty_db(mock_load):
+    mock_load.return_value = []
+
+    from src.mapper import map_batch_to_scf
+
+    assert map_batch_to_scf(["a", "b"]) == [None, None]
+    assert map_batch_to_scf([]) == []
+
+
+@patch("src.mapper._build_or_load_embeddings")
+@patch("src.mapper._get_embedding_model")
+def test_semantic_filter_batch_encodes_once(mock_model, mock_embeddings):
+    """All queries of a batch are embedded with a single encode call."""
+    import numpy as np
+
+    from src.mapper import _semantic_filter_batch
+
+    mock_embeddings.return_value = np.array([[1.0, 0.0], [0.0, 1.0]])
+    mock_model.return_value.encode.return_value = np.array([[0.0, 1.0], [1.0, 0.1]])
+
+    results = _semantic_filter_batch(["crypto", "governance"], DUMMY_SCF_DATA, top_k=1)
+
+    mock_model.return_value.encode.assert_called_once()
+    assert [r[0]["control_id"] for r in results] == ["CRY-01", "GOV-01"]
+
+
+@pytest.mark.parametrize(
+    "hybrid,expected", [(True, ["GOV-01", "CRY-01"]), (False, ["GOV-01", "NET-01"])]
+)
+@patch("src.mapper._build_or_load_embeddings")
+@patch("src.mapper._get_embedding_model")
+def test_hybrid_retrieval_surfaces_exact_token_matches(
+    mock_model, mock_embeddings, hybrid, expected
+):
+    """A control the embeddings miss is fused in when the query names its tokens."""
+    import numpy as np
+
+    from src.mapper import _semantic_candidates_batch
+    from src.scf_repository import SCFRepository
+
+    network = {
+        "control_id": "NET-01",
+        "domain": "Network Security",
+        "description": "Segment networks.",
+        "regulations": {},
+    }
+    repo = SCFRepository(DUMMY_SCF_DATA + [network])
+    mock_embeddings.return_value = np.array([[1.0, 0.0], [0.0, 1.0], [0.7, 0.7]])
+    mock_model.return_value.encode.return_value = np.array([[1.0, 0.05]])
+
+    with patch("src.mapper.HYBRID_RETRIEVAL", hybrid):
+        ((controls, scores),) = _semantic_candidates_batch(
+            ["AES-256 not enforced"], repo, top_k=2
+        )
+
+    assert [c["control_id"] for c in controls] == expected
+    assert list(scores) == sorted(scores, reverse=True)
+
+
+@patch("src.mapper._build_or_load_embeddings")
+@patch("src.mapper._get_embedding_model")
+def test_hybrid_retrieval_keeps_dense_context_size(mock_model, mock_embeddings):
+    """Fusion reorders candidates but cut_candidates keeps as many as dense-only."""
+    import numpy as np
+
+    from src.context_builder import cut_candidates
+    from src.mapper import _semantic_candidates_batch
+    from src.scf_repository import SCFRepository
+
+    controls = [
+        {
+            "control_id": f"GEN-{i:02d}",
+            "domain": "General",
+            "description": "Rotate KMS keys." if i == 19 else "Generic safeguard.",
+            "regulations": {},
+        }
+        for i in range(20)
+    ]
+    # Ten controls close to the query, ten far away; GEN-19 is the farthest
+    angles = np.array([0.05 * i if i < 10 else 1.4 + 0.01 * i for i in range(20)])
+    mock_embeddings.return_value = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+    mock_model.return_value.encode.return_value = np.array([[1.0, 0.0]])
+    repo = SCFRepository(controls)
+
+    results = {}
+    for hybrid in (False, True):
+        with patch("src.mapper.HYBRID_RETRIEVAL", hybrid):
+            ((candidates, scores),) = _semantic_candidates_batch(
+                ["KMS keys are not rotated"], repo, top_k=20
+            )
+        keep = cut_candidates(scores)
+        results[hybrid] = [c["control_id"] for c in candidates[:keep]]
+        assert scores == pytest.approx(
+            np.cos(angles[[int(c["control_id"][4:]) for c in candidates]])
+        )
+
+    assert len(results[True]) == len(results[False]) == 10
+    assert "GEN-19" not in results[False]
+    assert results[True][0] == "GEN-19"
+
+
+@patch("src.mapper.load_scf_database")
+@patch("src.mapper._build_or_load_embeddings")
+@patch("src.mapper._get_embedding_model")
+def test_match_control_names_embeds_unique_names_once(
+    mock_model, mock_embeddings, mock_load
+):
+    import numpy as np
+
+    from src.mapper import match_control_names_to_scf
+
+    mock_load.return_value = DUMMY_SCF_DATA
+    mock_embeddings.return_value = np.array([[1.0, 0.0], [0.0, 1.0]])
+    mock_model.return_value.encode.return_value = np.array([[0.0, 1.0], [1.0, 0.0]])
+
+    ids, scores = match_control_names_to_scf(
+        ["Encryption at Rest", "Security Program", "Encryption at Rest"]
+    )
+
+    mock_model.return_value.encode.assert_called_once()
+    assert mock_model.return_value.encode.call_args[0][0] == [
+        "Encryption at Rest",
+        "Security Program",
+    ]
+    assert ids == ["CRY-01", "GOV-01", "CRY-01"]
+    assert scores.tolist() == pytest.approx([1.0, 1.0, 1.0])
+
+
+@pytest.mark.parametrize(
+    "mode, expected_llm_inputs", [("fast", []), ("hybrid", ["vague"])]
+)
+@patch("src.mapper._rerank_batch")
+@patch("src.mapper._semantic_candidates_batch")
+@patch("src.mapper._build_mapping_chain")
+@patch("src.mapper._map_with_chain")
+@patch("src.mapper.load_scf_database")
+def test_map_batch_reranker_skips_llm_for_clear_matches(
+    mock_load,
+    mock_map,
+    mock_chain,
+    mock_filter,
+    mock_rerank,
+    mode,
+    expected_llm_inputs,
+):
+    import numpy as np
+
+    from src.mapper import MappingResult, map_batch_to_scf
+    from src.scf_repository import SCFRepository
+
+    mock_load.return_value = SCFRepository(DUMMY_SCF_DATA)
+    mock_filter.return_value = [(DUMMY_SCF_DATA, np.array([0.9, 0.5]))] * 2
+    mock_rerank.return_value = [
+        (DUMMY_SCF_DATA[::-1], np.array([6.2, 1.5])),  # clear winner
+        (DUMMY_SCF_DATA, np.array([2.1, 1.9])),  # ambiguous
+    ]
+    mock_map.side_effect = lambda chain, text, *a, **k: MappingResult(mappings=[])
+
+    results = map_batch_to_scf(["encrypt at rest", "vague"], top_k=1, mode=mode)
+
+    assert [c.args[1] for c in mock_map.call_args_list] == expected_llm_inputs
+    assert results[0].mappings[0].control_id == "CRY-01"
+    # Reranker scores are not a calibrated confidence, so none is reported
+    assert results[0].mappings[0].confidence is None
+    assert "cross-encoder score 6.20" in results[0].mappings[0].justification
+    if mode == "fast":
+        mock_chain.assert_not_called()
+        assert results[1].mappings[0].control_id == "GOV-01"
+
+
+def test_pack_inputs_groups_by_candidate_overlap():
+    from src.mapper import _pack_inputs
+
+    def cands(*ids):
+        return ([{"control_id": cid} for cid in ids], [0.5] * len(ids))
+
+    candidates = [
+        cands("CRY-01", "CRY-02", "CRY-03"),
+        cands("IAC-01", "IAC-02"),
+        cands("CRY-01", "CRY-02", "CRY-04"),
+        cands("CRY-02", "CRY-03"),
+        cands("IAC-01", "IAC-03"),
+    ]
+
+    assert _pack_inputs(range(5), candidates, pack_size=2, min_overlap=0.3) == [
+        [0, 2],
+        [1, 4],
+        [3],
+    ]
+    assert _pack_inputs(range(5), candidates, pack_size=1) == [[i] for i in range(5)]
+
+
+@patch("src.mapper.get_response_cache", return_value=None)
+@patch("src.mapper._map_with_chain")
+def test_map_pack_validates_each_result_and_falls_back(mock_single, mock_cache):
+    from langchain_core.runnables import RunnableLambda
+
+    from src.mapper import (
+        MappingResult,
+        PackedMapping,
+        PackedMappingResult,
+        _map_pack_with_chain,
+    )
+
+    seen = {}
+
+    def fake_llm(inputs):
+        seen.update(inputs)
+        return PackedMappingResult(
+            results=[
+                PackedMapping(
+                    input_id=1,
+                    mappings=[
+                        MappedControl(
+                            control_id="CRY-01",
+                            domain="Cryptography",
+                            confidence=140,
+                            justification="Encryption.",
+                        ),
+                        MappedControl(
+                            control_id="FAKE-99",
+                            domain="Nope",
+                            confidence=50,
+                            justification="Hallucinated.",
+                        ),
+                    ],
+                )
+            ]
+        )
+
+    fallback = MappingResult(mappings=[])
+    mock_single.return_value = fallback
+    scf_dict = {c["control_id"]: c for c in DUMMY_SCF_DATA}
+
+    results = _map_pack_with_chain(
+        RunnableLambda(fake_llm),
+        "single-chain",
+        ["encrypt disks", "program charter"],
+        [(DUMMY_SCF_DATA[::-1], [0.9, 0.3]), (DUMMY_SCF_DATA, [0.8, 0.2])],
+        scf_dict,
+        top_k=2,
+    )
+
+    # One shared context holding the union of both inputs' candidates
+    assert seen["n_inputs"] == 2
+    assert seen["scf_context"].count("[CRY-01]") == 1
+    assert "INPUT 2:\nprogram charter" in seen["inputs"]
+    # Per-input validation: hallucinated ID dropped, confidence clamped, enriched
+    assert [m.control_id for m in results[0].mappings] == ["CRY-01"]
+    assert results[0].mappings[0].confidence == 100
+    assert results[0].mappings[0].regulations == DUMMY_SCF_DATA[1]["regulations"]
+    # The omitted input is mapped on its own
+    assert results[1] is fallback
+    assert mock_single.call_args.args[:2] == ("single-chain", "program charter")
+
+
+def test_mapper_import_defers_heavy_dependencies():
+    """Importing the mapping stack must not load torch / LangChain / pandas."""
+    code = (
+        "import sys, src.mapper, src.jobs, src.fetch_scf; "
+        "print(sorted(m for m in ('torch', 'sentence_transformers', "
+        "'langchain_groq', 'pandas') if m in sys.modules))"
+    )
+    out = subprocess.run(  # nosec B603
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(__file__)),
+    ).stdout
+    assert out.strip() == "[]"
+
+
+@patch("src.mapper.get_reranker")
+@patch("src.mapper._get_vector_index")
+@patch("src.mapper.load_scf_database")
+@patch("src.mapper._get_embedding_model")
+def test_start_warmup_loads_models_once_per_mode(
+    mock_model, mock_load, mock_index, mock_reranker, monkeypatch
+):
+    from src import mapper
+
+    monkeypatch.setattr(mapper, "_warmup_threads", {})
+    mock_load.return_value = DUMMY_SCF_DATA
+
+    mapper.start_warmup("llm").join(5)
+    assert mapper.start_warmup("llm") is mapper.start_warmup("llm")
+    mock_model.assert_called_once()
+    mock_index.assert_called_once_with(DUMMY_SCF_DATA)
+    mock_reranker.assert_not_called()
+
+    mapper.start_warmup("fast").join(5)
+    mock_reranker.assert_called_once()
+
+
+def test_aggregate_candidates_rewards_section_wide_support():
+    from src.mapper import _aggregate_candidates
+
+    gov, cry = DUMMY_SCF_DATA
+    controls, scores = _aggregate_candidates(
+        [([cry, gov], [0.9, 0.7]), ([gov], [0.7]), ([gov], [0.7])], weight=0.5
+    )
+
+    # CRY-01 only matches one chunk: 0.5 * 0.9 + 0.5 * 0.3 = 0.6 < 0.7
+    assert [c["control_id"] for c in controls] == ["GOV-01", "CRY-01"]
+    assert scores.tolist() == pytest.approx([0.7, 0.6])
+
+
+@patch("src.mapper._semantic_candidates_batch")
+@patch("src.mapper._build_mapping_chain")
+@patch("src.mapper._map_with_chain")
+@patch("src.mapper.load_scf_database")
+def test_map_document_maps_sections_and_rolls_up(
+    mock_load, mock_map, mock_chain, mock_filter
+):
+    from src.mapper import MappingResult, map_document_to_scf
+    from src.scf_repository import SCFRepository
+
+    mock_load.return_value = SCFRepository(DUMMY_SCF_DATA)
+    mock_filter.side_effect = lambda texts, *args, **kwargs: [
+        (DUMMY_SCF_DATA, [0.9, 0.5]) for _ in texts
+    ]
+    confidences = {"1. Governance": 70, "2. Encryption": 95}
+
+    def fake_map(chain, text, filtered_scf, scf_dict, top_k, **kwargs):
+        heading = text.split("\n")[0]
+        if heading == "3. Broken":
+            raise RuntimeError("LLM failure")
+        return MappingResult(
+            mappings=[
+                MappedControl(
+                    control_id="CRY-01",
+                    domain="Cryptography",
+                    confidence=confidences[heading],
+                    justification=heading,
+                )
+            ]
+        )
+
+    mock_map.side_effect = fake_map
+    long_body = " ".join(["encrypt"] * 400)
+    document = (
+        f"1. Governance\nRun a security program.\n\n2. Encryption\n{long_body}"
+        "\n\n3. Broken\nText."
+    )
+
+    result = map_document_to_scf(document, concurrency=2)
+
+    # All chunks of all sections are retrieved in one batch
+    mock_filter.assert_called_once()
+    assert len(mock_filter.call_args.args[0]) > 3
+    assert [s.heading for s in result.sections] == [
+        "1. Governance",
+        "2. Encryption",
+        "3. Broken",
+    ]
+    assert result.sections[2].mapping is None
+    assert result.sections[2].error == "LLM failure"
+    (control,) = result.rollup
+    assert control.control_id == "CRY-01"
+    assert (control.confidence, control.justification) == (95, "2. Encryption")
+    assert control.sections == [0, 1]
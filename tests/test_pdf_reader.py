@@ -0,0 +1,73 @@
+from unittest.mock import patch
+
+from src import pdf_reader
+from src.pdf_reader import extract_pdf_pages
+
+
+def _make_pdf(page_texts):
+    """Minimal PDF with one line of Helvetica text per page ("" = blank page)."""
+    n = len(page_texts)
+    font_id = 3 + 2 * n
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids ["
+        + b" ".join(b"%d 0 R" % (3 + 2 * i) for i in range(n))
+        + b"] /Count %d >>" % n,
+    ]
+    for i, text in enumerate(page_texts):
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (font_id, 4 + 2 * i)
+        )
+        stream = b"BT /F1 12 Tf 72 720 Td (%s) Tj ET" % text.encode() if text else b""
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (i, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    return bytes(out)
+
+
+def test_extracts_pages_in_order_across_workers(tmp_path):
+    texts = [f"Policy page {i}" if i != 3 else "" for i in range(1, 8)]
+    progress = []
+
+    pages = list(
+        extract_pdf_pages(
+            _make_pdf(texts),
+            workers=2,
+            pages_per_task=2,
+            cache_dir=str(tmp_path),
+            progress_callback=lambda done, total: progress.append((done, total)),
+        )
+    )
+
+    # The blank page is skipped but keeps its place in the numbering
+    assert [p.number for p in pages] == [1, 2, 4, 5, 6, 7]
+    assert [p.text for p in pages] == [t for t in texts if t]
+    assert progress == [(2, 7), (4, 7), (6, 7), (7, 7)]
+
+
+def test_reupload_is_served_from_hash_cache(tmp_path):
+    data = _make_pdf(["Access control policy", "Encryption policy"])
+    first = list(extract_pdf_pages(data, workers=1, cache_dir=str(tmp_path)))
+
+    with patch.object(pdf_reader, "_extract_pages") as mock_extract:
+        again = list(extract_pdf_pages(data, workers=1, cache_dir=str(tmp_path)))
+
+    mock_extract.assert_not_called()
+    assert again == first
+    assert [p.text for p in again] == ["Access control policy", "Encryption policy"]
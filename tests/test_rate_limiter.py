@@ -0,0 +1,135 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src import rate_limiter
+from src.rate_limiter import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    RateLimitScheduler,
+    TokenBucket,
+    get_http_client,
+    is_transient_error,
+    parse_duration,
+    retry_after_seconds,
+)
+
+
+class FakeStatusError(Exception):
+    def __init__(self, status_code, headers=None, body=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+        self.body = body
+
+
+@pytest.mark.parametrize(
+    "value, seconds",
+    [("7.66s", 7.66), ("2m59.5s", 179.5), ("120ms", 0.12), ("3", 3.0), ("soon", None)],
+)
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == (pytest.approx(seconds) if seconds else None)
+
+
+def test_only_transient_errors_are_retried():
+    assert is_transient_error(FakeStatusError(429))
+    assert is_transient_error(FakeStatusError(503))
+    assert is_transient_error(TimeoutError())
+    assert not is_transient_error(FakeStatusError(400))
+    assert not is_transient_error(FakeStatusError(401))
+    assert not is_transient_error(ValueError("bad schema"))
+
+
+def test_malformed_model_output_is_retried():
+    from langchain_core.exceptions import OutputParserException
+
+    tool_use_failed = {"error": {"code": "tool_use_failed", "message": "..."}}
+    assert is_transient_error(FakeStatusError(400, body=tool_use_failed))
+    assert is_transient_error(
+        FakeStatusError(400, body={"code": "json_validate_failed"})
+    )
+    assert not is_transient_error(
+        FakeStatusError(400, body={"code": "invalid_request"})
+    )
+    assert is_transient_error(OutputParserException("not valid JSON"))
+
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(60, period=60.0)  # 1 unit per second
+    now = time.monotonic()
+    bucket.take(60, now)
+    assert bucket.wait_time(2, now) == pytest.approx(2.0, abs=0.05)
+    # Requests larger than the bucket are clamped instead of waiting forever
+    assert bucket.wait_time(1000, now + 60) == 0.0
+
+
+def test_scheduler_throttles_to_token_budget():
+    scheduler = RateLimitScheduler(rpm=6000, tpm=600)  # 10 tokens per second
+    start = time.monotonic()
+    scheduler.acquire(600)
+    scheduler.acquire(3)
+    assert time.monotonic() - start >= 0.25
+
+
+def test_scheduler_serves_interactive_requests_first():
+    scheduler = RateLimitScheduler(rpm=200, tpm=100_000)  # 1 request per 0.3s
+    scheduler.requests.take(200, time.monotonic())
+    order = []
+
+    def request(name, priority, delay):
+        time.sleep(delay)
+        scheduler.acquire(1, priority)
+        order.append(name)
+
+    threads = [
+        threading.Thread(target=request, args=("batch-1", PRIORITY_BATCH, 0.0)),
+        threading.Thread(target=request, args=("batch-2", PRIORITY_BATCH, 0.03)),
+        threading.Thread(target=request, args=("ui", PRIORITY_INTERACTIVE, 0.06)),
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+    assert order == ["ui", "batch-1", "batch-2"]
+
+
+def test_rate_limit_response_pauses_scheduler():
+    scheduler = RateLimitScheduler(rpm=6000, tpm=100_000)
+    error = FakeStatusError(
+        429, {"retry-after": "0.3", "x-ratelimit-remaining-tokens": "0"}
+    )
+    assert retry_after_seconds(error) == pytest.approx(0.3)
+
+    with pytest.raises(FakeStatusError), scheduler.slot(10):
+        raise error
+
+    start = time.monotonic()
+    scheduler.acquire(1)
+    assert time.monotonic() - start >= 0.25
+    assert scheduler.rate_limited == 1
+
+
+def test_every_groq_response_syncs_the_scheduler(monkeypatch):
+    import httpx
+
+    scheduler = RateLimitScheduler(rpm=30, tpm=6000)
+    monkeypatch.setattr(rate_limiter, "_scheduler", scheduler)
+    response = httpx.Response(
+        200,
+        headers={
+            "x-ratelimit-remaining-tokens": "1200",
+            "x-ratelimit-remaining-requests": "not a number",
+        },
+        request=httpx.Request(
+            "POST", "https://api.groq.com/openai/v1/chat/completions"
+        ),
+    )
+
+    for hook in get_http_client().event_hooks["response"]:
+        hook(response)
+
+    assert scheduler.tokens.level == pytest.approx(1200, abs=5)
+    assert scheduler.requests.level == pytest.approx(30)
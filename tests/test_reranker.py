@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from src.reranker import Reranker, score_margin, validate_mode
+
+CONTROLS = [
+    {"control_id": "GOV-01", "domain": "Governance", "description": "Program."},
+    {"control_id": "CRY-01", "domain": "Cryptography", "description": "Encrypt."},
+    {"control_id": "IAC-06", "domain": "Identification", "description": "MFA."},
+]
+
+
+class FakeCrossEncoder:
+    """Scores a pair by how many query words appear in the control text."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, pairs, **kwargs):
+        self.calls += 1
+        return np.array(
+            [
+                4.0 * sum(w in text.lower() for w in query.lower().split()) - 2.0
+                for query, text in pairs
+            ]
+        )
+
+
+def test_rerank_batch_scores_all_pairs_in_one_call():
+    model = FakeCrossEncoder()
+    reranker = Reranker(model)
+
+    results = reranker.rerank_batch(["encrypt data", "mfa"], [CONTROLS, CONTROLS[:2]])
+
+    assert model.calls == 1
+    controls, scores = results[0]
+    assert controls[0]["control_id"] == "CRY-01"
+    # Scores are the raw logits, best first
+    assert scores.tolist() == [2.0, -2.0, -2.0]
+    # No candidate matches "mfa" in the second list: order is kept, scores tie
+    assert [c["control_id"] for c in results[1][0]] == ["GOV-01", "CRY-01"]
+    assert score_margin(results[1][1]) == pytest.approx(0.0)
+
+
+def test_score_margin_does_not_depend_on_the_candidate_count():
+    assert score_margin(np.array([3.0, 1.9])) == pytest.approx(1.1)
+    # More low-scoring candidates would shrink a softmax share, not the gap
+    assert score_margin(np.array([3.0, 1.9, 1.8, 1.8, 1.7])) == pytest.approx(1.1)
+    assert score_margin(np.array([-4.0])) == float("inf")
+    assert score_margin(np.array([])) == 0.0
+
+
+def test_validate_mode():
+    assert validate_mode("hybrid") == "hybrid"
+    with pytest.raises(ValueError):
+        validate_mode("turbo")
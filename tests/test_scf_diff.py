@@ -0,0 +1,49 @@
+from src.scf_diff import diff_control, diff_controls, diff_summary, is_empty_diff
+
+BASE = {
+    "control_id": "CRY-01",
+    "domain": "Cryptography",
+    "description": "Encrypt data at rest.",
+    "weight": 5,
+    "regulations": {"GDPR": "Art 32", "SOC 2": "CC6.1", "HIPAA": "164.312"},
+}
+
+
+def test_diff_control_reports_fields_and_regulation_changes():
+    new = {
+        **BASE,
+        "description": "Encrypt data at rest and in transit.",
+        "regulations": {"GDPR": "Art 32", "SOC 2": "CC6.7", "PCI DSS": "3.5"},
+    }
+
+    assert diff_control(BASE, new) == {
+        "description": {
+            "old": "Encrypt data at rest.",
+            "new": "Encrypt data at rest and in transit.",
+        },
+        "regulations": {
+            "added": {"PCI DSS": "3.5"},
+            "removed": {"HIPAA": "164.312"},
+            "changed": {"SOC 2": {"old": "CC6.1", "new": "CC6.7"}},
+        },
+    }
+    assert diff_control(BASE, dict(BASE)) == {}
+
+
+def test_diff_controls_added_removed_changed():
+    old = [BASE, {**BASE, "control_id": "GOV-01"}]
+    new = [{**BASE, "weight": 8}, {**BASE, "control_id": "IAC-01"}]
+
+    diff = diff_controls(old, new)
+
+    assert diff["added"] == ["IAC-01"]
+    assert diff["removed"] == ["GOV-01"]
+    assert diff["changed"] == {"CRY-01": {"weight": {"old": 5, "new": 8}}}
+    assert diff_summary(diff) == {
+        "added": 1,
+        "removed": 1,
+        "changed": 1,
+        "description_changed": 0,
+        "regulations_changed": 0,
+    }
+    assert is_empty_diff(diff_controls(old, old))
@@ -0,0 +1,123 @@
+import json
+
+from src import scf_repository, scf_store
+from src.crosswalk import Crosswalk
+from src.scf_repository import RegulationIndex, SCFRepository, get_scf_repository
+from src.scf_store import build_regulation_index, write_regulation_index
+
+CONTROLS = [
+    {
+        "control_id": "GOV-01",
+        "domain": "Governance",
+        "description": "Security program.",
+        "regulations": {"ISO 27001 2022": "5.1", "EMEA EU GDPR": "Art 24"},
+    },
+    {
+        "control_id": "GOV-02",
+        "domain": "Governance",
+        "description": "Publish policies.",
+        "regulations": {"ISO 27001 2022": "5.2", "AICPA SOC 2 (2017)": "CC6.1\nCC6.2"},
+    },
+    {
+        "control_id": "CRY-01",
+        "domain": "Cryptography",
+        "description": "Use encryption.",
+        "regulations": {},
+    },
+]
+
+
+def test_repository_indexes():
+    repo = SCFRepository(CONTROLS)
+
+    assert len(repo) == 3
+    assert repo[0]["control_id"] == "GOV-01"
+    assert repo.get("CRY-01")["domain"] == "Cryptography"
+    assert repo.get("NOPE-01") is None
+    assert [c["control_id"] for c in repo.by_domain["Governance"]] == [
+        "GOV-01",
+        "GOV-02",
+    ]
+    assert [c["control_id"] for c in repo.by_prefix["CRY"]] == ["CRY-01"]
+    assert repo.domain_prefixes == {"Governance": "GOV", "Cryptography": "CRY"}
+
+
+def test_repository_regulation_index():
+    repo = SCFRepository(CONTROLS)
+
+    assert repo.regulation_names == [
+        "AICPA SOC 2 (2017)",
+        "EMEA EU GDPR",
+        "ISO 27001 2022",
+    ]
+    assert [c["control_id"] for c in repo.controls_by_regulation["ISO 27001 2022"]] == [
+        "GOV-01",
+        "GOV-02",
+    ]
+
+
+def test_regulation_index_lookups():
+    index = RegulationIndex(build_regulation_index(CONTROLS))
+
+    assert index.resolve("SOC 2") == ("AICPA SOC 2 (2017)",)
+    assert index.controls_for("ISO 27001 2022") == {"GOV-01", "GOV-02"}
+    assert index.controls_for("SOC 2", " cc6.2 ") == {"GOV-02"}
+    assert index.controls_for("SOC 2", "CC9.9") == frozenset()
+    assert index.controls_for("HIPAA") == frozenset()
+    assert index.controls_for_any(["SOC 2", "GDPR"]) == {"GOV-01", "GOV-02"}
+    assert index.controls_for_all(["SOC 2", "ISO 27001"]) == {"GOV-02"}
+
+
+def test_repository_uses_persisted_regulation_index(tmp_path):
+    path = tmp_path / "regulation_index.json"
+    write_regulation_index(CONTROLS[:1], str(path))
+
+    # A fresh persisted index is used as-is, without touching the controls
+    repo = SCFRepository(CONTROLS, regulation_index_path=str(path))
+    assert repo.regulation_index.controls_for("ISO 27001") == {"GOV-01"}
+
+    path.unlink()
+    repo = SCFRepository(CONTROLS, regulation_index_path=str(path))
+    assert repo.regulation_index.controls_for("ISO 27001") == {"GOV-01", "GOV-02"}
+    assert path.exists()
+
+
+def test_repository_regulations_come_from_crosswalk(tmp_path):
+    crosswalk_records = [
+        {"control_id": "GOV-01", "regulations": {"EMEA EU DORA": "Art 5"}},
+        {"control_id": "CRY-01", "regulations": {"FedRAMP R5 (moderate)": "SC-28"}},
+    ]
+    path = tmp_path / "crosswalk.npz"
+    Crosswalk.from_records(crosswalk_records).save(str(path))
+
+    repo = SCFRepository(CONTROLS, crosswalk_path=str(path))
+
+    assert repo.regulations("CRY-01") == {"FedRAMP R5 (moderate)": "SC-28"}
+    assert repo.regulation_names == ["EMEA EU DORA", "FedRAMP R5 (moderate)"]
+    assert repo.regulation_index.controls_for("FedRAMP") == {"CRY-01"}
+    assert SCFRepository(CONTROLS).regulations("GOV-01") == CONTROLS[0]["regulations"]
+
+
+def test_repository_version_tracks_content():
+    changed = [dict(CONTROLS[0], description="Changed.")] + CONTROLS[1:]
+    assert SCFRepository(CONTROLS).version == SCFRepository(list(CONTROLS)).version
+    assert SCFRepository(CONTROLS).version != SCFRepository(changed).version
+
+
+def test_get_scf_repository_is_shared_until_file_changes(tmp_path, monkeypatch):
+    json_path = tmp_path / "scf_parsed.json"
+    json_path.write_text(json.dumps(CONTROLS), encoding="utf-8")
+    monkeypatch.setattr(scf_store, "_store", None)
+    monkeypatch.setattr(scf_repository, "_repository", None)
+    monkeypatch.setattr(
+        scf_repository, "REGULATION_INDEX_FILE", str(tmp_path / "index.json")
+    )
+    monkeypatch.setattr(
+        scf_repository,
+        "get_scf_store",
+        lambda: scf_store.get_scf_store(str(json_path), str(tmp_path / "scf.bin")),
+    )
+
+    first = get_scf_repository()
+    assert first is get_scf_repository()
+    assert first.get("GOV-01")["regulations"]["ISO 27001 2022"] == "5.1"
@@ -0,0 +1,77 @@
+import json
+import os
+
+import pytest
+
+from src import scf_store
+from src.scf_store import SCFStore, get_scf_store, write_compact_db
+
+RECORDS = [
+    {
+        "control_id": "GOV-01",
+        "domain": "Governance",
+        "description": "Establish a security program.",
+        "weight": 10,
+        "erl": "E-GOV-01",
+        "question": "Does the organization have a program?",
+        "regulations": {"ISO 27001 2022": "5.1"},
+    },
+    {
+        "control_id": "CRY-01",
+        "domain": "Cryptography",
+        "description": "Use cryptographic controls.",
+        "weight": 5,
+        "erl": "",
+        "question": "",
+        "regulations": {},
+    },
+]
+
+
+@pytest.fixture(autouse=True)
+def reset_store(monkeypatch):
+    monkeypatch.setattr(scf_store, "_store", None)
+    monkeypatch.setattr(scf_store, "_store_mtime", None)
+
+
+def test_compact_roundtrip(tmp_path):
+    path = str(tmp_path / "scf.bin")
+    write_compact_db(RECORDS, path)
+    store = SCFStore(path)
+
+    assert len(store) == 2
+    assert "CRY-01" in store
+    gov = store.get("GOV-01")
+    assert gov["weight"] == 10
+    assert gov["regulations"] == {"ISO 27001 2022": "5.1"}
+    assert gov.get("erl") == "E-GOV-01"
+    assert dict(store.get("CRY-01")) == RECORDS[1]
+    assert store.get("NOPE-01") is None
+
+
+def test_details_are_loaded_lazily(tmp_path):
+    path = str(tmp_path / "scf.bin")
+    write_compact_db(RECORDS, path)
+    store = SCFStore(path)
+
+    records = store.records()
+    assert records[0]["description"] == "Establish a security program."
+    assert store._details_cache == {}
+
+    _ = records[0]["question"]
+    assert list(store._details_cache) == ["GOV-01"]
+
+
+def test_get_scf_store_builds_from_json_and_memoizes(tmp_path):
+    json_path = tmp_path / "scf_parsed.json"
+    json_path.write_text(json.dumps(RECORDS), encoding="utf-8")
+    compact_path = str(tmp_path / "scf.bin")
+
+    first = get_scf_store(str(json_path), compact_path)
+    assert os.path.exists(compact_path)
+    assert first is get_scf_store(str(json_path), compact_path)
+    assert first.ids == ["GOV-01", "CRY-01"]
+
+
+def test_get_scf_store_missing_data(tmp_path):
+    assert get_scf_store(str(tmp_path / "x.json"), str(tmp_path / "x.bin")) is None
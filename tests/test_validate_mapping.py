@@ -38,6 +38,13 @@ def test_validate_clamps_confidence_below_0():
     assert validated.mappings[0].confidence == 0
 
 
+def test_validate_keeps_unrated_confidence():
+    """Reranker-only mappings have no confidence to clamp."""
+    result = MappingResult(mappings=[_make_control("GOV-01", confidence=None)])
+    validated = _validate_mapping_result(result, {"GOV-01": {}})
+    assert validated.mappings[0].confidence is None
+
+
 def test_validate_empty_mappings():
     result = MappingResult(mappings=[])
     validated = _validate_mapping_result(result, {"GOV-01": {}})
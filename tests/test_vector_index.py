@@ -0,0 +1,97 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from src.embedding_store import l2_normalize
+from src.vector_index import (
+    FaissIndex,
+    VectorIndex,
+    load_or_build_index,
+    resolve_backend,
+    top_k_indices,
+)
+
+
+def test_top_k_indices_orders_best_first():
+    sims = np.array([[0.1, 0.9, 0.5, 0.7], [0.8, 0.2, 0.6, 0.4]])
+    assert top_k_indices(sims, 2).tolist() == [[1, 3], [0, 2]]
+    # k larger than the corpus returns every index, still sorted
+    assert top_k_indices(sims, 10).tolist() == [[1, 3, 2, 0], [0, 2, 3, 1]]
+
+
+def test_vector_index_search_matches_cosine_ranking():
+    corpus = np.array([[3.0, 0.0], [1.0, 1.0], [0.0, 5.0]])
+    index = VectorIndex(corpus)
+
+    indices, scores = index.search(np.array([[0.0, 2.0], [4.0, 0.5]]), k=2)
+
+    assert indices.tolist() == [[2, 1], [0, 1]]
+    assert scores[0, 0] == pytest.approx(1.0)
+    assert scores[0, 1] == pytest.approx(1 / np.sqrt(2))
+    # Exact similarities for arbitrary rows, e.g. candidates from another retriever
+    assert index.similarities(np.array([[0.0, 2.0]]), np.array([[0, 2]])).tolist() == [
+        [0.0, 1.0]
+    ]
+
+
+def test_vector_index_accepts_single_query_vector():
+    index = VectorIndex(np.eye(3), normalized=True)
+    indices, _ = index.search(np.array([0.0, 0.0, 1.0]), k=1)
+    assert indices.tolist() == [[2]]
+
+
+def test_missing_ann_library_falls_back_to_exact():
+    with patch("src.vector_index.importlib.util.find_spec", return_value=None):
+        assert resolve_backend("faiss") == "exact"
+    with pytest.raises(ValueError):
+        resolve_backend("annoy")
+
+
+def test_ann_search_never_returns_missing_labels():
+    vectors = l2_normalize(np.array([[1.0, 0.0], [0.6, 0.8], [0.0, 1.0]]))
+    index = FaissIndex(vectors, index=None, count=3)
+    queries = np.array([[1.0, 0.1], [0.1, 1.0]])
+
+    # The graph found a single neighbour for the second query, padded with -1
+    def partial_search(queries, k):
+        return np.array([[0, 1], [2, -1]]), np.array([[0.99, 0.6], [0.99, -3e38]])
+
+    with patch.object(index, "_search", side_effect=partial_search):
+        indices, scores = index.search(queries, k=2)
+
+    assert indices.tolist() == [[0, 1], [2, 1]]
+    assert scores[1] == pytest.approx(
+        VectorIndex(vectors).search(queries[1], k=2)[1][0]
+    )
+
+
+@pytest.mark.parametrize("backend,module", [("hnsw", "hnswlib"), ("faiss", "faiss")])
+def test_ann_backend_matches_exact_and_is_persisted(tmp_path, backend, module):
+    pytest.importorskip(module)
+    rng = np.random.default_rng(0)
+    vectors = l2_normalize(rng.normal(size=(500, 16)))
+    queries = vectors[:20] + rng.normal(scale=0.05, size=(20, 16))
+    path = str(tmp_path / f"emb.{backend}.index")
+
+    index = load_or_build_index(vectors, "v1", backend, path)
+    indices, scores = index.search(queries, k=5)
+    exact_indices, exact_scores = VectorIndex(vectors, normalized=True).search(
+        queries, k=5
+    )
+
+    assert index.backend == backend
+    assert indices.shape == scores.shape == (20, 5)
+    assert indices[:, 0].tolist() == exact_indices[:, 0].tolist()
+    assert scores[:, 0] == pytest.approx(exact_scores[:, 0], abs=1e-4)
+
+    # Same embeddings version: the saved graph is loaded, not rebuilt
+    cls = type(index)
+    with patch.object(cls, "build", side_effect=AssertionError("rebuilt")):
+        reloaded = load_or_build_index(vectors, "v1", backend, path)
+    assert reloaded.search(queries, k=5)[0].tolist() == indices.tolist()
+
+    # A new version invalidates it
+    with patch.object(cls, "build", wraps=cls.build) as mock_build:
+        load_or_build_index(vectors, "v2", backend, path)
+    mock_build.assert_called_once()